@@ -0,0 +1,249 @@
+"""
+# ============================================================================
+# BACKTEST.PY
+# ----------------------------------------------------------------------------
+# Backtesting of the MACD crossover signal described in 'macd.py' and
+# plotting.macd_chart(): the strategy is long while the MACD (DIF) is
+# above its signal line (DEA) and out of the market otherwise. A signal
+# on a day's close is traded from the next day on.
+#
+# Signals, positions and returns are array operations down the columns
+# of a date x symbol array, so many symbols are tested at once. Parameter
+# grids share their EMA computations: every span is smoothed once, and
+# every fast/slow pair computes all of its signal spans in one pass. Grids
+# are split across a process pool.
+#
+# ============================================================================
+"""
+
+# Imports.
+import os
+import numpy as np
+import pandas as pd
+
+from concurrent.futures import ProcessPoolExecutor
+
+from .moving_average import ewm_mean_block
+from ..utils.utils import check_and_convert_value_to_list
+
+
+BACKTEST_STATS = ['TotalReturn', 'AnnualReturn', 'AnnualVolatility', 'SharpeRatio',
+                  'MaxDrawdown', 'Trades', 'Exposure']
+
+# Trading days per year, used to annualize the statistics.
+TRADING_DAYS = 252
+
+
+def macd_positions(dif, dea):
+    """
+    Returns the position of the MACD crossover signal: 1 while the MACD
+    (DIF) is above the DEA, otherwise 0.
+    """
+    return (dif > dea).astype(np.float64)
+
+
+def price_returns(prices):
+    """
+    Returns the daily returns down the columns of a price array, NaN on
+    the first row.
+    """
+    returns = np.full(prices.shape, np.nan)
+    returns[1:] = prices[1:] / prices[:-1] - 1.0
+    return returns
+
+
+def held_positions(positions):
+    """
+    Returns the positions held over each day: the position taken at the
+    close of the previous day, 0 on the first row.
+    """
+    held = np.zeros(positions.shape)
+    held[1:] = positions[:-1]
+    return held
+
+
+def strategy_returns(returns, positions, cost=0.0):
+    """
+    Calculates the daily returns of holding the positions, each taken at
+    the close of its day and held over the next day, down the columns of
+    an array.
+
+    Args:
+        returns (numpy.ndarray): Daily price returns of shape (rows,
+         columns), see price_returns().
+
+        positions (numpy.ndarray): Positions, same shape as the returns.
+
+        cost (float): Cost of each change of position, as a fraction of
+         the invested amount. Default is 0.
+
+    Returns:
+        (numpy.ndarray): The strategy returns, NaN where the price return
+         is missing.
+    """
+    held = held_positions(positions)
+    trades = np.abs(np.diff(held, axis=0, prepend=0.0))
+    return held * returns - cost * trades
+
+
+def performance_stats(returns, held, periods_per_year=TRADING_DAYS):
+    """
+    Summarizes strategy returns down the columns of an array. Trades and
+    exposure are counted from the held positions on the days with a
+    return, the days that strategy_returns() charges costs on, so rows
+    missing at the end of a column add no trades.
+
+    Args:
+        returns (numpy.ndarray): Strategy returns, NaN for missing days.
+
+        held (numpy.ndarray): The held positions, same shape, see
+         held_positions().
+
+        periods_per_year (int): Periods per year to annualize with.
+
+    Returns:
+        (dict): Array per statistic, one value per column, keyed by the
+         names in BACKTEST_STATS.
+    """
+    valid = ~np.isnan(returns)
+    r = np.where(valid, returns, 0.0)
+    days = valid.sum(axis=0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        total = np.exp(np.log1p(r).sum(axis=0)) - 1.0
+        annual = (1.0 + total) ** (periods_per_year / days) - 1.0
+        mean = r.sum(axis=0) / days
+        std = np.sqrt(((r - mean)**2 * valid).sum(axis=0) / (days - 1))
+        sharpe = mean / std * np.sqrt(periods_per_year)
+    equity = np.cumprod(1.0 + r, axis=0)
+    drawdown = (equity / np.maximum.accumulate(equity, axis=0) - 1.0).min(axis=0)
+    changes = np.abs(np.diff(held, axis=0, prepend=0.0))
+    trades = np.where(valid, changes, 0.0).sum(axis=0)
+    exposure = np.where(valid, held, 0.0).sum(axis=0) / days
+    return dict(zip(BACKTEST_STATS, [total, annual, std*np.sqrt(periods_per_year), sharpe,
+                                     drawdown, trades, exposure]))
+
+
+def backtest_macd(df_input, price_column='Close', fast=12, slow=26, signal=9, cost=0.0):
+    """
+    Backtests the MACD crossover signal on a stock data table. Adds the
+    columns 'Position' (1 when long), 'StrategyReturns' and 'Equity'
+    (growth of 1 invested).
+
+    Args:
+        df_input (pandas.DataFrame): The stock data table.
+
+        price_column (str): The price column to use for the calculation.
+         Typically is the 'Close' column.
+
+        fast (int): Span of the fast EMA. Default is 12.
+
+        slow (int): Span of the slow EMA. Default is 26.
+
+        signal (int): Span of the DEA, the EMA of the MACD. Default is 9.
+
+        cost (float): Cost of each change of position, as a fraction.
+
+    Returns:
+        (pandas.DataFrame): The stock data table with the new columns.
+    """
+    prices = df_input[[price_column]].to_numpy(dtype=np.float64)
+    ema = ewm_mean_block(prices, [fast, slow])
+    dif = ema[:, :1] - ema[:, 1:]
+    positions = macd_positions(dif, ewm_mean_block(dif, signal))
+    returns = strategy_returns(price_returns(prices), positions, cost)
+    return df_input.assign(Position=positions[:, 0],
+                           StrategyReturns=returns[:, 0],
+                           Equity=np.cumprod(1.0 + np.nan_to_num(returns[:, 0])))
+
+
+def grid_stats(prices, pairs, signals, cost=0.0, periods_per_year=TRADING_DAYS):
+    """
+    Backtests every combination of fast/slow pairs and signal spans on all
+    columns of a price array. Each EMA span is computed once, and the DEA
+    of all signal spans of a pair in one pass.
+
+    Args:
+        prices (numpy.ndarray): Prices of shape (rows, columns), e.g. one
+         column per symbol with missing rows at the bottom.
+
+        pairs (list): The (fast, slow) span pairs.
+
+        signals (list): The signal spans.
+
+        cost (float): Cost of each change of position, as a fraction.
+
+        periods_per_year (int): Periods per year to annualize with.
+
+    Returns:
+        (list): Tuples of (fast, slow, signal, stats), with stats as
+         returned by performance_stats().
+    """
+    spans = sorted({s for pair in pairs for s in pair})
+    n = prices.shape[1]
+    ema = ewm_mean_block(prices, spans)
+    d_ema = {s: ema[:, i*n:(i + 1)*n] for i, s in enumerate(spans)}
+    returns = price_returns(prices)
+
+    results = []
+    for fast, slow in pairs:
+        dif = d_ema[fast] - d_ema[slow]
+        dea = ewm_mean_block(dif, signals)
+        for i, signal in enumerate(signals):
+            positions = macd_positions(dif, dea[:, i*n:(i + 1)*n])
+            results.append((fast, slow, signal,
+                            performance_stats(strategy_returns(returns, positions, cost),
+                                              held_positions(positions), periods_per_year)))
+    return results
+
+
+def backtest_grid(prices, symbols, fast=12, slow=26, signal=9, cost=0.0, max_workers=None):
+    """
+    Backtests the MACD crossover signal for many symbols over a grid of
+    fast, slow and signal spans. Pairs with a fast span not below the slow
+    span are skipped. The fast/slow pairs are split into chunks that run on
+    a process pool.
+
+    Args:
+        prices (numpy.ndarray): Prices of shape (rows, symbols), e.g. a
+         packed AlignedPanel, see AlignedPanel.pack().
+
+        symbols (list): The symbols of the columns.
+
+        fast (int, list): Span or spans of the fast EMA. Default is 12.
+
+        slow (int, list): Span or spans of the slow EMA. Default is 26.
+
+        signal (int, list): Span or spans of the DEA. Default is 9.
+
+        cost (float): Cost of each change of position, as a fraction.
+
+        max_workers (int): Number of processes. 1 runs in the calling
+         process. Default is None, which uses the number of processors.
+
+    Returns:
+        (pandas.DataFrame): Statistics indexed by 'fast', 'slow', 'signal'
+         and 'Symbol', with the columns in BACKTEST_STATS.
+    """
+    fast = check_and_convert_value_to_list(fast, int)
+    slow = check_and_convert_value_to_list(slow, int)
+    signals = check_and_convert_value_to_list(signal, int)
+    pairs = [(f, s) for f in fast for s in slow if f < s]
+    if not pairs:
+        raise ValueError("At least one fast span must be below a slow span.")
+
+    if max_workers == 1:
+        results = grid_stats(prices, pairs, signals, cost)
+    else:
+        # Contiguous chunks, so pairs sharing a fast span mostly share a worker.
+        n_chunks = min(len(pairs), max_workers or os.cpu_count() or 1)
+        bounds = np.linspace(0, len(pairs), n_chunks + 1).astype(int)
+        chunks = [pairs[a:b] for a, b in zip(bounds[:-1], bounds[1:])]
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures = [executor.submit(grid_stats, prices, chunk, signals, cost) for chunk in chunks]
+            results = [r for future in futures for r in future.result()]
+
+    df_list = []
+    for f, s, g, stats in results:
+        df = pd.DataFrame(stats, index=pd.Index(symbols, name='Symbol'))
+        df_list.append(pd.concat({(f, s, g): df}, names=['fast', 'slow', 'signal']))
+    return pd.concat(df_list).sort_index()
@@ -0,0 +1,281 @@
+"""
+# ============================================================================
+# CORRELATION.PY
+# ----------------------------------------------------------------------------
+# Pairwise correlation and covariance of many symbols, e.g. of their daily
+# returns aligned on a date x symbol panel. Missing dates are handled
+# pairwise-complete, as in pandas' DataFrame.corr(): each pair uses the
+# dates on which both symbols have a value.
+#
+# The matrices are derived from sums accumulated with masked matrix
+# products over pairs of blocks of symbols and chunks of dates, read from
+# a memory-mapped panel, so memory is bounded by the block and chunk size.
+# The pairs of blocks run on a thread pool. Each symbol's values are
+# shifted by their mean before they are summed, so that the sums of
+# price levels do not cancel. The sums can be saved and refreshed with
+# the rows appended to the stored data since.
+#
+# ============================================================================
+"""
+
+# Imports.
+import os
+import pickle
+import numpy as np
+import pandas as pd
+
+from concurrent.futures import ThreadPoolExecutor
+
+
+MOMENTS_FOLDER = ".correlation"
+
+# Default number of symbols per block and dates per chunk.
+BLOCK_SIZE = 256
+ROW_CHUNK = 1024
+
+# Number of last dates of each symbol saved to refresh the sums. An update
+# rewrites the last stored row and the one before it, see
+# StockData.add_columns_on_update().
+TAIL_ROWS = 5
+
+
+class PairwiseMoments:
+    """
+    Sums over the pairwise-complete rows of every pair of columns, from
+    which covariance and correlation are derived. For columns i and j:
+    'count' is the number of rows where both are present, 'sum_x' and
+    'sum_xx' the sum and sum of squares of column i over those rows, and
+    'sum_xy' the sum of products. The sums are of the values minus a
+    fixed shift per column, which leaves the covariance unchanged.
+
+    Args:
+        n_columns (int): Number of columns, e.g. symbols.
+
+        shift (numpy.ndarray): The shift of each column, e.g. its mean.
+         Default is None, which does not shift.
+    """
+    def __init__(self, n_columns, shift=None):
+        """
+        Constructor.
+        """
+        shape = (n_columns, n_columns)
+        self.count = np.zeros(shape)
+        self.sum_x = np.zeros(shape)
+        self.sum_xx = np.zeros(shape)
+        self.sum_xy = np.zeros(shape)
+        self.shift = np.zeros(n_columns) if isinstance(shift, type(None)) else np.asarray(shift, dtype=np.float64)
+        # Set by panel_moments() to allow a refresh.
+        self.symbols = None
+        self.checksums = None
+        self.tail_dates = None
+        self.tail_values = None
+
+
+    def add(self, values, block_size=BLOCK_SIZE, row_chunk=ROW_CHUNK, max_workers=None, sign=1.0):
+        """
+        Adds rows to the sums. Each pair of column blocks reads its own
+        chunks of rows, so 'values' may be a memory-mapped array.
+
+        Args:
+            values (numpy.ndarray): Array of shape (rows, columns), with
+             NaN for missing values.
+
+            block_size (int): Number of columns per block.
+
+            row_chunk (int): Number of rows processed at once.
+
+            max_workers (int): Number of threads. Default is None, which
+             uses the default of concurrent.futures.ThreadPoolExecutor.
+
+            sign (float): 1 to add the rows, -1 to remove them.
+        """
+        n = values.shape[1]
+        blocks = [slice(k, min(k + block_size, n)) for k in range(0, n, block_size)]
+        pairs = [(a, b) for i, a in enumerate(blocks) for b in blocks[i:]]
+
+        def read_chunk(r, block):
+            chunk = np.asarray(values[r:r + row_chunk, block], dtype=np.float64) - self.shift[block]
+            mask = ~np.isnan(chunk)
+            return np.where(mask, chunk, 0.0), mask.astype(np.float64)
+
+        # Pairs of blocks write disjoint parts of the sums, so they run concurrently.
+        def add_pair(pair):
+            a, b = pair
+            for r in range(0, len(values), row_chunk):
+                x_a, mask_a = read_chunk(r, a)
+                x_b, mask_b = (x_a, mask_a) if a == b else read_chunk(r, b)
+                self.count[a, b] += sign * (mask_a.T @ mask_b)
+                self.sum_x[a, b] += sign * (x_a.T @ mask_b)
+                self.sum_xx[a, b] += sign * ((x_a*x_a).T @ mask_b)
+                self.sum_xy[a, b] += sign * (x_a.T @ x_b)
+                if a != b:
+                    self.sum_x[b, a] += sign * (x_b.T @ mask_a)
+                    self.sum_xx[b, a] += sign * ((x_b*x_b).T @ mask_a)
+            if a != b:
+                self.count[b, a] = self.count[a, b].T
+                self.sum_xy[b, a] = self.sum_xy[a, b].T
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            list(executor.map(add_pair, pairs))
+
+
+    def remove(self, values, **kwargs):
+        """
+        Removes rows that were added before, see PairwiseMoments.add().
+        """
+        self.add(values, sign=-1.0, **kwargs)
+
+
+    def covariance(self, min_periods=1):
+        """
+        Returns the pairwise-complete sample covariance matrix. Pairs with
+        fewer than 'min_periods' common rows are NaN.
+        """
+        n = self.count
+        with np.errstate(divide='ignore', invalid='ignore'):
+            cov = (self.sum_xy - self.sum_x * self.sum_x.T / n) / (n - 1)
+        return np.where((n >= max(min_periods, 2)), cov, np.nan)
+
+
+    def correlation(self, min_periods=1):
+        """
+        Returns the pairwise-complete Pearson correlation matrix. Pairs with
+        fewer than 'min_periods' common rows, or without variance, are NaN.
+        """
+        n = self.count
+        var_x = n*self.sum_xx - self.sum_x**2
+        with np.errstate(divide='ignore', invalid='ignore'):
+            corr = (n*self.sum_xy - self.sum_x * self.sum_x.T) / np.sqrt(var_x * var_x.T)
+        valid = (n >= max(min_periods, 1)) & (var_x > 0) & (var_x.T > 0)
+        return np.where(valid, np.clip(corr, -1.0, 1.0), np.nan)
+
+
+def column_means(values, block_size=BLOCK_SIZE):
+    """
+    Returns the mean of each column of an array, ignoring NaN, reading one
+    block of columns at a time. Columns without values have mean 0.
+    """
+    n = values.shape[1]
+    means = np.zeros(n)
+    for k in range(0, n, block_size):
+        block = np.asarray(values[:, k:k + block_size], dtype=np.float64)
+        count = (~np.isnan(block)).sum(axis=0)
+        total = np.nansum(block, axis=0)
+        means[k:k + block_size] = np.divide(total, count, out=np.zeros(len(total)), where=count > 0)
+    return means
+
+
+def panel_moments(panel, field, block_size=BLOCK_SIZE, max_workers=None):
+    """
+    Accumulates the pairwise moments of a field of a memory-mapped price
+    panel, see storage.panel.PricePanel, with the values of each symbol on
+    its last dates needed to refresh them, see refresh_moments().
+
+    Args:
+        panel (PricePanel): The price panel, e.g. of 'DailyReturns'.
+
+        field (str): The field.
+
+        block_size (int): Number of symbols per block.
+
+        max_workers (int): Number of threads.
+
+    Returns:
+        (PairwiseMoments): The moments.
+    """
+    values = panel.field(field)
+    moments = PairwiseMoments(values.shape[1], shift=column_means(values, block_size))
+    moments.add(values, block_size=block_size, max_workers=max_workers)
+
+    moments.symbols = list(panel.symbols)
+    moments.tail_dates, moments.tail_values = [], []
+    for j, (first, last) in enumerate(panel.bounds):
+        tail = slice(max(first, last - TAIL_ROWS), last)
+        moments.tail_dates.append(panel.dates[tail])
+        moments.tail_values.append(np.array(values[tail, j], dtype=np.float64))
+    return moments
+
+
+def refresh_moments(moments, d_tables, d_starts, column, block_size=BLOCK_SIZE, max_workers=None):
+    """
+    Refreshes pairwise moments with the rows appended to the stored data
+    of some symbols, which may replace the symbol's last stored rows. The
+    rows from the first appended date on are removed as they were and
+    added as they are now. The previous values of replaced rows are taken
+    from the saved last dates of the symbol, see TAIL_ROWS.
+
+    Args:
+        moments (PairwiseMoments): Moments returned by panel_moments() or
+         an earlier refresh.
+
+        d_tables (dict): The current rows of every symbol from the first
+         appended date on, with the 'Date' column and the column.
+
+        d_starts (dict): The first appended date of each symbol with
+         appended rows.
+
+        column (str): The column.
+
+        block_size (int): Number of symbols per block.
+
+        max_workers (int): Number of threads.
+
+    Returns:
+        (PairwiseMoments): The refreshed moments, or None if rows before
+         the saved last dates of a symbol were replaced, which requires
+         accumulating all rows again.
+    """
+    columns = {s: j for j, s in enumerate(moments.symbols)}
+    for s, start in d_starts.items():
+        tail_dates = moments.tail_dates[columns[s]]
+        if len(tail_dates) and start < tail_dates[0]:
+            return None
+    if not d_starts:
+        return moments
+
+    first = min(d_starts.values())
+    d_dates = {s: pd.DatetimeIndex(df['Date']) for s, df in d_tables.items()}
+    dates = None
+    for label_dates in d_dates.values():
+        label_dates = label_dates[label_dates >= first]
+        dates = label_dates if dates is None else dates.union(label_dates)
+    new = np.full((len(dates), len(columns)), np.nan)
+    for s, j in columns.items():
+        rows = dates.get_indexer(d_dates[s])
+        keep = rows >= 0
+        new[rows[keep], j] = d_tables[s][column].to_numpy(dtype=np.float64)[keep]
+
+    # Appended rows were absent before, except the replaced last rows.
+    old = new.copy()
+    for s, start in d_starts.items():
+        j = columns[s]
+        old[dates >= start, j] = np.nan
+        tail_dates, tail_values = moments.tail_dates[j], moments.tail_values[j]
+        rows = dates.get_indexer(tail_dates)
+        replaced = (tail_dates >= start) & (rows >= 0)
+        old[rows[replaced], j] = tail_values[replaced]
+        moments.tail_dates[j] = d_dates[s][-TAIL_ROWS:]
+        moments.tail_values[j] = d_tables[s][column].to_numpy(dtype=np.float64)[-TAIL_ROWS:]
+
+    moments.remove(old, block_size=block_size, max_workers=max_workers)
+    moments.add(new, block_size=block_size, max_workers=max_workers)
+    return moments
+
+
+def read_moments(file):
+    """
+    Reads saved pairwise moments, or returns None if there are none.
+    """
+    if not os.path.exists(file):
+        return None
+    with open(file, "rb") as fp:
+        return pickle.load(fp)
+
+
+def write_moments(file, moments):
+    """
+    Writes pairwise moments to a file, creating its folder.
+    """
+    os.makedirs(os.path.dirname(file), exist_ok=True)
+    with open(file, "wb") as fp:
+        pickle.dump(moments, fp, protocol=pickle.HIGHEST_PROTOCOL)
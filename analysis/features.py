@@ -0,0 +1,68 @@
+"""
+# ============================================================================
+# FEATURES.PY
+# ----------------------------------------------------------------------------
+# The columns added to stock data on import, computed in a single pass
+# over NumPy arrays. Produces the same columns as 'add_year_month_quarter'
+# followed by the daily, monthly, quarterly and annual return functions,
+# without intermediate copies or merges, and keeps the date index.
+#
+# ============================================================================
+"""
+
+# Imports.
+import numpy as np
+import pandas as pd
+
+from .returns import grouped_returns_array
+
+
+IMPORT_COLUMNS = ['Date', 'FracDividends', 'year', 'month', 'quarter', 'Q',
+                  'DailyReturns', 'MonthlyReturns', 'QuarterlyReturns', 'AnnualReturns']
+
+
+def add_import_columns(df_input, price_col='Close'):
+    """
+    Adds the date, dividend and returns columns to downloaded stock data.
+    The table must be indexed and sorted by date, as returned by 'yfinance'.
+    The new columns are built as arrays and joined to the table in a single
+    allocation.
+    
+    Args:
+        df_input (pandas.DataFrame): The stock price data table.
+        
+        price_col (str): The name of the column containing the price data.
+    
+    Returns:
+        (pandas.DataFrame): The table with the new columns, indexed by date.
+    """
+    dates = pd.DatetimeIndex(df_input.index)
+    prices = df_input[price_col].to_numpy(dtype=np.float64)
+    
+    # Date parts, with the quarter label built once per distinct quarter.
+    year = dates.year.to_numpy()
+    month = dates.month.to_numpy()
+    quarter = ((month + 2) // 3).astype(np.int64)
+    quarter_codes = year.astype(np.int64) * 4 + quarter - 1
+    unique_quarters, inverse = np.unique(quarter_codes, return_inverse=True)
+    quarter_labels = np.array([f"{c // 4}-Q{c % 4 + 1}" for c in unique_quarters], dtype=object)
+    
+    # Daily returns against the previous row.
+    previous = np.r_[np.nan, prices[:-1]]
+    
+    d_cols = {
+        'Date': dates,
+        'FracDividends': df_input['Dividends'].to_numpy(dtype=np.float64) / prices,
+        'year': year,
+        'month': month,
+        'quarter': quarter,
+        'Q': quarter_labels[inverse],
+        'DailyReturns': (prices - previous) / previous,
+        'MonthlyReturns': grouped_returns_array(prices, year.astype(np.int64) * 12 + month),
+        'QuarterlyReturns': grouped_returns_array(prices, quarter_codes),
+        'AnnualReturns': grouped_returns_array(prices, year)
+    }
+    
+    df = df_input.drop(columns=[c for c in IMPORT_COLUMNS if c in df_input.columns])
+    df = pd.concat([df, pd.DataFrame(d_cols, index=df_input.index)], axis=1)
+    return df.rename_axis(None)
@@ -0,0 +1,172 @@
+"""
+# ============================================================================
+# MONTE_CARLO.PY
+# ----------------------------------------------------------------------------
+# Monte Carlo price forecasting from a stock's daily returns. Paths are
+# simulated either as geometric Brownian motion (GBM), with the drift and
+# volatility of the historical log returns, or by bootstrap resampling of
+# the historical returns.
+#
+# Paths are generated as NumPy blocks, a chunk of paths at a time. Every
+# stream of STREAM_PATHS paths has its own seeded random generator, so
+# results are reproducible for a seed and do not depend on the chunk size.
+# Only a block of forecast steps of all paths is kept in memory at once,
+# and every block is summarized into percentile bands before the next one
+# is generated. Several symbols run on a process pool.
+#
+# References:
+#     [1] https://www.investopedia.com/terms/m/montecarlosimulation.asp
+#
+# ============================================================================
+"""
+
+# Imports.
+import numpy as np
+import pandas as pd
+
+from concurrent.futures import ProcessPoolExecutor
+
+from ..utils.utils import check_and_convert_value_to_list
+
+
+MONTE_CARLO_METHODS = ['gbm', 'bootstrap']
+PERCENTILES = [5, 25, 50, 75, 95]
+
+# Default number of paths generated at once, and memory for a block of steps.
+CHUNK_SIZE = 10000
+MEMORY_BUDGET = 256 * 2**20
+
+# Number of paths drawn from each random generator.
+STREAM_PATHS = 1000
+
+
+def _log_increments(rng, log_returns, steps, size, method):
+    """
+    Draws daily log returns for a chunk of paths, one row per step.
+    """
+    if method == 'gbm':
+        return rng.normal(log_returns.mean(), log_returns.std(ddof=1), size=(steps, size))
+    return rng.choice(log_returns, size=(steps, size))
+
+
+def forecast_bands(returns, last_price, horizon=252, n_paths=10000, method='gbm',
+                   percentiles=PERCENTILES, seed=None, last_date=None,
+                   chunk_size=CHUNK_SIZE, memory_budget=MEMORY_BUDGET):
+    """
+    Simulates price paths from the daily returns of a stock and summarizes
+    them into percentile bands per forecast day.
+
+    Args:
+        returns (numpy.ndarray, pandas.Series): Historical daily returns,
+         e.g. the 'DailyReturns' column. NaN values are ignored.
+
+        last_price (float): The price the paths start from.
+
+        horizon (int): Number of trading days to forecast. Default is 252.
+
+        n_paths (int): Number of simulated paths. Default is 10000.
+
+        method (str): 'gbm' (geometric Brownian motion) or 'bootstrap'
+         (resampling of the historical returns). Default is 'gbm'.
+
+        percentiles (list): Percentiles of the price to report, 0-100.
+
+        seed (int, numpy.random.SeedSequence): Seed of the simulation.
+         Default is None, for a random seed.
+
+        last_date (pandas.Timestamp): Date of the last price. If given,
+         the table gets the 'Date' of each forecast business day.
+
+        chunk_size (int): Number of paths generated at once, rounded up to
+         a multiple of STREAM_PATHS. The results do not depend on it.
+
+        memory_budget (int): Maximum memory, in bytes, for the simulated
+         prices of all paths held at once. Default is 256 MB.
+
+    Returns:
+        (pandas.DataFrame): Table with a row per forecast day, with the
+         columns 'Step', 'Date' (if last_date is given), 'Mean' and 'PX'
+         for every percentile X.
+
+    Raises:
+        ValueError: if the method is not recognized or there are fewer
+         than two returns.
+    """
+    if method not in MONTE_CARLO_METHODS:
+        raise ValueError(f"Argument 'method' must be one of: {', '.join(MONTE_CARLO_METHODS)}.")
+    returns = np.asarray(returns, dtype=np.float64)
+    log_returns = np.log1p(returns[~np.isnan(returns)])
+    if len(log_returns) < 2:
+        raise ValueError("At least two daily returns are required for a forecast.")
+    percentiles = check_and_convert_value_to_list(percentiles, (int, float))
+
+    # One generator per stream of paths, each keeping its stream across step
+    # blocks. A chunk draws from whole streams.
+    if not isinstance(seed, np.random.SeedSequence):
+        seed = np.random.SeedSequence(seed)
+    streams = [slice(c, min(c + STREAM_PATHS, n_paths)) for c in range(0, n_paths, STREAM_PATHS)]
+    rngs = [np.random.default_rng(s) for s in seed.spawn(len(streams))]
+    per_chunk = max(1, -(-chunk_size // STREAM_PATHS))
+    chunks = [(slice(streams[c].start, streams[min(c + per_chunk, len(streams)) - 1].stop),
+               list(zip(streams[c:c + per_chunk], rngs[c:c + per_chunk])))
+              for c in range(0, len(streams), per_chunk)]
+    cum_log = np.zeros(n_paths)
+
+    step_block = int(max(1, min(horizon, memory_budget // (8 * n_paths))))
+    bands = np.empty((horizon, len(percentiles)))
+    mean = np.empty(horizon)
+    for s0 in range(0, horizon, step_block):
+        steps = min(step_block, horizon - s0)
+        prices = np.empty((steps, n_paths))
+        for chunk, chunk_streams in chunks:
+            increments = np.concatenate([_log_increments(rng, log_returns, steps,
+                                                         stream.stop - stream.start, method)
+                                         for stream, rng in chunk_streams], axis=1)
+            paths = cum_log[chunk] + np.cumsum(increments, axis=0)
+            cum_log[chunk] = paths[-1]
+            prices[:, chunk] = last_price * np.exp(paths)
+        bands[s0:s0 + steps] = np.percentile(prices, percentiles, axis=1).T
+        mean[s0:s0 + steps] = prices.mean(axis=1)
+
+    df = pd.DataFrame({'Step': np.arange(1, horizon + 1)})
+    if not isinstance(last_date, type(None)):
+        df['Date'] = pd.bdate_range(pd.Timestamp(last_date) + pd.offsets.BDay(1), periods=horizon,
+                                    tz=pd.Timestamp(last_date).tz)
+    df['Mean'] = mean
+    for i, p in enumerate(percentiles):
+        df[f"P{p:g}"] = bands[:, i]
+    return df
+
+
+def forecast_many(d_returns, d_last, horizon=252, n_paths=10000, method='gbm',
+                  percentiles=PERCENTILES, seed=None, max_workers=None, **kwargs):
+    """
+    Runs forecast_bands() for several symbols on a process pool. Each symbol
+    gets its own seed derived from 'seed', so results are reproducible and
+    do not depend on the number of workers.
+
+    Args:
+        d_returns (dict): Historical daily returns per symbol.
+
+        d_last (dict): (last date, last price) per symbol.
+
+        max_workers (int): Number of processes. 1 runs in the calling
+         process. Default is None, which uses the number of processors.
+
+        Other arguments, see forecast_bands().
+
+    Returns:
+        (dict): The percentile band table of each symbol.
+    """
+    labels = list(d_returns)
+    seeds = np.random.SeedSequence(seed).spawn(len(labels))
+    d_args = {label: dict(returns=d_returns[label], last_price=d_last[label][1],
+                          last_date=d_last[label][0], horizon=horizon, n_paths=n_paths,
+                          method=method, percentiles=percentiles, seed=s, **kwargs)
+              for label, s in zip(labels, seeds)}
+
+    if max_workers == 1:
+        return {label: forecast_bands(**args) for label, args in d_args.items()}
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = {label: executor.submit(forecast_bands, **args) for label, args in d_args.items()}
+        return {label: future.result() for label, future in futures.items()}
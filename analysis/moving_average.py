@@ -8,6 +8,8 @@
 """
 
 # Imports.
+import numpy as np
+import pandas as pd
 from ..utils.utils import check_and_convert_value_to_list
 
 
@@ -18,6 +20,9 @@ def simple_moving_average(df_input, from_cols, windows):
     of the window size, or SMA_X(col_name) if more than
     one column is used.
     
+    All windows are computed from one shared cumulative sum, see
+    rolling_mean_block(), and added to the table in a single step.
+    
     Args:
         df_input (pandas.DataFrame): Table with stock data.
         
@@ -31,22 +36,12 @@ def simple_moving_average(df_input, from_cols, windows):
         (pandas.DataFrame): The stock data table with the moving
          average columns added.
     """
-    # Copy input column.
-    df = df_input.copy()
-    
     # Handle list variables.
     from_cols = check_and_convert_value_to_list(from_cols, str)
     windows = check_and_convert_value_to_list(windows, int)
     
-    # Loops through columns and windows, adding new columns.
-    for col in from_cols:
-        for w in windows:
-            col_name = f"SMA_{str(w)}"
-            if len(from_cols) > 1:
-                col_name += f"({col})"
-            df[col_name] = df[col].rolling(window=w).mean()
-    
-    return df
+    block = rolling_mean_block(df_input[from_cols].to_numpy(dtype=np.float64), windows)
+    return _add_block(df_input, block, 'SMA', from_cols, windows)
 
 
 def exp_moving_average(df_input, from_cols, windows):
@@ -56,6 +51,10 @@ def exp_moving_average(df_input, from_cols, windows):
     of the window size, or SMA_X(col_name) if more than
     one column is used.
     
+    Each span is one pandas ewm(span).mean() scan over all columns, see
+    ewm_mean_block(), and the spans are added to the table in a single
+    step.
+    
     Args:
         df_input (pandas.DataFrame): Table with stock data.
         
@@ -69,19 +68,103 @@ def exp_moving_average(df_input, from_cols, windows):
         (pandas.DataFrame): The stock data table with the moving
          average columns added.
     """
-    # Copy input column.
-    df = df_input.copy()
-    
     # Handle list variables.
     from_cols = check_and_convert_value_to_list(from_cols, str)
     windows = check_and_convert_value_to_list(windows, int)
     
-    # Loops through columns and windows, adding new columns.
-    for col in from_cols:
-        for w in windows:
-            col_name = f"EMA_{str(w)}"
-            if len(from_cols) > 1:
+    block = ewm_mean_block(df_input[from_cols].to_numpy(dtype=np.float64), windows)
+    return _add_block(df_input, block, 'EMA', from_cols, windows)
+
+
+def _add_block(df_input, block, prefix, from_cols, windows):
+    """
+    Adds a block of moving averages, ordered by window and then column,
+    to a copy of the table with the column names and order used by
+    simple_moving_average() and exp_moving_average().
+    """
+    n = len(from_cols)
+    d_cols = {}
+    for j, col in enumerate(from_cols):
+        for i, w in enumerate(windows):
+            col_name = f"{prefix}_{str(w)}"
+            if n > 1:
                 col_name += f"({col})"
-            df[col_name] = df[col].ewm(span=w).mean()
+            d_cols[col_name] = block[:, i*n + j]
+    
+    # Existing columns are overwritten in place, new columns appended at once.
+    df = df_input.copy()
+    existing = [c for c in d_cols if c in df.columns]
+    for c in existing:
+        df[c] = d_cols.pop(c)
+    if not d_cols:
+        return df
+    return pd.concat([df, pd.DataFrame(d_cols, index=df.index)], axis=1)
+
+
+def rolling_mean_block(values, windows):
+    """
+    Calculates simple moving averages of several windows down each column
+    of an array from one shared cumulative sum, matching pandas'
+    rolling(window).mean(): a value is NaN until 'window' rows are
+    available or if the window contains NaN.
+    
+    The window sums are differences of the running total, so their
+    rounding error grows with the sum of the absolute values up to the
+    row, about 1e-16 times that sum, rather than with the window. A series
+    that falls far below its earlier level, e.g. from 5000 to 1 over 10k
+    rows, differs from pandas by about 1e-9 relative at its end.
     
-    return df
+    Args:
+        values (numpy.ndarray): Array of shape (rows, columns).
+        
+        windows (int, list): The window or list of windows, in rows.
+    
+    Returns:
+        (numpy.ndarray): Array of shape (rows, windows x columns), with
+         the columns of the first window first.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    windows = check_and_convert_value_to_list(windows, int)
+    rows, n = values.shape
+    out = np.full((rows, len(windows)*n), np.nan)
+    
+    # Cumulative sums of the values and of the NaN count, with a zero row.
+    missing = np.isnan(values)
+    zero = np.zeros((1, n))
+    csum = np.concatenate([zero, np.cumsum(np.where(missing, 0.0, values), axis=0)])
+    ccount = np.concatenate([zero, np.cumsum(missing, axis=0)])
+    
+    for i, w in enumerate(windows):
+        if w > rows:
+            continue
+        window_sum = csum[w:] - csum[:-w]
+        window_missing = ccount[w:] - ccount[:-w]
+        out[w - 1:, i*n:(i + 1)*n] = np.where(window_missing == 0, window_sum / w, np.nan)
+    return out
+
+
+def ewm_mean_block(values, spans):
+    """
+    Calculates exponential moving averages of several spans down each
+    column of an array, with one pandas ewm(span).mean() scan per span
+    over all columns, written into one preallocated block. Unlike the
+    windows of rolling_mean_block(), the spans do not share a pass: a
+    NumPy recursion over the rows of all spans at once runs a Python loop
+    per row, and is much slower than the compiled scan per span.
+    
+    Args:
+        values (numpy.ndarray): Array of shape (rows, columns).
+        
+        spans (int, list): The span or list of spans, in rows.
+    
+    Returns:
+        (numpy.ndarray): Array of shape (rows, spans x columns), with
+         the columns of the first span first.
+    """
+    values = pd.DataFrame(np.asarray(values, dtype=np.float64))
+    spans = check_and_convert_value_to_list(spans, int)
+    rows, n = values.shape
+    out = np.empty((rows, len(spans)*n))
+    for i, s in enumerate(spans):
+        out[:, i*n:(i + 1)*n] = values.ewm(span=s).mean().to_numpy()
+    return out
@@ -0,0 +1,271 @@
+"""
+# ============================================================================
+# ONLINE.PY
+# ----------------------------------------------------------------------------
+# Stateful moving average and MACD indicators that are extended one price
+# at a time, so that indicators can follow a stored stock after each
+# update without recomputing the full history. The state of a symbol's
+# indicators is saved next to its data in the symbol folder.
+#
+# The EMA follows pandas' ewm(span).mean() with adjust=True by default,
+# and the SMA follows rolling(window).mean(), so the values match the
+# functions in 'moving_average.py' and 'macd.py'.
+#
+# ============================================================================
+"""
+
+# Imports.
+import os
+import copy
+import pickle
+import numpy as np
+
+from ..utils.utils import check_and_convert_value_to_list
+
+
+INDICATOR_FILE = "indicators.pkl"
+
+
+class OnlineEMA:
+    """
+    Exponential moving average updated one value at a time. A missing
+    value (NaN) is skipped but still decays the weight of the average.
+
+    Args:
+        span (int): The span of the average, in days.
+
+        adjust (bool): Whether to use pandas' adjusted weights, which
+         ewm(span).mean() uses by default. If False, the average follows
+         the recursive form of ewm(span, adjust=False).mean(). Default
+         is True.
+    """
+    def __init__(self, span, adjust=True):
+        """
+        Constructor.
+        """
+        self.span = span
+        self.adjust = adjust
+        alpha = 2.0 / (span + 1.0)
+        self.decay = 1.0 - alpha
+        self.new_wt = 1.0 if adjust else alpha
+        self.weighted = np.nan
+        self.old_wt = 1.0
+
+
+    def update(self, value):
+        """
+        Adds a value and returns the updated average.
+        """
+        is_obs = value == value
+        if self.weighted == self.weighted:
+            self.old_wt *= self.decay
+            if is_obs:
+                if self.weighted != value:
+                    self.weighted = ((self.old_wt * self.weighted + self.new_wt * value)
+                                     / (self.old_wt + self.new_wt))
+                self.old_wt = self.old_wt + self.new_wt if self.adjust else 1.0
+        elif is_obs:
+            self.weighted = float(value)
+        return self.weighted
+
+
+    @property
+    def value(self):
+        return self.weighted
+
+
+class OnlineSMA:
+    """
+    Simple moving average updated one value at a time, from a ring buffer
+    of the last 'window' values and a compensated running sum. The average
+    is NaN until 'window' values are available or while the window
+    contains a missing value.
+
+    Args:
+        window (int): The window size, in days.
+    """
+    def __init__(self, window):
+        """
+        Constructor.
+        """
+        self.window = window
+        self.buffer = np.full(window, np.nan)
+        self.position = 0
+        self.count = 0
+        self.missing = 0
+        self.total = 0.0
+        self.compensation = 0.0
+
+
+    def update(self, value):
+        """
+        Adds a value and returns the updated average.
+        """
+        # Remove the value leaving the window.
+        if self.count == self.window:
+            old = self.buffer[self.position]
+            if old == old:
+                self._add(-old)
+            else:
+                self.missing -= 1
+        else:
+            self.count += 1
+
+        # Add the new value.
+        self.buffer[self.position] = value
+        self.position = (self.position + 1) % self.window
+        if value == value:
+            self._add(value)
+        else:
+            self.missing += 1
+        return self.value
+
+
+    @property
+    def value(self):
+        if self.count < self.window or self.missing > 0:
+            return np.nan
+        return self.total / self.window
+
+
+    def _add(self, value):
+        """
+        Adds a value to the running sum with Kahan compensation.
+        """
+        y = value - self.compensation
+        t = self.total + y
+        self.compensation = (t - self.total) - y
+        self.total = t
+
+
+class OnlineMACD:
+    """
+    MACD updated one price at a time, see macd.macd(). The values are the
+    12- and 26-period EMA, the MACD (DIF), the DEA and the OSC.
+
+    Args:
+        adjust (bool): Whether the EMAs use pandas' adjusted weights, see
+         OnlineEMA. Default is True.
+    """
+    def __init__(self, adjust=True):
+        """
+        Constructor.
+        """
+        self.ema_12 = OnlineEMA(12, adjust=adjust)
+        self.ema_26 = OnlineEMA(26, adjust=adjust)
+        self.dea = OnlineEMA(9, adjust=adjust)
+
+
+    def update(self, value):
+        """
+        Adds a price and returns the updated values, see OnlineMACD.value.
+        """
+        dif = self.ema_12.update(value) - self.ema_26.update(value)
+        self.dea.update(dif)
+        return self.value
+
+
+    @property
+    def value(self):
+        dif = self.ema_12.value - self.ema_26.value
+        return {'EMA_12': self.ema_12.value, 'EMA_26': self.ema_26.value,
+                'MACD': dif, 'DEA': self.dea.value, 'OSC': dif - self.dea.value}
+
+
+class IndicatorState:
+    """
+    The online indicators of a single stock, fed with its dated prices.
+    Prices dated before the last fed date are ignored. A price on the last
+    fed date replaces that day's price, so a revised last row from an
+    update is applied correctly.
+
+    Args:
+        column (str): The price column the indicators follow.
+
+        sma_windows (int, list): Windows of the simple moving averages.
+         Default is None, for no simple moving averages.
+
+        ema_windows (int, list): Windows of the exponential moving
+         averages. Default is None, for no exponential moving averages.
+
+        macd (bool): Whether to follow the MACD. Default is False.
+
+        adjust (bool): Whether the EMAs use pandas' adjusted weights, see
+         OnlineEMA. Default is True.
+    """
+    def __init__(self, column='Close', sma_windows=None, ema_windows=None, macd=False,
+                 adjust=True):
+        """
+        Constructor.
+        """
+        self.column = column
+        self.indicators = {}
+        if not isinstance(sma_windows, type(None)):
+            for w in check_and_convert_value_to_list(sma_windows, int):
+                self.indicators[f"SMA_{str(w)}"] = OnlineSMA(w)
+        if not isinstance(ema_windows, type(None)):
+            for w in check_and_convert_value_to_list(ema_windows, int):
+                self.indicators[f"EMA_{str(w)}"] = OnlineEMA(w, adjust=adjust)
+        if macd:
+            self.indicators['MACD'] = OnlineMACD(adjust=adjust)
+        self.last_date = None
+        self.previous = None
+
+
+    def update(self, dates, values):
+        """
+        Feeds dated prices, in date order, to the indicators.
+
+        Args:
+            dates (list, pandas.Series): The dates of the prices.
+
+            values (list, pandas.Series): The prices.
+        """
+        dates, values = list(dates), list(values)
+        for i, (date, value) in enumerate(zip(dates, values)):
+            if not isinstance(self.last_date, type(None)):
+                if date < self.last_date:
+                    continue
+                if date == self.last_date:
+                    self.indicators = copy.deepcopy(self.previous)
+            # Only the state before the last fed date is needed for a revision.
+            if i == len(dates) - 1:
+                self.previous = copy.deepcopy(self.indicators)
+            for indicator in self.indicators.values():
+                indicator.update(float(value))
+            self.last_date = date
+
+
+    def values(self):
+        """
+        Returns the current indicator values by column name, as named by
+        the functions in 'moving_average.py' and 'macd.py'.
+        """
+        d_values = {}
+        for name, indicator in self.indicators.items():
+            value = indicator.value
+            if isinstance(value, dict):
+                d_values.update(value)
+            else:
+                d_values[name] = value
+        return d_values
+
+
+def read_indicator_state(path):
+    """
+    Reads the indicator state saved in a symbol folder, or returns None if
+    the symbol has no saved indicators.
+    """
+    file = os.path.join(path, INDICATOR_FILE)
+    if not os.path.exists(file):
+        return None
+    with open(file, "rb") as fp:
+        return pickle.load(fp)
+
+
+def write_indicator_state(path, state):
+    """
+    Writes the indicator state to a symbol folder.
+    """
+    with open(os.path.join(path, INDICATOR_FILE), "wb") as fp:
+        pickle.dump(state, fp, protocol=pickle.HIGHEST_PROTOCOL)
@@ -0,0 +1,222 @@
+"""
+# ============================================================================
+# PANEL.PY
+# ----------------------------------------------------------------------------
+# Cross-sectional indicator engine. The tables of many symbols are aligned
+# into a single date x symbol array, and moving averages, the MACD and the
+# rolling indicators are computed for every symbol in one vectorized pass.
+# Each symbol's values are computed over its own rows only, so the results
+# match the per-symbol functions in 'moving_average.py', 'macd.py' and
+# 'rolling.py'.
+#
+# ============================================================================
+"""
+
+# Imports.
+import numpy as np
+import pandas as pd
+
+from .moving_average import rolling_mean_block, ewm_mean_block
+from .rolling import ROLLING_INDICATORS, rolling_indicator_arrays
+from ..utils.utils import check_and_convert_value_to_list
+
+
+PANEL_BLOCK = 64
+
+
+class AlignedPanel:
+    """
+    A column of many stock data tables aligned into a date x symbol array.
+    Dates on which a symbol has no row are NaN and marked as not present.
+
+    Args:
+        dates (pandas.DatetimeIndex): The union of the dates of all symbols.
+
+        symbols (list): The symbols, one per array column.
+
+        values (numpy.ndarray): Array of shape (dates, symbols).
+
+        rows (dict): Panel row positions of each symbol's table rows.
+    """
+    def __init__(self, dates, symbols, values, rows):
+        """
+        Constructor.
+        """
+        self.dates = dates
+        self.symbols = symbols
+        self.values = values
+        self.rows = rows
+        self.columns = {s: j for j, s in enumerate(symbols)}
+        self.present = np.zeros(values.shape, dtype=bool)
+        for s, j in self.columns.items():
+            self.present[rows[s], j] = True
+
+
+    def column(self, arr, symbol):
+        """
+        Returns the column of a symbol from a panel-shaped array, as a view
+        aligned with the panel dates.
+        """
+        return arr[:, self.columns[symbol]]
+
+
+    def symbol_values(self, arr, symbol):
+        """
+        Returns the values of a panel-shaped array on the rows of a symbol's
+        own table, in the table's row order.
+        """
+        return arr[self.rows[symbol], self.columns[symbol]]
+
+
+    def pack(self, arr, columns=slice(None)):
+        """
+        Moves the present rows of each column to the top, keeping their
+        order, so that row-wise kernels see each symbol's own rows only.
+        Absent rows are NaN at the bottom of each column. A slice of the
+        columns may be packed on its own.
+        """
+        present = self.present[:, columns]
+        order = np.argsort(~present, axis=0, kind='stable')
+        packed = np.take_along_axis(np.where(present, arr[:, columns], np.nan), order, axis=0)
+        return packed, order
+
+
+    def unpack(self, packed, order, columns=slice(None)):
+        """
+        Reverses AlignedPanel.pack() for an array computed on packed rows.
+        """
+        out = np.empty(packed.shape)
+        np.put_along_axis(out, order, packed, axis=0)
+        return np.where(self.present[:, columns], out, np.nan)
+
+
+def align_panel(d_data, labels, column='Close'):
+    """
+    Aligns a column of several stock data tables into a date x symbol panel.
+
+    Args:
+        d_data (dict): A dictionary of pandas.DataFrames with a 'Date' column.
+
+        labels (str, list): The symbols to align.
+
+        column (str): The column to align.
+
+    Returns:
+        (AlignedPanel): The aligned panel.
+    """
+    labels = check_and_convert_value_to_list(labels, str)
+    d_dates = {label: pd.DatetimeIndex(d_data[label]['Date']).as_unit('ns') for label in labels}
+    all_dates = np.unique(np.concatenate([d.asi8 for d in d_dates.values()]))
+    dates = pd.DatetimeIndex(all_dates.view('datetime64[ns]'))
+    tz = d_dates[labels[0]].tz if labels else None
+    if tz is not None:
+        dates = dates.tz_localize('UTC').tz_convert(tz)
+
+    values = np.full((len(all_dates), len(labels)), np.nan)
+    rows = {}
+    for j, label in enumerate(labels):
+        rows[label] = np.searchsorted(all_dates, d_dates[label].asi8)
+        values[rows[label], j] = d_data[label][column].to_numpy(dtype=np.float64)
+    return AlignedPanel(dates, labels, values, rows)
+
+
+def panel_sma(panel, windows):
+    """
+    Calculates the simple moving averages of every symbol in the panel.
+
+    Args:
+        panel (AlignedPanel): The aligned panel.
+
+        windows (int, list): The window or list of windows, in days.
+
+    Returns:
+        (dict): Panel-shaped arrays, keyed by column name 'SMA_X'.
+    """
+    windows = check_and_convert_value_to_list(windows, int)
+    packed, order = panel.pack(panel.values)
+    n = packed.shape[1]
+    sma = rolling_mean_block(packed, windows)
+    return {f"SMA_{str(w)}": panel.unpack(sma[:, i*n:(i + 1)*n], order)
+            for i, w in enumerate(windows)}
+
+
+def panel_ema(panel, windows):
+    """
+    Calculates the exponential moving averages of every symbol in the panel,
+    with one scan per window over all symbols, see
+    moving_average.ewm_mean_block().
+
+    Args:
+        panel (AlignedPanel): The aligned panel.
+
+        windows (int, list): The window or list of windows, in days.
+
+    Returns:
+        (dict): Panel-shaped arrays, keyed by column name 'EMA_X'.
+    """
+    windows = check_and_convert_value_to_list(windows, int)
+    packed, order = panel.pack(panel.values)
+    n = packed.shape[1]
+    ema = ewm_mean_block(packed, windows)
+    return {f"EMA_{str(w)}": panel.unpack(ema[:, i*n:(i + 1)*n], order)
+            for i, w in enumerate(windows)}
+
+
+def panel_macd(panel):
+    """
+    Calculates the 12- and 26-period EMA, MACD, DEA and OSC of every symbol
+    in the panel, see macd.macd().
+
+    Args:
+        panel (AlignedPanel): The aligned panel of prices.
+
+    Returns:
+        (dict): Panel-shaped arrays, keyed by column name.
+    """
+    packed, order = panel.pack(panel.values)
+    n = packed.shape[1]
+    ema = ewm_mean_block(packed, [12, 26])
+    ema_12, ema_26 = ema[:, :n], ema[:, n:]
+    dif = ema_12 - ema_26
+    dea = ewm_mean_block(dif, 9)
+    d_packed = {'EMA_12': ema_12, 'EMA_26': ema_26, 'MACD': dif, 'DEA': dea, 'OSC': dif - dea}
+    return {name: panel.unpack(arr, order) for name, arr in d_packed.items()}
+
+
+def panel_rolling(panels, indicator, windows=None, num_std=2.0):
+    """
+    Calculates a rolling indicator of every symbol in the panel, see
+    rolling.rolling_indicator_arrays(), in blocks of PANEL_BLOCK symbols.
+
+    Args:
+        panels (list): Aligned panels of the same symbols, one per column
+         given by rolling.indicator_input_columns().
+
+        indicator (str): The indicator, see rolling.ROLLING_INDICATORS.
+
+        windows (int, list): The window or list of windows, in days.
+
+        num_std (float): Width of the Bollinger bands in standard
+         deviations. Default is 2.
+
+    Returns:
+        (dict): Panel-shaped arrays, keyed by column name.
+
+    Raises:
+        ValueError: if the indicator is not recognized.
+    """
+    if indicator not in ROLLING_INDICATORS:
+        raise ValueError(f"Argument 'indicator' must be one of: {', '.join(ROLLING_INDICATORS)}.")
+    # Blocks of symbols keep the intermediate arrays of the kernels small.
+    # The panels share their rows, so one packing order fits all.
+    d_arrays = {}
+    for start in range(0, len(panels[0].symbols), PANEL_BLOCK):
+        columns = slice(start, start + PANEL_BLOCK)
+        packed = [panel.pack(panel.values, columns) for panel in panels]
+        order = packed[0][1]
+        d_packed = rolling_indicator_arrays(indicator, [p for p, _ in packed], windows, num_std)
+        for name, arr in d_packed.items():
+            if name not in d_arrays:
+                d_arrays[name] = np.empty(panels[0].values.shape)
+            d_arrays[name][:, columns] = panels[0].unpack(arr, order, columns)
+    return d_arrays
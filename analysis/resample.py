@@ -0,0 +1,177 @@
+"""
+# ============================================================================
+# RESAMPLE.PY
+# ----------------------------------------------------------------------------
+# Weekly, monthly and quarterly OHLCV bars built from daily stock data.
+# Each bar is dated by the last trading day of its period and carries the
+# return from the first to the last close of the period, the same value
+# the monthly and quarterly return columns hold on that day.
+#
+# Bars are built once per symbol and stored next to the daily data (see
+# StockData.build_bars()). An update only rebuilds the bars from the one
+# containing the first new date onward.
+#
+# ============================================================================
+"""
+
+# Imports.
+import numpy as np
+import pandas as pd
+
+
+# Bar frequencies, and the name of the stored table of each.
+BAR_FREQUENCIES = {'weekly': 'W', 'monthly': 'M', 'quarterly': 'Q'}
+
+# Daily columns read to build bars.
+BAR_INPUTS = ['Open', 'High', 'Low', 'Close', 'Volume', 'Dividends']
+
+BAR_COLUMNS = ['Date', 'Start', 'Open', 'High', 'Low', 'Close', 'Volume', 'Dividends',
+               'FirstClose', 'Returns', 'Days']
+
+
+def bar_table_name(freq):
+    """
+    Returns the name of the stored bars table of a frequency, e.g.
+    'bars_M' for 'monthly'.
+
+    Raises:
+        ValueError: if the frequency is not recognized.
+    """
+    if freq not in BAR_FREQUENCIES:
+        raise ValueError(f"Argument 'freq' must be one of: {', '.join(BAR_FREQUENCIES)}.")
+    return f"bars_{BAR_FREQUENCIES[freq]}"
+
+
+def period_codes(dates, freq):
+    """
+    Returns an integer code per date that is equal for the dates of one
+    period: weeks starting on Monday, calendar months or quarters. The
+    local calendar date of timezone-aware dates is used.
+
+    Args:
+        dates (pandas.DatetimeIndex): The dates.
+
+        freq (str): One of 'weekly', 'monthly', 'quarterly'.
+
+    Returns:
+        (numpy.ndarray): The period codes.
+    """
+    dates = pd.DatetimeIndex(dates)
+    if not isinstance(dates.tz, type(None)):
+        dates = dates.tz_localize(None)
+    if freq == 'weekly':
+        # 1970-01-01 was a Thursday, shift so that weeks start on Monday.
+        days = dates.normalize().as_unit('ns').asi8 // (86400 * 10**9)
+        return (days + 3) // 7
+    year = dates.year.to_numpy().astype(np.int64)
+    month = dates.month.to_numpy().astype(np.int64)
+    if freq == 'monthly':
+        return year * 12 + month - 1
+    if freq == 'quarterly':
+        return year * 4 + (month - 1) // 3
+    raise ValueError(f"Argument 'freq' must be one of: {', '.join(BAR_FREQUENCIES)}.")
+
+
+def _first_last_valid(values, starts, n):
+    """
+    Returns the first and last non-null value of each group, NaN for
+    groups without values.
+    """
+    valid = ~np.isnan(values)
+    pos = np.arange(n)
+    first = np.minimum.reduceat(np.where(valid, pos, n), starts)
+    last = np.maximum.reduceat(np.where(valid, pos, -1), starts)
+    padded = np.r_[values, np.nan]
+    return padded[first], padded[np.where(last < 0, n, last)]
+
+
+def resample_bars(df_input, freq):
+    """
+    Builds OHLCV bars from daily stock data in a single pass over the
+    rows, which must be sorted by date. Open and Close are the first and
+    last non-null values of the period, High and Low the extremes, and
+    Volume and Dividends the sums.
+
+    Args:
+        df_input (pandas.DataFrame): Daily stock data with the 'Date'
+         column and the columns in BAR_INPUTS that are available.
+
+        freq (str): One of 'weekly', 'monthly', 'quarterly'.
+
+    Returns:
+        (pandas.DataFrame): One row per period, indexed by its last date,
+         with the columns 'Date' (last date), 'Start' (first date),
+         'Open', 'High', 'Low', 'Close', 'Volume', 'Dividends',
+         'FirstClose', 'Returns' (first to last close) and 'Days'
+         (number of daily rows).
+    """
+    n = len(df_input)
+    if n == 0:
+        return pd.DataFrame(columns=BAR_COLUMNS)
+    dates = pd.DatetimeIndex(df_input['Date'])
+    codes = period_codes(dates, freq)
+    starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+    ends = np.r_[starts[1:], n] - 1
+
+    def column(name):
+        if name not in df_input.columns:
+            return np.full(n, np.nan)
+        return df_input[name].to_numpy(dtype=np.float64, na_value=np.nan)
+
+    close = column('Close')
+    first_close, last_close = _first_last_valid(close, starts, n)
+    with np.errstate(invalid='ignore'):
+        d_cols = {
+            'Date': dates[ends],
+            'Start': dates[starts],
+            'Open': _first_last_valid(column('Open'), starts, n)[0],
+            'High': np.fmax.reduceat(column('High'), starts),
+            'Low': np.fmin.reduceat(column('Low'), starts),
+            'Close': last_close,
+            'Volume': np.add.reduceat(np.nan_to_num(column('Volume')), starts),
+            'Dividends': np.add.reduceat(np.nan_to_num(column('Dividends')), starts),
+            'FirstClose': first_close,
+            'Returns': (last_close - first_close) / first_close,
+            'Days': ends - starts + 1
+        }
+    return pd.DataFrame(d_cols, index=dates[ends].rename(None))
+
+
+def update_bars(bars, daily, freq, first_new):
+    """
+    Rebuilds the stored bars from the first new daily row onward. Bars
+    ending before the first new date are kept, the bar containing it is
+    rebuilt from its first daily row.
+
+    Args:
+        bars (pandas.DataFrame): The stored bars, see resample_bars().
+
+        daily (pandas.DataFrame): Daily rows from at least the 'Start' of
+         the first bar to rebuild, see bars_rebuild_start(), including all
+         new rows.
+
+        freq (str): One of 'weekly', 'monthly', 'quarterly'.
+
+        first_new (pandas.Timestamp): The first new or changed date.
+
+    Returns:
+        (pandas.DataFrame): The updated bars.
+    """
+    start = bars_rebuild_start(bars, first_new)
+    keep = bars.loc[bars['Date'] < start]
+    new = resample_bars(daily.loc[daily['Date'] >= start], freq)
+    if keep.empty:
+        return new
+    return pd.concat([keep, new])
+
+
+def bars_rebuild_start(bars, first_new):
+    """
+    Returns the first daily date needed to rebuild the bars for rows
+    from 'first_new' on: the 'Start' of the first bar that does not end
+    before it, or 'first_new' if all bars do.
+    """
+    k = int(pd.DatetimeIndex(bars['Date']).searchsorted(first_new, side='left'))
+    if k < len(bars):
+        return min(bars['Start'].iloc[k], first_new)
+    return first_new
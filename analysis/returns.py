@@ -11,10 +11,47 @@
 
 # Imports.
 from datetime import date
+import numpy as np
 import pandas as pd
 from ..utils.utils import check_and_convert_value_to_list
 
 
+def grouped_returns_array(prices, group_codes):
+    """
+    Calculates the return of each group of consecutive rows, from the first
+    to the last non-null price of the group. The return is placed on the
+    last row of the group, all other rows are NaN. Groups must be contiguous,
+    e.g. months of a table sorted by date.
+    
+    Args:
+        prices (numpy.ndarray): The prices.
+        
+        group_codes (numpy.ndarray): Integer group code of each row.
+    
+    Returns:
+        (numpy.ndarray): The group returns.
+    """
+    n = len(prices)
+    out = np.full(n, np.nan)
+    if n == 0:
+        return out
+    
+    # Group boundaries.
+    starts = np.flatnonzero(np.r_[True, group_codes[1:] != group_codes[:-1]])
+    ends = np.r_[starts[1:], n] - 1
+    
+    # First and last non-null price of each group.
+    valid = ~np.isnan(prices)
+    pos = np.arange(n)
+    first = np.minimum.reduceat(np.where(valid, pos, n), starts)
+    last = np.maximum.reduceat(np.where(valid, pos, -1), starts)
+    has_price = first < n
+    price_first = prices[first[has_price]]
+    price_last = prices[last[has_price]]
+    out[ends[has_price]] = (price_last - price_first) / price_first
+    return out
+
+
 def calculate_daily_returns(df_input, price_col='Close'):
     """
     Calculates the daily returns off a specified column.
@@ -32,9 +69,15 @@ def calculate_daily_returns(df_input, price_col='Close'):
     return df
 
 
-def calculate_grouped_returns(df_input, new_col_name, price_col='Close', group_cols=[]):
+def calculate_grouped_returns(df_input, new_col_name, price_col='Close', group_cols=[],
+                              date_col='Date', symbol_col='Symbol'):
     """
-    Calculates and joins the returns column based on grouping columns.
+    Calculates the returns column based on grouping columns. The return of
+    each group, from its first to its last price by date, is placed on the
+    last row of the group. The index and row order of the table are
+    preserved. In a table sorted by date the groups are contiguous and are
+    found in a single pass, otherwise the rows are ordered by group and date
+    first. A long table of several symbols is grouped by symbol as well.
     
     Args:
         df_input (pandas.DataFrame): The input data.
@@ -44,23 +87,42 @@ def calculate_grouped_returns(df_input, new_col_name, price_col='Close', group_c
         price_col (str): The name of the column containing the price data.
         
         group_cols (str, list): Column name or names to group by for the returns.
+        
+        date_col (str): The name of the date column. Ignored if the table has no
+         such column, in which case the rows are taken to be in date order.
+        
+        symbol_col (str): The name of the symbol column of a table with several
+         symbols. Ignored if the table has no such column.
     
     Returns:
-        (pandas.DataFrame): The table with the new returns column joined.
+        (pandas.DataFrame): The table with the new returns column.
     """
-    df = df_input.copy()
     group_cols = check_and_convert_value_to_list(group_cols, str)
-    df_grouped = df.groupby(group_cols).agg({price_col: ['first', 'last'],
-                                             'Date': 'last'})
-    df_grouped.columns=['price_first', 'price_last', 'date_last']
-    df_grouped = df_grouped.reset_index(drop=True)
-    df_grouped[new_col_name] = (df_grouped['price_last'] - 
-                                df_grouped['price_first'])/df_grouped['price_first']
-    df = df.rename(columns={'Date': 'DateCol'})
-    df = df.merge(df_grouped[[new_col_name, 'date_last']], how='left',
-                  left_on='DateCol', right_on='date_last')
-    df = df.rename(columns={'DateCol': 'Date'})
-    return df.drop('date_last', axis=1)
+    if symbol_col in df_input.columns and symbol_col not in group_cols:
+        group_cols = [symbol_col] + group_cols
+    codes = df_input.groupby(group_cols, sort=False, observed=True).ngroup().to_numpy()
+    prices = df_input[price_col].to_numpy(dtype=np.float64)
+    
+    # Groups are contiguous when there is one boundary per group, and in
+    # date order when dates only decrease across a boundary.
+    same_group = codes[1:] == codes[:-1]
+    n_groups = int(codes.max()) + 1 + int(np.any(codes < 0)) if len(codes) else 0
+    in_order = len(codes) - int(np.count_nonzero(same_group)) == n_groups
+    has_dates = date_col in df_input.columns
+    if has_dates:
+        dates = pd.DatetimeIndex(df_input[date_col]).asi8
+        in_order = in_order and not np.any(same_group & (dates[1:] < dates[:-1]))
+    
+    if in_order:
+        returns = grouped_returns_array(prices, codes)
+    else:
+        order = np.lexsort((dates, codes)) if has_dates else np.argsort(codes, kind='stable')
+        returns = np.empty(len(codes))
+        returns[order] = grouped_returns_array(prices[order], codes[order])
+    
+    # Rows with a missing group value belong to no group.
+    returns[codes < 0] = np.nan
+    return df_input.assign(**{new_col_name: returns})
 
     
 def calculate_monthly_returns(df_input, price_col='Close'):
@@ -93,6 +155,31 @@ def calculate_annual_returns(df_input, price_col='Close'):
                                      ['year'])
 
 
+def calculate_bar_returns(bars, new_col_name, symbol=None):
+    """
+    Returns the period returns of precomputed bars, see analysis.resample.
+    The values equal the non-null values of the daily grouped returns, e.g.
+    of calculate_monthly_returns() for monthly bars, without grouping the
+    daily rows.
+    
+    Args:
+        bars (pandas.DataFrame): The bars, with the 'Date' and 'Returns'
+         columns.
+        
+        new_col_name (str): The name of the returns column.
+        
+        symbol (str): If given, added as the 'Symbol' column.
+    
+    Returns:
+        (pandas.DataFrame): One row per period, with the 'Date' of its last
+         trading day and the returns column.
+    """
+    df = bars[['Date', 'Returns']].rename(columns={'Returns': new_col_name})
+    if not isinstance(symbol, type(None)):
+        df.insert(0, 'Symbol', symbol.upper())
+    return df
+
+
 def average_returns_summary(df_input, base_col='DailyReturns', avg_period='Monthly'):
     """
     Average specific returns over a given period.
@@ -124,4 +211,94 @@ def dividend_summary(df_input, symbol, div_type='FracDividends'):
              f'Overall Average {div_type}': df[div_type].mean(),
              f'Last 5 Years Average': df.loc[df['year']>=five_years_ago, div_type].mean(),
              f'{last_year} Average': df.loc[df['year']>=last_year, div_type].mean()}
-    return d_div
\ No newline at end of file
+    return d_div
+
+
+def dividend_events(df_input):
+    """
+    Returns the rows of a stock data table on which a dividend was paid.
+    
+    Args:
+        df_input (pandas.DataFrame): The stock data table, with the 'Date',
+         'Dividends' and 'FracDividends' columns.
+    
+    Returns:
+        (pandas.DataFrame): Table with the columns 'Date' ('YYYY-MM-DD'),
+         'Dividends' and 'FracDividends', one row per dividend.
+    """
+    amount = df_input['Dividends'].to_numpy(dtype=np.float64, na_value=np.nan)
+    rows = np.flatnonzero(amount > 0)
+    return pd.DataFrame({
+        'Date': df_input['Date'].iloc[rows].dt.strftime('%Y-%m-%d').to_numpy(),
+        'Dividends': amount[rows],
+        'FracDividends': df_input['FracDividends'].to_numpy(dtype=np.float64,
+                                                           na_value=np.nan)[rows]
+    })
+
+
+def dividend_summary_table(df_events, symbols, div_type='FracDividends'):
+    """
+    Summarizes the dividends of many symbols with a single grouped
+    aggregation over their dividend events. Gives the same values as
+    dividend_summary() on the daily data of each symbol.
+    
+    Args:
+        df_events (pandas.DataFrame): Dividend events of all symbols, with
+         the columns 'Symbol', 'Date' ('YYYY-MM-DD'), 'Dividends' and
+         'FracDividends'.
+        
+        symbols (list): The symbols to summarize, including symbols
+         without dividends.
+        
+        div_type (str): 'FracDividends' or 'Dividends'.
+    
+    Returns:
+        (pandas.DataFrame): One row per symbol.
+    """
+    _year_ = date.today().year
+    last_year = _year_ - 1
+    five_years_ago = last_year - 5
+    df = df_events.loc[(df_events[div_type].notnull())&(df_events[div_type]>0)]
+    year = df['Date'].str[:4].astype(int)
+    values = df[div_type]
+    df_summary = pd.DataFrame({
+        f'Overall Average {div_type}': values,
+        'Last 5 Years Average': values.where(year>=five_years_ago),
+        f'{last_year} Average': values.where(year>=last_year)
+    }).groupby(df['Symbol'].str.upper()).mean()
+    df_summary = df_summary.reindex([s.upper() for s in symbols])
+    return df_summary.rename_axis('Symbol').reset_index()
+
+
+def trailing_yield(df_events, as_of, years=1):
+    """
+    Calculates the trailing dividends of many symbols: the dividends paid
+    in the years up to a date, as the sum of the amounts and of the
+    fractional dividends (each dividend per dollar of the price on its
+    date).
+    
+    Args:
+        df_events (pandas.DataFrame): Dividend events of all symbols, see
+         dividend_summary_table().
+        
+        as_of (dict): The last date of the window of each symbol,
+         'YYYY-MM-DD', e.g. its last stored date.
+        
+        years (int): Length of the window in years. Default is 1.
+    
+    Returns:
+        (pandas.DataFrame): One row per symbol with the columns 'Symbol',
+         'TrailingDividends', 'TrailingYield' and 'Payments'.
+    """
+    symbols = list(as_of)
+    end = df_events['Symbol'].map(as_of)
+    start = pd.to_datetime(end) - pd.DateOffset(years=years)
+    in_window = ((df_events['Date'] <= end)
+                 & (df_events['Date'] > start.dt.strftime('%Y-%m-%d')))
+    df = df_events.loc[in_window]
+    df_yield = df.groupby('Symbol').agg(TrailingDividends=('Dividends', 'sum'),
+                                        TrailingYield=('FracDividends', 'sum'),
+                                        Payments=('Dividends', 'size'))
+    df_yield = df_yield.reindex(symbols, fill_value=0)
+    df_yield.index = df_yield.index.str.upper()
+    return df_yield.rename_axis('Symbol').reset_index()
@@ -0,0 +1,405 @@
+"""
+# ============================================================================
+# ROLLING.PY
+# ----------------------------------------------------------------------------
+# Rolling statistics and technical indicators: rolling volatility, rolling
+# minimum and maximum, Bollinger bands, the Relative Strength Index, the
+# Average True Range and On-Balance Volume.
+#
+# Every indicator has a block kernel working down the columns of a 2-D
+# array in O(n) per window, with pandas' compiled rolling and ewm scans
+# running over all columns at once. The table functions follow the
+# conventions of 'moving_average.py' and run the kernels on a single
+# table. The kernels also run on many symbols at once on a date-aligned
+# panel, see 'panel.py', which pays off for the Bollinger bands, RSI and
+# ATR. Pandas' rolling std, min and max scan a 2-D block column by column,
+# and OBV is a single cumulative sum, so these are faster per symbol.
+#
+# References:
+#     [1] https://www.investopedia.com/terms/b/bollingerbands.asp
+#     [2] https://www.investopedia.com/terms/r/rsi.asp
+#     [3] https://www.investopedia.com/terms/a/atr.asp
+#     [4] https://www.investopedia.com/terms/o/onbalancevolume.asp
+#
+# ============================================================================
+"""
+
+# Imports.
+import numpy as np
+import pandas as pd
+
+from .moving_average import rolling_mean_block, _add_block
+from ..utils.utils import check_and_convert_value_to_list
+
+
+ROLLING_INDICATORS = ['std', 'min', 'max', 'bollinger', 'rsi', 'atr', 'obv']
+# Indicators faster on a panel than per symbol, see benchmarks/bench_rolling.py.
+PANEL_ROLLING_INDICATORS = ['bollinger', 'rsi', 'atr']
+
+
+def rolling_std(df_input, from_cols, windows):
+    """
+    Calculates the rolling standard deviation (volatility) using a specific
+    column, matching pandas' rolling(window).std(). Columns are named STD_X,
+    where X is the number of days of the window size, or STD_X(col_name)
+    if more than one column is used. Use the 'DailyReturns' column for the
+    volatility of returns.
+
+    Args:
+        df_input (pandas.DataFrame): Table with stock data.
+
+        from_cols (str, list): The column name or list of names.
+
+        windows (int, list): The window or list of windows, in days.
+
+    Returns:
+        (pandas.DataFrame): The stock data table with the new columns.
+    """
+    from_cols = check_and_convert_value_to_list(from_cols, str)
+    windows = check_and_convert_value_to_list(windows, int)
+    block = rolling_std_block(df_input[from_cols].to_numpy(dtype=np.float64), windows)
+    return _add_block(df_input, block, 'STD', from_cols, windows)
+
+
+def rolling_max(df_input, from_cols, windows):
+    """
+    Calculates the rolling maximum using a specific column, matching
+    pandas' rolling(window).max(). Columns are named MAX_X, or
+    MAX_X(col_name) if more than one column is used.
+
+    Args:
+        df_input (pandas.DataFrame): Table with stock data.
+
+        from_cols (str, list): The column name or list of names.
+
+        windows (int, list): The window or list of windows, in days.
+
+    Returns:
+        (pandas.DataFrame): The stock data table with the new columns.
+    """
+    from_cols = check_and_convert_value_to_list(from_cols, str)
+    windows = check_and_convert_value_to_list(windows, int)
+    block = rolling_max_block(df_input[from_cols].to_numpy(dtype=np.float64), windows)
+    return _add_block(df_input, block, 'MAX', from_cols, windows)
+
+
+def rolling_min(df_input, from_cols, windows):
+    """
+    Calculates the rolling minimum using a specific column, matching
+    pandas' rolling(window).min(). Columns are named MIN_X, or
+    MIN_X(col_name) if more than one column is used.
+
+    Args:
+        df_input (pandas.DataFrame): Table with stock data.
+
+        from_cols (str, list): The column name or list of names.
+
+        windows (int, list): The window or list of windows, in days.
+
+    Returns:
+        (pandas.DataFrame): The stock data table with the new columns.
+    """
+    from_cols = check_and_convert_value_to_list(from_cols, str)
+    windows = check_and_convert_value_to_list(windows, int)
+    block = rolling_min_block(df_input[from_cols].to_numpy(dtype=np.float64), windows)
+    return _add_block(df_input, block, 'MIN', from_cols, windows)
+
+
+def bollinger_bands(df_input, from_cols, windows, num_std=2.0):
+    """
+    Calculates Bollinger bands using a specific column: the simple moving
+    average plus and minus a number of standard deviations over the same
+    window. Columns are named BB_MID_X, BB_UPPER_X and BB_LOWER_X, or
+    with (col_name) appended if more than one column is used.
+
+    Args:
+        df_input (pandas.DataFrame): Table with stock data.
+
+        from_cols (str, list): The column name or list of names.
+
+        windows (int, list): The window or list of windows, in days.
+
+        num_std (float): Width of the bands in standard deviations.
+         Default is 2.
+
+    Returns:
+        (pandas.DataFrame): The stock data table with the new columns.
+    """
+    from_cols = check_and_convert_value_to_list(from_cols, str)
+    windows = check_and_convert_value_to_list(windows, int)
+    mid, upper, lower = bollinger_block(df_input[from_cols].to_numpy(dtype=np.float64),
+                                        windows, num_std)
+    df = _add_block(df_input, mid, 'BB_MID', from_cols, windows)
+    df = _add_block(df, upper, 'BB_UPPER', from_cols, windows)
+    return _add_block(df, lower, 'BB_LOWER', from_cols, windows)
+
+
+def relative_strength_index(df_input, from_cols, windows):
+    """
+    Calculates the Relative Strength Index using a specific column, with
+    Wilder's smoothing of the average gain and loss. Columns are named
+    RSI_X, or RSI_X(col_name) if more than one column is used.
+
+    Args:
+        df_input (pandas.DataFrame): Table with stock data.
+
+        from_cols (str, list): The column name or list of names.
+
+        windows (int, list): The window or list of windows, in days.
+
+    Returns:
+        (pandas.DataFrame): The stock data table with the new columns.
+    """
+    from_cols = check_and_convert_value_to_list(from_cols, str)
+    windows = check_and_convert_value_to_list(windows, int)
+    block = rsi_block(df_input[from_cols].to_numpy(dtype=np.float64), windows)
+    return _add_block(df_input, block, 'RSI', from_cols, windows)
+
+
+def average_true_range(df_input, windows):
+    """
+    Calculates the Average True Range from the 'High', 'Low' and 'Close'
+    columns, with Wilder's smoothing of the true range. Columns are named
+    ATR_X, where X is the number of days of the window size.
+
+    Args:
+        df_input (pandas.DataFrame): Table with stock data.
+
+        windows (int, list): The window or list of windows, in days.
+
+    Returns:
+        (pandas.DataFrame): The stock data table with the new columns.
+    """
+    windows = check_and_convert_value_to_list(windows, int)
+    high, low, close = [df_input[[c]].to_numpy(dtype=np.float64) for c in ['High', 'Low', 'Close']]
+    return _add_block(df_input, atr_block(high, low, close, windows), 'ATR', ['Close'], windows)
+
+
+def on_balance_volume(df_input, from_col='Close'):
+    """
+    Calculates On-Balance Volume, the running total of the volume signed by
+    the direction of the price change, into the 'OBV' column.
+
+    Args:
+        df_input (pandas.DataFrame): Table with stock data.
+
+        from_col (str): The price column. Default is 'Close'.
+
+    Returns:
+        (pandas.DataFrame): The stock data table with the new column.
+    """
+    block = obv_block(df_input[[from_col]].to_numpy(dtype=np.float64),
+                      df_input[['Volume']].to_numpy(dtype=np.float64))
+    return df_input.assign(OBV=block[:, 0])
+
+
+def _rolling_block(values, windows, stat, **kwargs):
+    """
+    Calculates a pandas rolling statistic of several windows down all
+    columns of an array, one compiled scan per window.
+    """
+    values = pd.DataFrame(np.asarray(values, dtype=np.float64))
+    windows = check_and_convert_value_to_list(windows, int)
+    rows, n = values.shape
+    out = np.empty((rows, len(windows)*n))
+    for i, w in enumerate(windows):
+        out[:, i*n:(i + 1)*n] = getattr(values.rolling(w), stat)(**kwargs).to_numpy()
+    return out
+
+
+def rolling_std_block(values, windows, ddof=1):
+    """
+    Calculates rolling standard deviations of several windows down each
+    column of an array. A value is NaN until 'window' rows are available
+    or if the window contains NaN.
+
+    Args:
+        values (numpy.ndarray): Array of shape (rows, columns).
+
+        windows (int, list): The window or list of windows, in rows.
+
+        ddof (int): Delta degrees of freedom. Default is 1, as in pandas.
+
+    Returns:
+        (numpy.ndarray): Array of shape (rows, windows x columns), with
+         the columns of the first window first.
+    """
+    return _rolling_block(values, windows, 'std', ddof=ddof)
+
+
+def rolling_max_block(values, windows):
+    """
+    Calculates rolling maxima of several windows down each column of an
+    array, in O(n) per window with a monotonic queue. A value is NaN until
+    'window' rows are available or if the window contains NaN.
+
+    Returns:
+        (numpy.ndarray): Array of shape (rows, windows x columns), with
+         the columns of the first window first.
+    """
+    return _rolling_block(values, windows, 'max')
+
+
+def rolling_min_block(values, windows):
+    """
+    Calculates rolling minima of several windows down each column of an
+    array, see rolling_max_block().
+    """
+    return _rolling_block(values, windows, 'min')
+
+
+def bollinger_block(values, windows, num_std=2.0):
+    """
+    Calculates the middle, upper and lower Bollinger bands of several
+    windows down each column of an array. The bands use the population
+    standard deviation, as in Bollinger's definition.
+
+    Returns:
+        (tuple): The middle, upper and lower bands, each of shape
+         (rows, windows x columns).
+    """
+    mid = rolling_mean_block(values, windows)
+    std = rolling_std_block(values, windows, ddof=0)
+    return mid, mid + num_std*std, mid - num_std*std
+
+
+def wilder_block(values, windows):
+    """
+    Calculates Wilder's moving average of several windows down each column
+    of an array, i.e. ewm(alpha=1/window, adjust=False) with at least
+    'window' observations.
+
+    Returns:
+        (numpy.ndarray): Array of shape (rows, windows x columns), with
+         the columns of the first window first.
+    """
+    values = pd.DataFrame(np.asarray(values, dtype=np.float64))
+    windows = check_and_convert_value_to_list(windows, int)
+    rows, n = values.shape
+    out = np.empty((rows, len(windows)*n))
+    for i, w in enumerate(windows):
+        out[:, i*n:(i + 1)*n] = values.ewm(alpha=1.0/w, adjust=False, min_periods=w).mean().to_numpy()
+    return out
+
+
+def rsi_block(values, windows):
+    """
+    Calculates the Relative Strength Index of several windows down each
+    column of an array of prices. The RSI is 100 while the average loss
+    is zero.
+
+    Returns:
+        (numpy.ndarray): Array of shape (rows, windows x columns), with
+         the columns of the first window first.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    delta = np.full(values.shape, np.nan)
+    delta[1:] = values[1:] - values[:-1]
+    gain = wilder_block(np.clip(delta, 0.0, None), windows)
+    loss = wilder_block(np.clip(-delta, 0.0, None), windows)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rsi = 100.0 - 100.0 / (1.0 + gain / loss)
+    return np.where(loss == 0, 100.0, rsi)
+
+
+def atr_block(high, low, close, windows):
+    """
+    Calculates the Average True Range of several windows down each column
+    of arrays of high, low and close prices. The true range of the first
+    row is its high-low range.
+
+    Returns:
+        (numpy.ndarray): Array of shape (rows, windows x columns), with
+         the columns of the first window first.
+    """
+    high, low, close = [np.asarray(a, dtype=np.float64) for a in (high, low, close)]
+    prev_close = np.full(close.shape, np.nan)
+    prev_close[1:] = close[:-1]
+    true_range = np.fmax(high - low, np.fmax(np.abs(high - prev_close), np.abs(low - prev_close)))
+    return wilder_block(true_range, windows)
+
+
+def obv_block(close, volume):
+    """
+    Calculates On-Balance Volume down each column of arrays of close prices
+    and volumes. Rows with a missing price or volume do not change it.
+
+    Returns:
+        (numpy.ndarray): The On-Balance Volume, same shape as the input.
+    """
+    close, volume = [np.asarray(a, dtype=np.float64) for a in (close, volume)]
+    direction = np.zeros(close.shape)
+    direction[1:] = np.nan_to_num(np.sign(close[1:] - close[:-1]))
+    return np.cumsum(direction * np.nan_to_num(volume), axis=0)
+
+
+def indicator_input_columns(indicator, column='Close'):
+    """
+    Returns the table columns an indicator is calculated from, in the order
+    expected by rolling_indicator_arrays().
+    """
+    if indicator == 'atr':
+        return ['High', 'Low', 'Close']
+    if indicator == 'obv':
+        return [column, 'Volume']
+    return [column]
+
+
+def indicator_column_names(indicator, windows=None):
+    """
+    Returns the names of the columns an indicator adds to a table, as
+    named by the table functions.
+    """
+    if indicator == 'obv':
+        return ['OBV']
+    windows = check_and_convert_value_to_list(windows, int)
+    prefixes = ['BB_MID', 'BB_UPPER', 'BB_LOWER'] if indicator == 'bollinger' else [indicator.upper()]
+    return [f"{prefix}_{str(w)}" for prefix in prefixes for w in windows]
+
+
+def rolling_indicator_arrays(indicator, inputs, windows=None, num_std=2.0):
+    """
+    Calculates an indicator down each column of 2-D arrays, e.g. one column
+    per symbol of a date-aligned panel.
+
+    Args:
+        indicator (str): One of 'std', 'min', 'max', 'bollinger', 'rsi',
+         'atr' or 'obv'.
+
+        inputs (list): Arrays of shape (rows, columns) of the table
+         columns given by indicator_input_columns().
+
+        windows (int, list): The window or list of windows, in rows. Not
+         used for 'obv'.
+
+        num_std (float): Width of the Bollinger bands in standard
+         deviations. Default is 2.
+
+    Returns:
+        (dict): Arrays of shape (rows, columns), keyed by column name as
+         named by the table functions.
+
+    Raises:
+        ValueError: if the indicator is not recognized.
+    """
+    if indicator not in ROLLING_INDICATORS:
+        raise ValueError(f"Argument 'indicator' must be one of: {', '.join(ROLLING_INDICATORS)}.")
+    if indicator == 'obv':
+        return {'OBV': obv_block(*inputs)}
+
+    windows = check_and_convert_value_to_list(windows, int)
+    n = inputs[0].shape[1]
+    if indicator == 'bollinger':
+        d_blocks = dict(zip(['BB_MID', 'BB_UPPER', 'BB_LOWER'],
+                            bollinger_block(inputs[0], windows, num_std)))
+    elif indicator == 'atr':
+        d_blocks = {'ATR': atr_block(*inputs, windows)}
+    else:
+        d_kernels = {'std': ('STD', rolling_std_block),
+                     'min': ('MIN', rolling_min_block),
+                     'max': ('MAX', rolling_max_block),
+                     'rsi': ('RSI', rsi_block)}
+        prefix, kernel = d_kernels[indicator]
+        d_blocks = {prefix: kernel(inputs[0], windows)}
+    return {f"{prefix}_{str(w)}": block[:, i*n:(i + 1)*n]
+            for prefix, block in d_blocks.items() for i, w in enumerate(windows)}
@@ -0,0 +1,40 @@
+"""
+# ============================================================================
+# _COMMON.PY
+# ----------------------------------------------------------------------------
+# Shared setup of the benchmark scripts: makes the repository importable
+# as the 'stocks' package and times calls. Synthetic price data is built
+# with the helpers of the tests.
+#
+# ============================================================================
+"""
+
+# Imports.
+import os
+import sys
+import time
+import tempfile
+import numpy as np
+
+
+# Shared with the tests.
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                'tests'))
+from helpers import package_path, price_history
+
+# The link to the repository is removed when the script exits.
+_link_folder = tempfile.TemporaryDirectory()
+sys.path.insert(0, package_path(_link_folder.name))
+
+
+def best_time(fn, repeat=3):
+    """
+    Returns the best wall time of several calls, in seconds, and the
+    result of the last call.
+    """
+    best, result = np.inf, None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
@@ -0,0 +1,91 @@
+"""
+# ============================================================================
+# BENCH_IMPORT_COLUMNS.PY
+# ----------------------------------------------------------------------------
+# Compares the single pass that adds the date, dividend and returns
+# columns to downloaded stock data (analysis.features.add_import_columns())
+# with the chain of table functions it replaced, and checks that both give
+# the same columns. Timings are reported in rows per second.
+#
+# Usage:
+#     python benchmarks/bench_import_columns.py [--symbols N] [--rows N]
+#
+# ============================================================================
+"""
+
+# Imports.
+import argparse
+import numpy as np
+
+from _common import best_time, price_history
+from stocks.analysis.features import add_import_columns
+from stocks.utils.utils import add_year_month_quarter
+
+
+def grouped_returns_merge(df_input, new_col_name, price_col, group_cols):
+    """
+    The former calculate_grouped_returns(): first and last price per group,
+    merged back onto the table by the last date of the group.
+    """
+    df = df_input.copy()
+    df_grouped = df.groupby(group_cols).agg({price_col: ['first', 'last'],
+                                             'Date': 'last'})
+    df_grouped.columns = ['price_first', 'price_last', 'date_last']
+    df_grouped = df_grouped.reset_index(drop=True)
+    df_grouped[new_col_name] = (df_grouped['price_last'] -
+                                df_grouped['price_first'])/df_grouped['price_first']
+    df = df.rename(columns={'Date': 'DateCol'})
+    df = df.merge(df_grouped[[new_col_name, 'date_last']], how='left',
+                  left_on='DateCol', right_on='date_last')
+    df = df.rename(columns={'DateCol': 'Date'})
+    return df.drop('date_last', axis=1)
+
+
+def chain_import_columns(df_input):
+    """
+    The former StockData.add_columns_on_import(): one copy or merge per
+    added column.
+    """
+    df = df_input.copy()
+    df['Date'] = df.index
+    df['FracDividends'] = df['Dividends'] / df['Close']
+    df = add_year_month_quarter(df, date_col='Date')
+    df['DailyReturns'] = df['Close'].diff(1) / df['Close'].shift(1)
+    df = grouped_returns_merge(df, 'MonthlyReturns', 'Close', ['year', 'month'])
+    df = grouped_returns_merge(df, 'QuarterlyReturns', 'Close', ['Q'])
+    return grouped_returns_merge(df, 'AnnualReturns', 'Close', ['year'])
+
+
+def main(n_symbols, rows):
+    """
+    Runs the benchmark and prints the timings.
+    """
+    tables = [price_history(rows, seed=j) for j in range(n_symbols)]
+    total = n_symbols * rows
+    print(f"{n_symbols} symbols x {rows} rows")
+
+    t_chain, chained = best_time(lambda: [chain_import_columns(df) for df in tables], repeat=1)
+    t_single, single = best_time(lambda: [add_import_columns(df, 'Close') for df in tables])
+
+    # Same columns and values, the new table keeps the date index.
+    for old, new in zip(chained, single):
+        new = new.reset_index(drop=True)
+        assert list(old.columns) == list(new.columns)
+        for c in old.columns:
+            if c == 'Q' or c == 'Date':
+                assert (old[c] == new[c]).all(), c
+            else:
+                np.testing.assert_allclose(old[c].to_numpy(dtype=np.float64),
+                                           new[c].to_numpy(dtype=np.float64), rtol=1e-12)
+
+    print(f"chain          {t_chain:7.3f} s  {total/t_chain/1e6:6.2f}M rows/s")
+    print(f"single pass    {t_single:7.3f} s  {total/t_single/1e6:6.2f}M rows/s  "
+          f"speedup {t_chain/t_single:5.1f}x")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Import columns in one pass against the former chain.")
+    parser.add_argument('--symbols', type=int, default=20)
+    parser.add_argument('--rows', type=int, default=10000)
+    args = parser.parse_args()
+    main(args.symbols, args.rows)
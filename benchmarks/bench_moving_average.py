@@ -0,0 +1,116 @@
+"""
+# ============================================================================
+# BENCH_MOVING_AVERAGE.PY
+# ----------------------------------------------------------------------------
+# Compares the block kernels of 'moving_average.py' with a loop of one
+# pandas rolling().mean() or ewm().mean() call per window, and checks
+# that the results agree. The SMA windows share one cumulative sum, while
+# the EMA block still runs one ewm scan per span and only saves the
+# intermediate arrays of the loop.
+#
+# Usage:
+#     python benchmarks/bench_moving_average.py [--rows N] [--columns N]
+#
+# ============================================================================
+"""
+
+# Imports.
+import argparse
+import numpy as np
+import pandas as pd
+
+from _common import best_time
+from stocks.analysis.moving_average import (rolling_mean_block, ewm_mean_block,
+                                            simple_moving_average, exp_moving_average)
+
+
+WINDOWS = [5, 10, 12, 20, 26, 30, 40, 50, 60, 75, 90, 100, 120, 150, 180, 200, 250, 300,
+           400, 500]
+
+
+def sma_loop(values, windows):
+    """
+    The per-window loop, one pandas rolling mean per window.
+    """
+    df = pd.DataFrame(values)
+    return np.hstack([df.rolling(w).mean().to_numpy() for w in windows])
+
+
+def ema_loop(values, windows):
+    """
+    The per-window loop, one pandas exponential mean per span.
+    """
+    df = pd.DataFrame(values)
+    return np.hstack([df.ewm(span=w).mean().to_numpy() for w in windows])
+
+
+def table_loop(df_input, column, windows, method):
+    """
+    The per-window table functions as they were before the block kernels,
+    one column inserted per window.
+    """
+    df = df_input.copy()
+    for w in windows:
+        if method == 'sma':
+            df[f"SMA_{w}"] = df[column].rolling(w).mean()
+        else:
+            df[f"EMA_{w}"] = df[column].ewm(span=w).mean()
+    return df
+
+
+def check_sma_precision(block, values, windows):
+    """
+    Checks the SMA block against pandas. The cumulative sum rounds with
+    the running total of the absolute values, so the error of each row is
+    bounded by a multiple of that total rather than of the row's value.
+    """
+    reference = sma_loop(values, windows)
+    bound = 1e-15 * np.tile(np.cumsum(np.abs(values), axis=0), len(windows))
+    error = np.abs(block - reference)
+    assert np.array_equal(np.isnan(block), np.isnan(reference))
+    assert np.all(np.nan_to_num(error) <= bound), "SMA block is outside the rounding bound."
+    with np.errstate(invalid='ignore'):
+        return np.nanmax(error / np.abs(reference))
+
+
+def main(rows, columns):
+    """
+    Runs the benchmark and prints the timings.
+    """
+    rng = np.random.default_rng(0)
+    values = 100.0 * np.exp(np.cumsum(rng.normal(0.0, 0.01, (rows, columns)), axis=0))
+    print(f"{rows} rows x {columns} columns, {len(WINDOWS)} windows")
+
+    t_loop, _ = best_time(lambda: sma_loop(values, WINDOWS))
+    t_block, block = best_time(lambda: rolling_mean_block(values, WINDOWS))
+    rel = check_sma_precision(block, values, WINDOWS)
+    print(f"SMA  loop {t_loop*1e3:8.1f} ms  block {t_block*1e3:8.1f} ms  "
+          f"speedup {t_loop/t_block:5.1f}x  max rel. diff {rel:.1e}")
+
+    t_loop, reference = best_time(lambda: ema_loop(values, WINDOWS))
+    t_block, block = best_time(lambda: ewm_mean_block(values, WINDOWS))
+    assert np.array_equal(block, reference, equal_nan=True)
+    print(f"EMA  loop {t_loop*1e3:8.1f} ms  block {t_block*1e3:8.1f} ms  "
+          f"speedup {t_loop/t_block:5.1f}x  identical")
+
+    # The table functions, which also add one column per window.
+    df = pd.DataFrame({'Close': values[:, 0]})
+    for method, fn in [('sma', simple_moving_average), ('ema', exp_moving_average)]:
+        t_loop, _ = best_time(lambda: table_loop(df, 'Close', WINDOWS, method))
+        t_block, _ = best_time(lambda: fn(df, 'Close', WINDOWS))
+        print(f"{method.upper()} table  loop {t_loop*1e3:8.1f} ms  block {t_block*1e3:8.1f} ms  "
+              f"speedup {t_loop/t_block:5.1f}x")
+
+    # A series falling far below its earlier level, the worst case of the
+    # shared cumulative sum.
+    falling = (np.geomspace(5000.0, 1.0, 10000) * np.exp(rng.normal(0.0, 0.01, 10000)))[:, None]
+    rel = check_sma_precision(rolling_mean_block(falling, WINDOWS), falling, WINDOWS)
+    print(f"SMA  falling 5000 -> 1 over 10000 rows: max rel. diff {rel:.1e}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Moving average block kernels against per-window loops.")
+    parser.add_argument('--rows', type=int, default=3000)
+    parser.add_argument('--columns', type=int, default=1)
+    args = parser.parse_args()
+    main(args.rows, args.columns)
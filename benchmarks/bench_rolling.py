@@ -0,0 +1,112 @@
+"""
+# ============================================================================
+# BENCH_ROLLING.PY
+# ----------------------------------------------------------------------------
+# Compares the panel path of every rolling indicator in 'rolling.py' (the
+# rolling std, min, max, Bollinger bands, RSI, ATR and OBV), one pass over
+# a date-aligned date x symbol panel (analysis.panel.panel_rolling()),
+# with a loop of pandas calls per symbol, on ragged histories of over 10M
+# rows in total, and checks that the results agree.
+#
+# Usage:
+#     python benchmarks/bench_rolling.py [--symbols N] [--rows N]
+#
+# ============================================================================
+"""
+
+# Imports.
+import argparse
+import numpy as np
+import pandas as pd
+
+from _common import best_time, price_history
+from stocks.analysis.panel import align_panel, panel_rolling
+from stocks.analysis.rolling import indicator_input_columns
+
+
+INDICATORS = ['std', 'min', 'max', 'bollinger', 'rsi', 'atr', 'obv']
+WINDOWS = [14, 20, 50]
+
+
+def symbol_indicator(df, indicator, windows):
+    """
+    Calculates an indicator of a single symbol with pandas, as a loop
+    over the windows.
+    """
+    close = df['Close']
+    if indicator == 'obv':
+        return {'OBV': (np.sign(close.diff()).fillna(0.0) * df['Volume']).cumsum()}
+    d_cols = {}
+    for w in windows:
+        if indicator in ['std', 'min', 'max']:
+            d_cols[f"{indicator.upper()}_{w}"] = getattr(close.rolling(w), indicator)()
+        elif indicator == 'bollinger':
+            mid, std = close.rolling(w).mean(), close.rolling(w).std(ddof=0)
+            d_cols[f"BB_MID_{w}"] = mid
+            d_cols[f"BB_UPPER_{w}"] = mid + 2.0*std
+            d_cols[f"BB_LOWER_{w}"] = mid - 2.0*std
+        elif indicator == 'rsi':
+            delta = close.diff()
+            gain = delta.clip(lower=0).ewm(alpha=1/w, adjust=False, min_periods=w).mean()
+            loss = (-delta).clip(lower=0).ewm(alpha=1/w, adjust=False, min_periods=w).mean()
+            d_cols[f"RSI_{w}"] = (100 - 100/(1 + gain/loss)).where(loss != 0, 100.0)
+        elif indicator == 'atr':
+            prev = close.shift(1)
+            true_range = pd.concat([df['High'] - df['Low'], (df['High'] - prev).abs(),
+                                    (df['Low'] - prev).abs()], axis=1).max(axis=1)
+            d_cols[f"ATR_{w}"] = true_range.ewm(alpha=1/w, adjust=False, min_periods=w).mean()
+    return d_cols
+
+
+def main(n_symbols, rows):
+    """
+    Runs the benchmark and prints the timings.
+    """
+    # Ragged histories: later symbols start up to a year later.
+    labels = [f"s{j}" for j in range(n_symbols)]
+    full = price_history(rows)
+    d_data = {}
+    for j, label in enumerate(labels):
+        df = price_history(rows - j % 250, seed=j + 1)[['High', 'Low', 'Close', 'Volume']]
+        df.index = full.index[j % 250:]
+        d_data[label] = df.reset_index()
+    total = sum(len(df) for df in d_data.values())
+    print(f"{n_symbols} symbols, {total/1e6:.1f}M rows, windows {WINDOWS}")
+
+    # The panels are aligned once and shared by the indicators.
+    t_align = {}
+    d_panels = {}
+    for column in ['High', 'Low', 'Close', 'Volume']:
+        t_align[column], d_panels[column] = best_time(lambda: align_panel(d_data, labels, column),
+                                                      repeat=1)
+    print(f"align_panel per column {t_align['Close']:.2f} s")
+
+    for indicator in INDICATORS:
+        columns = indicator_input_columns(indicator)
+        panels = [d_panels[column] for column in columns]
+        t_align_ind = sum(t_align[column] for column in columns)
+
+        def loop_path():
+            return {label: symbol_indicator(d_data[label], indicator, WINDOWS)
+                    for label in labels}
+
+        t_panel, d_arrays = best_time(lambda: panel_rolling(panels, indicator, WINDOWS), repeat=2)
+        t_loop, d_loop = best_time(loop_path, repeat=2)
+
+        # Compare a sample of symbols.
+        panel = panels[0]
+        for label in labels[::max(1, n_symbols // 20)]:
+            for name, arr in d_arrays.items():
+                np.testing.assert_allclose(panel.symbol_values(arr, label),
+                                           d_loop[label][name].to_numpy(), rtol=1e-9, atol=1e-9)
+        del d_arrays, d_loop
+        print(f"{indicator:10s} per symbol {t_loop:6.2f} s  panel {t_panel:6.2f} s "
+              f"(+{t_align_ind:.2f} s align)  speedup {t_loop/t_panel:4.1f}x, "
+              f"{t_loop/(t_panel + t_align_ind):4.1f}x with align")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Rolling indicators on a panel against a per-symbol loop.")
+    parser.add_argument('--symbols', type=int, default=1000)
+    parser.add_argument('--rows', type=int, default=10250)
+    args = parser.parse_args()
+    main(args.symbols, args.rows)
@@ -0,0 +1,244 @@
+"""
+# ============================================================================
+# FETCHERS.PY
+# ----------------------------------------------------------------------------
+# Price history sources for the 'StockData' class. A fetcher returns the
+# daily history of a single symbol, or of a batch of symbols, in the
+# 'yfinance' table layout, with rate limiting and retries handled by the
+# base class. Downloads for many symbols can run concurrently with
+# 'fetch_many'.
+#
+# ============================================================================
+"""
+
+# Imports.
+import time
+import threading
+
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+
+class RateLimiter:
+    """
+    Spaces calls evenly to stay within a maximum call rate. Safe to share
+    between threads.
+
+    Args:
+        calls_per_second (float): Maximum number of calls per second.
+    """
+    def __init__(self, calls_per_second):
+        """
+        Constructor.
+        """
+        self.interval = 1.0 / calls_per_second
+        self.next_time = time.monotonic()
+        self.lock = threading.Lock()
+
+
+    def wait(self):
+        """
+        Blocks until the next call is allowed.
+        """
+        with self.lock:
+            now = time.monotonic()
+            call_time = max(now, self.next_time)
+            self.next_time = call_time + self.interval
+        if call_time > now:
+            time.sleep(call_time - now)
+
+
+class Fetcher:
+    """
+    Base class for price history sources. Subclasses implement 'history',
+    and optionally 'history_many' for sources with a multi-symbol request.
+    Callers use 'fetch' and 'fetch_batch', which apply the rate limit
+    and retries.
+
+    Args:
+        rate_limit (float): Maximum requests per second to the source.
+         Default is None, which does not limit the request rate.
+
+        retries (int): Number of retries after a failed request.
+
+        backoff (float): Wait before the first retry, in seconds. The wait
+         doubles with every further retry.
+    """
+    def __init__(self, rate_limit=None, retries=2, backoff=1.0):
+        """
+        Constructor.
+        """
+        self.rate_limiter = RateLimiter(rate_limit) if rate_limit else None
+        self.retries = retries
+        self.backoff = backoff
+
+
+    def history(self, symbol, start=None):
+        """
+        Returns the daily price history of a symbol.
+
+        Args:
+            symbol (str): The stock symbol.
+
+            start (str): First date to download, 'YYYY-MM-DD'. Default is
+             None, which downloads the full history.
+
+        Returns:
+            (pandas.DataFrame): Table indexed by date with the columns
+             'Open', 'High', 'Low', 'Close', 'Volume', 'Dividends'
+             and 'Stock Splits'.
+        """
+        raise NotImplementedError
+
+
+    def history_many(self, symbols, start=None):
+        """
+        Returns the daily price history of several symbols with the same
+        start date. The default makes one request per symbol.
+
+        Args:
+            symbols (list): The stock symbols.
+
+            start (str): First date to download, 'YYYY-MM-DD'. Default is
+             None, which downloads the full history.
+
+        Returns:
+            (dict): Table per symbol, see Fetcher.history(). Symbols without
+             data may be missing.
+        """
+        return {symbol: self.history(symbol, start=start) for symbol in symbols}
+
+
+    def fetch(self, symbol, start=None):
+        """
+        Returns the daily price history of a symbol, see Fetcher.history(),
+        retrying failed requests with exponential backoff.
+
+        Raises:
+            ValueError: if the source returns no data.
+        """
+        df = self._with_retries(self.history, symbol, start=start)
+        if df.empty and isinstance(start, type(None)):
+            raise ValueError(f"No price data returned for '{symbol.upper()}'.")
+        return df
+
+
+    def fetch_batch(self, symbols, start=None):
+        """
+        Returns the daily price history of several symbols in a single
+        request, see Fetcher.history_many(), retrying failed requests
+        with exponential backoff.
+        """
+        return self._with_retries(self.history_many, symbols, start=start)
+
+
+    def _with_retries(self, request_fn, *args, **kwargs):
+        """
+        Calls the request function within the rate limit, retrying on errors.
+        """
+        for attempt in range(self.retries + 1):
+            if self.rate_limiter:
+                self.rate_limiter.wait()
+            try:
+                return request_fn(*args, **kwargs)
+            except Exception:
+                if attempt == self.retries:
+                    raise
+                time.sleep(self.backoff * 2**attempt)
+
+
+class YahooFetcher(Fetcher):
+    """
+    Downloads price history from Yahoo! Finance using 'yfinance', which is
+    only imported once the first download is made.
+    """
+    def history(self, symbol, start=None):
+        import yfinance as yf
+        
+        tckr = yf.Ticker(symbol.upper())
+        if isinstance(start, type(None)):
+            return tckr.history(period='max')
+        return tckr.history(start=start)
+
+
+    def history_many(self, symbols, start=None):
+        import yfinance as yf
+        
+        # One multi-ticker download, split back into a table per symbol.
+        kwargs = {'period': 'max'} if isinstance(start, type(None)) else {'start': start}
+        data = yf.download([s.upper() for s in symbols], group_by='ticker', actions=True,
+                           auto_adjust=True, ignore_tz=False, progress=False, **kwargs)
+        # Depending on the 'yfinance' version, a single-symbol download has
+        # flat field columns instead of (ticker, field) columns.
+        if data.columns.nlevels == 1:
+            d_tables = {symbols[0].upper(): data} if len(symbols) == 1 and len(data.columns) else {}
+        else:
+            d_tables = {s: data[s] for s in data.columns.get_level_values(0).unique()}
+        d_data = {}
+        for symbol in symbols:
+            if symbol.upper() not in d_tables:
+                continue
+            df = d_tables[symbol.upper()].dropna(how='all', subset=['Open', 'High', 'Low', 'Close'])
+            df = df.fillna({'Dividends': 0.0, 'Stock Splits': 0.0})
+            df.columns.name = None
+            df.index.name = 'Date'
+            d_data[symbol] = df
+        return d_data
+
+
+def fetch_many(fetcher, requests, max_workers=1, batch_size=None):
+    """
+    Downloads the price history of many symbols, yielding each result as
+    soon as its download completes so that it can be processed while the
+    remaining downloads continue. Failed downloads are yielded with their
+    error instead of raising.
+
+    Args:
+        fetcher (Fetcher): The price history source.
+
+        requests (list): List of (symbol, start) tuples, see Fetcher.history().
+
+        max_workers (int): Number of concurrent downloads.
+
+        batch_size (int): Maximum number of symbols per multi-symbol request.
+         Symbols with the same start date are requested together. Default
+         is None, which makes one request per symbol.
+
+    Yields:
+        (tuple): The symbol, the downloaded table (None on failure) and the
+         raised exception (None on success).
+    """
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        # Single-symbol requests.
+        if isinstance(batch_size, type(None)):
+            futures = {executor.submit(fetcher.fetch, symbol, start): symbol
+                       for symbol, start in requests}
+            for future in as_completed(futures):
+                try:
+                    yield futures[future], future.result(), None
+                except Exception as e:
+                    yield futures[future], None, e
+            return
+
+        # Group symbols by start date, then split into batches.
+        d_groups = defaultdict(list)
+        for symbol, start in requests:
+            d_groups[start].append(symbol)
+        futures = {}
+        for start, symbols in d_groups.items():
+            for i in range(0, len(symbols), batch_size):
+                batch = symbols[i:i + batch_size]
+                futures[executor.submit(fetcher.fetch_batch, batch, start)] = (batch, start)
+        for future in as_completed(futures):
+            batch, start = futures[future]
+            try:
+                d_data = future.result()
+            except Exception as e:
+                for symbol in batch:
+                    yield symbol, None, e
+                continue
+            for symbol in batch:
+                if symbol in d_data and not (d_data[symbol].empty and isinstance(start, type(None))):
+                    yield symbol, d_data[symbol], None
+                else:
+                    yield symbol, None, ValueError(f"No price data returned for '{symbol.upper()}'.")
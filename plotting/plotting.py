@@ -4,19 +4,19 @@
 # ----------------------------------------------------------------------------
 # As the extremely original name suggests, this contains some plotting
 # functions for stock data. Plots are created with the 'altair' package
-# and are interactive.
+# and are interactive. 'altair' is imported when a chart is created, so
+# importing this module does not load it.
 #
 # ============================================================================
 """
 
 # Imports.
 import pandas as pd
-import altair as alt
-from ..utils.utils import arrange_data_for_chart
+from ..utils.utils import arrange_data_for_chart, reduce_data_period
 
 
 def line_chart(d_data, x_col='Date', y_col='Close', labels=None, period='max',
-               width=800, height=400):
+               width=800, height=400, start=None, end=None):
     """
     Creates a line plot using altair.
     
@@ -37,11 +37,17 @@ def line_chart(d_data, x_col='Date', y_col='Close', labels=None, period='max',
         width (int): Chart width in pixels.
         
         height (int): Chart height in pixels.
+        
+        start (str, datetime): First date to plot, overrides the period.
+        
+        end (str, datetime): Last date to plot.
     
     Returns:
         (altair.vegalite.v4.api.Chart): Altair chart object.
     """
-    source = arrange_data_for_chart(d_data, labels, y_col, period)
+    import altair as alt
+
+    source = arrange_data_for_chart(d_data, labels, y_col, period, start=start, end=end)
     line = alt.Chart(source)\
             .properties(width=width, height=height)\
             .mark_line()\
@@ -68,6 +74,8 @@ def candlestick_chart(source, width=900, height=400):
     Returns:
         (altair.vegalite.v4.api.Chart): Altair chart object.
     """
+    import altair as alt
+
     open_close_color = alt.condition("datum.Open < datum.Close",
                                  alt.value("#06982d"),
                                  alt.value("#ae1325"))
@@ -112,6 +120,8 @@ def macd_chart(source, width=900, height=600):
     Returns:
         (altair.vegalite.v4.api.Chart): Altair chart object.
     """
+    import altair as alt
+
     # Common axis zoom selector for both charts.
     zoom = alt.selection_interval(bind='scales', encodings=['x'])
     
@@ -170,3 +180,59 @@ def macd_chart(source, width=900, height=600):
                 .add_selection(zoom)
     
     return alt.vconcat(candle + ema_lines, bar + macd_lines)
+
+
+def forecast_band_chart(history, bands, y_col='Close', period='1y', width=900, height=400):
+    """
+    Plots the price history of a stock followed by the percentile bands of
+    a Monte Carlo forecast, see monte_carlo.forecast_bands(). The outer band
+    spans the lowest to the highest percentile, the inner band the second
+    lowest to the second highest, and the median is drawn as a line.
+    
+    Args:
+        history (pandas.DataFrame): Stock data with the 'Date' column.
+        
+        bands (pandas.DataFrame): Forecast bands with the 'Date' column.
+        
+        y_col (str): Column name of the price.
+        
+        period (str): The time period of history to plot, in days ('5d'),
+         months ('6m'), years ('4y') or 'max'.
+        
+        width (int): Chart width in pixels.
+        
+        height (int): Chart height in pixels.
+    
+    Returns:
+        (altair.vegalite.v4.api.Chart): Altair chart object.
+    """
+    import altair as alt
+
+    source = reduce_data_period(history, date_col='Date', period=period)[['Date', y_col]]
+    band_cols = [c for c in bands.columns if c.startswith('P')]
+    
+    line = alt.Chart(source)\
+            .mark_line()\
+            .encode(
+                x='Date:T',
+                y=alt.Y(y_col, title='Price', scale=alt.Scale(zero=False)))
+    
+    # Nested percentile bands, widest first.
+    layers = [line]
+    for i, opacity in zip(range(len(band_cols) // 2), [0.2, 0.35]):
+        layers.append(alt.Chart(bands)
+                      .mark_area(opacity=opacity)
+                      .encode(
+                          x='Date:T',
+                          y=band_cols[i],
+                          y2=band_cols[-1 - i]))
+    if 'P50' in bands.columns:
+        layers.append(alt.Chart(bands)
+                      .mark_line(strokeDash=[4, 2])
+                      .encode(
+                          x='Date:T',
+                          y='P50'))
+    
+    return alt.layer(*layers)\
+            .properties(width=width, height=height)\
+            .interactive(bind_y=False)
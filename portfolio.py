@@ -11,7 +11,6 @@
 # Imports.
 import pandas as pd
 from .stock_data import StockData
-from IPython.display import display
 
 
 class Portfolio:
@@ -60,8 +59,12 @@ class Portfolio:
         self.sd.add_and_update(self.labels)
         self.sd.load()
         
-        for sym in self.df_trades.Stock.unique():
-            current_price = self.sd.get_stock_price(sym)
+        # Latest prices of all stocks in one lookup.
+        symbols = list(self.df_trades.Stock.unique())
+        self.current_prices = dict(zip(symbols, self.sd.get_stock_prices(symbols)))
+        
+        for sym in symbols:
+            current_price = self.current_prices[sym]
             self.df_trades.loc[self.df_trades.Stock==sym, 'Holding'] = self.df_trades.loc[self.df_trades.Stock==sym, 'transact_quantity'].cumsum()
             self.df_trades.loc[self.df_trades.Stock==sym, 'Realized'] = self.df_trades.loc[self.df_trades.Stock==sym]\
                                 .apply(lambda r: max(0, -r['transact_quantity']*r['transact_price']),
@@ -85,6 +88,8 @@ class Portfolio:
         """
         Print out the differnt stock tables and trades.
         """
+        from IPython.display import display
+        
         for sym in self.df_trades['Stock'].unique():
             print(f"\n   ===   {sym}   ===   ")
             display(self.df_trades[self.df_trades['Stock']==sym])
@@ -108,7 +113,7 @@ class Portfolio:
             total_realized = 0
         remaining_holding = total_bought+total_sold
         remaining_invested = remaining_holding * average_paid
-        current_price = self.sd.get_stock_price(label)
+        current_price = self.current_prices[label]
         remaining_unrealized = remaining_holding * current_price
         gol = remaining_unrealized - remaining_invested
         frac_return = gol / remaining_invested
@@ -11,19 +11,51 @@
 
 # Imports.
 import os
+import shutil
+import asyncio
+import tempfile
 import warnings
-import pickle
+import threading
 import pandas as pd
-import yfinance as yf
 
-from .utils.utils import (check_and_convert_value_to_list,
-                          reduce_data_period, add_year_month_quarter)
+from .utils.utils import (check_and_convert_value_to_list, match_timezone,
+                          reduce_data_period, compact_dtypes, frame_memory)
+from .storage.storage import (get_storage, read_library_config, write_library_config,
+                              file_checksum)
+from .storage.catalog import Catalog, SCHEMA_VERSION
+from .storage.panel import PANEL_FOLDER, PANEL_FIELDS, PricePanel, write_price_panel
+from .storage.lazy import LazyFrames
+from .storage.lookup import PriceIndex
+from .storage.cache import CACHE_FOLDER, CACHE_SIZE, IndicatorCache
+from .fetching.fetchers import YahooFetcher, fetch_many
 from .analysis.moving_average import simple_moving_average, exp_moving_average
 from .analysis.macd import macd
-from .analysis.returns import (calculate_daily_returns, calculate_monthly_returns,
-                               calculate_quarterly_returns, calculate_annual_returns,
-                               dividend_summary)
-from .plotting.plotting import macd_chart, line_chart
+from .analysis.correlation import (BLOCK_SIZE, MOMENTS_FOLDER, panel_moments, refresh_moments,
+                                   read_moments, write_moments)
+from .analysis.online import IndicatorState, read_indicator_state, write_indicator_state
+from .analysis.panel import align_panel, panel_sma, panel_ema, panel_macd, panel_rolling
+from .analysis.rolling import (ROLLING_INDICATORS, PANEL_ROLLING_INDICATORS,
+                               indicator_input_columns, indicator_column_names, rolling_std,
+                               rolling_min, rolling_max, bollinger_bands,
+                               relative_strength_index, average_true_range, on_balance_volume)
+from .analysis.returns import (calculate_bar_returns, dividend_events, dividend_summary_table,
+                               trailing_yield)
+from .analysis.resample import (BAR_FREQUENCIES, BAR_INPUTS, bar_table_name, resample_bars,
+                                update_bars, bars_rebuild_start)
+from .analysis.features import add_import_columns
+from .analysis.backtest import backtest_grid
+from .analysis.monte_carlo import PERCENTILES, forecast_many
+from .plotting.plotting import macd_chart, line_chart, forecast_band_chart
+
+
+# Number of update segments kept per stock before they are compacted.
+MAX_SEGMENTS = 20
+
+# Columns of the downloaded price history.
+RAW_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume', 'Dividends', 'Stock Splits']
+
+# Columns added by StockData.add_macd().
+MACD_COLUMNS = ['EMA_12', 'EMA_26', 'MACD', 'DEA', 'OSC']
 
 
 class StockData:
@@ -33,21 +65,143 @@ class StockData:
     Args:
         data_folder (str): Path to saved data, and where
          data will be saved.
+        
+        storage (str): The file format of the library, one of 'pickle',
+         'parquet' or 'feather'. The format is saved with the library.
+         Default is None, which uses the format of an existing library,
+         or 'pickle' for a new library.
+        
+        fetcher (Fetcher): The source of price data. Default is None,
+         which downloads from Yahoo! Finance with 'yfinance'.
+        
+        compact_schema (bool): Whether to write and load stock data with
+         compact column types, see utils.compact_dtypes(). The setting is
+         saved with the library. Default is None, which uses the setting
+         of an existing library, or False for a new library. The memory
+         saved per symbol by the rows written since the library was opened
+         is kept in StockData.memory_saved_on_write.
+        
+        cache_size (int): Maximum size, in bytes, of the cache of computed
+         indicator columns in the '.indicators' folder of the library.
+         Entries are evicted least recently used first. A size of 0
+         disables the cache. Default is 256 MB.
     """
-    def __init__(self, data_folder):
+    def __init__(self, data_folder, storage=None, fetcher=None, compact_schema=None,
+                 cache_size=CACHE_SIZE):
         """
         Constructor.
         """
-        # Get list of folders.
+        # Get list of stocks from the library catalog, or from the
+        # folders of a library without a catalog.
         self.root = data_folder
-        self.dir_list = next(os.walk(self.root))[1]
-        self.dir_list = [d.lower() for d in self.dir_list]
+        self.catalog = Catalog(self.root)
+        if self.catalog.created:
+            self.dir_list = next(os.walk(self.root))[1]
+            self.dir_list = [d.lower() for d in self.dir_list if not d.startswith('.')]
+        else:
+            self.dir_list = self.catalog.symbols()
         if not self.dir_list:
             print(f"Folder '{self.root}' has no data.")
         #else:
         #    print(f"Folder '{self.root}' the following stocks:\n\t|")
         #    for folder in self.dir_list:
         #        print(f"\t|-- {folder.upper()}")
+        
+        # Storage backend of the library.
+        self.config = read_library_config(self.root)
+        library_storage = self.config.get('storage', 'pickle')
+        if isinstance(storage, type(None)):
+            storage = library_storage
+        elif storage != library_storage and self.dir_list:
+            raise ValueError(f"Library '{self.root}' is stored as '{library_storage}'. Use StockData.convert_storage('{storage}') to change the format.")
+        self.storage = get_storage(storage)
+        if self.config.get('storage') != storage:
+            self.config['storage'] = storage
+            write_library_config(self.root, self.config)
+        
+        # Column types of the library.
+        if isinstance(compact_schema, type(None)):
+            compact_schema = self.config.get('compact_schema', False)
+        elif self.config.get('compact_schema', False) != compact_schema:
+            self.config['compact_schema'] = compact_schema
+            write_library_config(self.root, self.config)
+        self.compact_schema = compact_schema
+        self.memory_saved = {}
+        self.memory_saved_on_write = {}
+        
+        # Serializes catalog writes of updates and background compaction.
+        self.catalog_lock = threading.Lock()
+        # Serializes the compaction of each stock, by symbol.
+        self.compact_locks = {}
+        
+        # Source of price data.
+        self.fetcher = YahooFetcher() if isinstance(fetcher, type(None)) else fetcher
+        
+        # Cache of computed indicator columns.
+        self.indicator_cache = None
+        if cache_size:
+            self.indicator_cache = IndicatorCache(os.path.join(self.root, CACHE_FOLDER), cache_size)
+        
+        # As-of price lookups on the loaded data.
+        self.price_index = PriceIndex(lambda label: self.d_data[label])
+        
+        # Catalog the existing stocks of a library without a catalog.
+        if self.catalog.created and self.dir_list:
+            self.rebuild_catalog()
+        elif self.catalog.dividends_created and self.dir_list:
+            self.rebuild_dividends()
+
+
+    def rebuild_catalog(self):
+        """
+        Rebuilds the library catalog from the symbol folders in the data
+        folder. This reads the dates of every stored stock, and is only
+        needed for libraries created without a catalog or edited by hand.
+        """
+        entries = []
+        for folder in next(os.walk(self.root))[1]:
+            path = self.create_folder_path(folder)
+            if folder.startswith('.') or not self.storage.exists(path):
+                continue
+            dates = self.storage.read(path, columns=['Date'])['Date']
+            entries.append({
+                'symbol': folder.lower(),
+                'first_date': dates.min().strftime('%Y-%m-%d'),
+                'last_date': dates.max().strftime('%Y-%m-%d'),
+                'row_count': len(dates),
+                'schema_version': SCHEMA_VERSION,
+                'checksum': self.storage.checksum(path),
+                'tz': str(dates.dt.tz) if dates.dt.tz else None
+            })
+        self.catalog.execute("DELETE FROM symbols")
+        self.catalog.upsert(entries)
+        self.dir_list = self.catalog.symbols()
+        self.rebuild_dividends()
+
+
+    def rebuild_dividends(self, labels=None):
+        """
+        Rebuilds the dividend events of the catalog from the stored data.
+        Events are otherwise kept on StockData.add() and StockData.update(),
+        this is only needed for libraries cataloged without them.
+        
+        Args:
+            labels (str, list): A single string or list of strings
+             of the symbols. Default is None, which rebuilds all stocks
+             found in the data directory.
+        """
+        # Handle default case.
+        if isinstance(labels, type(None)):
+            labels = [l.lower() for l in self.dir_list]
+            self.catalog.execute("DELETE FROM dividends")
+        else:
+            labels = [l.lower() for l in check_and_convert_value_to_list(labels, str)]
+        for label in labels:
+            path = self.create_folder_path(label)
+            if not self.storage.exists(path):
+                continue
+            df = self.storage.read(path, columns=['Dividends', 'FracDividends'])
+            self.catalog.replace_dividends(label, dividend_events(df).itertuples(index=False))
 
 
     def create_folder_path(self, folder):
@@ -70,21 +224,58 @@ class StockData:
         Returns:
             (pandas.DataFrame): The table with the new columns.
         """
-        # Copy to avoid overwrite.
-        df = df_input.copy()
-        # Add columns.
-        df['Date'] = df.index
-        df['FracDividends'] = df['Dividends'] / df['Close']
-        df = add_year_month_quarter(df, date_col='Date')
-        df = calculate_daily_returns(df, 'Close')
-        df = calculate_monthly_returns(df, 'Close')
-        df = calculate_quarterly_returns(df, 'Close')
-        df = calculate_annual_returns(df, 'Close')
+        # Add columns in a single pass, keeping the date index.
+        return add_import_columns(df_input, 'Close')
 
-        return df
+
+    def add_columns_on_update(self, path, raw_data, last_date):
+        """
+        Adds the columns to newly downloaded rows of a stored stock. The
+        grouped returns are recomputed over the stored rows of the current
+        year, which contains the current quarter and month, and the daily
+        return of the first new row uses the preceding stored close. The
+        result is identical to adding the columns to the full history. In
+        a library with compact column types the stored rows are converted
+        back to 64-bit floats first, so the result is that of adding the
+        columns to the stored history.
+        Only these recent rows are read, from the tail table on the 'pickle'
+        backend, see storage.PickleStorage, so the cost of an update does
+        not grow with the length of the stored history.
+        
+        Args:
+            path (str): The symbol folder.
+            
+            raw_data (pandas.DataFrame): The downloaded price history since
+             the last stored date.
+            
+            last_date (str): The last stored date, 'YYYY-MM-DD'.
+        
+        Returns:
+            (pandas.DataFrame): The new rows, plus the last stored row if
+             its grouped returns changed.
+        """
+        cols = [c for c in RAW_COLUMNS if c in raw_data.columns]
+        first_new = raw_data.index.min()
+        
+        # Stored rows of the current year, plus the preceding row for the daily return.
+        year_start = pd.Timestamp(f"{last_date[:4]}-01-01")
+        context = self.storage.read(path, columns=cols, start=year_start - pd.DateOffset(days=31))
+        context = context.loc[context['Date'] < first_new]
+        # Compact libraries store 32-bit floats, recompute in 64 bits as on import.
+        context = context.astype({c: 'float64' for c in cols if context[c].dtype == 'float32'})
+        year_start = match_timezone(year_start, context['Date'].dt.tz)
+        n_before = int((context['Date'] < year_start).sum())
+        context = context.iloc[max(n_before - 1, 0):]
+        
+        # Recompute and keep the rows that can change.
+        data = self.add_columns_on_import(pd.concat([context.set_index('Date')[cols], raw_data[cols]]))
+        keep_from = first_new
+        if not context.empty and context['Date'].iloc[-1] >= year_start:
+            keep_from = context['Date'].iloc[-1]
+        return data.loc[data['Date'] >= keep_from]
 
 
-    def add(self, labels):
+    def add(self, labels, max_workers=1, batch_size=None):
         """
         Adds the indicated stock or stocks to the StockData object
         and writes the data to the data folder.
@@ -93,49 +284,128 @@ class StockData:
             labels (str, list): A single string or list of strings
              of the symbols indicating the stock or stocks to be
              added.
+            
+            max_workers (int): Number of concurrent downloads. Data is
+             written while the remaining downloads continue. Default is 1.
+            
+            batch_size (int): Maximum number of symbols per multi-symbol
+             download. Default is None, which downloads each symbol
+             separately.
+        
+        Returns:
+            (dict): The symbols that failed to download or save, with the
+             raised exception.
         """
         labels = check_and_convert_value_to_list(labels, str)
         
-        # Loop and add data.
+        # Build download requests.
+        requests = []
         for label in labels:
             # Warn if the label exists.
             if label in self.dir_list:
                 warnings.warn(f"Stock '{label.upper()}' is currently in the data library. Use StockData.update('{label}') to update the stock data.")
                 continue
+            requests.append((label.lower(), None))
+        
+        # Download and write data as each download completes.
+        errors = {}
+        for label, data, error in fetch_many(self.fetcher, requests, max_workers=max_workers,
+                                             batch_size=batch_size):
+            if error:
+                warnings.warn(f"Stock '{label.upper()}' could not be downloaded: {error}")
+                errors[label] = error
+                continue
+            # A stock that cannot be saved does not stop the others.
+            try:
+                self.save_added(label, data)
+            except Exception as e:
+                warnings.warn(f"Stock '{label.upper()}' could not be saved: {e}")
+                errors[label] = e
+        
+        self.fetch_errors = errors
+        return errors
+
+
+    def save_added(self, label, raw_data):
+        """
+        Adds the columns to the downloaded data of a new stock and writes
+        it to the data folder.
+        
+        Args:
+            label (str): The stock symbol.
             
-            # Construct the local data folder.
-            path = self.create_folder_path(label.lower())
-            
-            # Download data.
-            tckr = yf.Ticker(label.upper())
-            data = self.add_columns_on_import(tckr.history(period='max'))
-            meta = {
-                'symbol': label.upper(),
-                'last_date': f"{str(data['Date'].max().year)}-{str(data['Date'].max().month).zfill(2)}-{str(data['Date'].max().day).zfill(2)}"
-            }
-            
-            # Create the folder if it doesn't exist.
-            if not os.path.exists(path):
-                os.mkdir(path)
-            
-            # Save data for folder.
-            data.to_pickle(f"{path}/data.pkl")
-            with open(f"{path}/meta.pkl", "wb") as fp:
-                pickle.dump(meta, fp, protocol=pickle.HIGHEST_PROTOCOL)
+            raw_data (pandas.DataFrame): The downloaded price history.
+        """
+        # Construct the local data folder.
+        path = self.create_folder_path(label.lower())
+        
+        data = self.add_columns_on_import(raw_data)
+        if self.compact_schema:
+            data = self._compact_for_write(label, data)
+        
+        # Create the folder if it doesn't exist.
+        if not os.path.exists(path):
+            os.mkdir(path)
+        
+        # Save data for folder and add it to the catalog.
+        file = self.storage.write(path, data)
+        self.catalog.upsert({
+            'symbol': label.lower(),
+            'first_date': data['Date'].min().strftime('%Y-%m-%d'),
+            'last_date': data['Date'].max().strftime('%Y-%m-%d'),
+            'row_count': len(data),
+            'schema_version': SCHEMA_VERSION,
+            'checksum': file_checksum(file),
+            'tz': str(data['Date'].dt.tz) if data['Date'].dt.tz else None
+        })
+        self.catalog.replace_dividends(label, dividend_events(data).itertuples(index=False))
+        if label.lower() not in self.dir_list:
+            self.dir_list.append(label.lower())
+        self.write_bars(path, data)
+        if not isinstance(self.indicator_cache, type(None)):
+            self.indicator_cache.invalidate(label)
+
+
+    def _compact_for_write(self, label, data):
+        """
+        Returns the table with compact column types, see utils.compact_dtypes(),
+        adding the memory saved to StockData.memory_saved_on_write.
+        """
+        memory = frame_memory(data)
+        data = compact_dtypes(data)
+        label = label.lower()
+        self.memory_saved_on_write[label] = (self.memory_saved_on_write.get(label, 0)
+                                             + memory - frame_memory(data))
+        return data
 
 
-    def update(self, labels=None):
+    def update(self, labels=None, max_workers=1, batch_size=None):
         """
-        Update to the most recent pricing data and write to file.
+        Update to the most recent pricing data and write to file. New rows
+        are appended to the stored data as a small segment, and the
+        segments of a symbol are compacted once there are more than
+        'max_segments' of them (see StockData.compact()).
         
         Args:
             labels (str, list): A single string or list of strings
              of the symbols indicating the stock or stocks to be
              updated. Default is None, which updates all stocks
              found in the data directory.
+            
+            max_workers (int): Number of concurrent downloads. Data is
+             written while the remaining downloads continue. Default is 1.
+            
+            batch_size (int): Maximum number of symbols per multi-symbol
+             download. Symbols with the same last stored date are
+             downloaded together. Default is None, which downloads each
+             symbol separately.
+        
+        Returns:
+            (dict): The symbols that failed to download or save, with the
+             raised exception.
         """
         if not self.dir_list:
-            return
+            return {}
         
         # Handle labels list if string or None.
         if isinstance(labels, type(None)):
@@ -143,85 +413,718 @@ class StockData:
         else:
             labels = check_and_convert_value_to_list(labels, str)
         
-        # Loop and udpate data.
+        # Build download requests from the last stored dates.
+        last_dates = self.catalog.last_dates()
+        requests = []
         for label in labels:
             # Warn if the label does not currently exist.
             if label not in self.dir_list:
                 warnings.warn(f"Stock '{label.upper()}' is not in data library. Use StockData.add('{label}') to add the stock to the library.")
                 continue
+            requests.append((label.lower(), last_dates[label.lower()]))
+        
+        # Download and write data as each download completes.
+        errors = {}
+        for label, new_data, error in fetch_many(self.fetcher, requests, max_workers=max_workers,
+                                                 batch_size=batch_size):
+            if error:
+                warnings.warn(f"Stock '{label.upper()}' could not be downloaded: {error}")
+                errors[label] = error
+                continue
+            # A stock that cannot be saved does not stop the others.
+            try:
+                self.save_update(label, new_data)
+            except Exception as e:
+                warnings.warn(f"Stock '{label.upper()}' could not be saved: {e}")
+                errors[label] = e
+        
+        self.fetch_errors = errors
+        return errors
+
+
+    def save_update(self, label, raw_data):
+        """
+        Adds the columns to the newly downloaded rows of a stock and appends
+        them to the stored data.
+        
+        Args:
+            label (str): The stock symbol.
             
-            # Construct the local data folder.
-            path = self.create_folder_path(label.lower())
+            raw_data (pandas.DataFrame): The downloaded price history since
+             the last stored date.
+        """
+        if raw_data.empty:
+            return
+        
+        # Construct the local data folder.
+        path = self.create_folder_path(label.lower())
+        entry = self.catalog.get(label)
+        
+        # Batched downloads may return dates in another timezone.
+        tz = entry['tz']
+        if tz and isinstance(raw_data.index.tz, type(None)):
+            raw_data = raw_data.tz_localize(tz)
+        elif tz and str(raw_data.index.tz) != tz:
+            raw_data = raw_data.tz_convert(tz)
+        new_data = self.add_columns_on_update(path, raw_data, entry['last_date'])
+        if self.compact_schema:
+            new_data = self._compact_for_write(label, new_data)
+        
+        # Append new data, rows with an existing date replace the stored rows,
+        # and update the catalog entry.
+        new_dates = new_data['Date'].dt.strftime('%Y-%m-%d')
+        with self.catalog_lock:
+            file = self.storage.write_segment(path, new_data)
+            entry = self.catalog.get(label)
+            entry['row_count'] += int((new_dates > entry['last_date']).sum())
+            entry['last_date'] = max(entry['last_date'], new_dates.max())
+            entry['checksum'] = file_checksum(file, entry['checksum'])
+            self.catalog.upsert(entry)
+        self.catalog.replace_dividends(label, dividend_events(new_data).itertuples(index=False),
+                                       start=new_dates.min())
+        
+        if len(self.storage.segment_files(path)) > self.config.get('max_segments', MAX_SEGMENTS):
+            self.compact_stock(label)
+        self.update_bars(path, new_data['Date'].min())
+        
+        if not isinstance(self.indicator_cache, type(None)):
+            self.indicator_cache.invalidate(label)
+        
+        # Extend the tracked indicators with the new rows.
+        state = read_indicator_state(path)
+        if not isinstance(state, type(None)):
+            state.update(new_data['Date'], new_data[state.column])
+            write_indicator_state(path, state)
+
+
+    def compact(self, labels=None, background=False):
+        """
+        Merges the appended update segments of each stock into its
+        stored data file, see StockData.compact_stock().
+        
+        Args:
+            labels (str, list): A single string or list of strings
+             of the symbols indicating the stock or stocks to be
+             compacted. Default is None, which compacts all stocks
+             found in the data directory.
             
-            # Load current data.
-            with open(f"{path}/meta.pkl", "rb") as fp:
-                meta = pickle.load(fp)
-            data = pd.read_pickle(f"{path}/data.pkl")
-            last_date = meta['last_date']
+            background (bool): Whether to compact in a background thread.
+             Default is False.
+        
+        Returns:
+            (threading.Thread): The running thread if 'background' is True,
+             otherwise None.
+        """
+        # Handle default case.
+        if isinstance(labels, type(None)):
+            labels = [l.lower() for l in self.dir_list]
+        else:
+            labels = check_and_convert_value_to_list(labels, str)
+        
+        if background:
+            thread = threading.Thread(target=lambda: [self.compact_stock(l) for l in labels],
+                                      daemon=True)
+            thread.start()
+            return thread
+        
+        for label in labels:
+            self.compact_stock(label)
+
+
+    def compact_stock(self, label):
+        """
+        Merges the appended update segments of a stock into its stored data
+        file and recomputes its catalog checksum over the rewritten files,
+        so that it matches StockData.rebuild_catalog(). Updates of the stock
+        may continue while it is compacted, while compactions of the same
+        stock, e.g. from StockData.update() and a background
+        StockData.compact(), run one at a time.
+        
+        Args:
+            label (str): The stock symbol.
+        """
+        path = self.create_folder_path(label.lower())
+        with self.compact_locks.setdefault(label.lower(), threading.Lock()):
+            self.storage.compact(path)
+            with self.catalog_lock:
+                entry = self.catalog.get(label)
+                if not isinstance(entry, type(None)):
+                    entry['checksum'] = self.storage.checksum(path)
+                    self.catalog.upsert(entry)
+
+
+    def remove(self, labels):
+        """
+        Removes the indicated stock or stocks from the library: the catalog
+        entry and dividend events, the symbol folder with its data, bars
+        and followed indicators, and the cached indicator columns. The
+        price panel is a snapshot and keeps the stock until it is rebuilt.
+        
+        Args:
+            labels (str, list): A single string or list of strings
+             of the symbols indicating the stock or stocks to be
+             removed.
+        """
+        labels = check_and_convert_value_to_list(labels, str)
+        for label in labels:
+            label = label.lower()
+            # Warn if the label does not currently exist.
+            if label not in self.dir_list:
+                warnings.warn(f"Stock '{label.upper()}' is not in data library.")
+                continue
+            # The catalog entry goes first, so a folder left behind is not listed.
+            with self.compact_locks.setdefault(label, threading.Lock()):
+                with self.catalog_lock:
+                    self.catalog.remove(label)
+                shutil.rmtree(self.create_folder_path(label), ignore_errors=True)
+            self.dir_list.remove(label)
+            if not isinstance(self.indicator_cache, type(None)):
+                self.indicator_cache.invalidate(label)
+            if label in getattr(self, 'd_data', {}):
+                del self.d_data[label]
+
+
+    def add_and_update(self, labels):
+        """
+        Updates existing data and adds data for new symbols.
+        
+        Args:
+            Args:
+            labels (str, list): A single string or list of strings
+             of the symbols indicating the stock or stocks to be
+             updated or added. Default is None, which only updates
+             the existing stocks found in the directory.
+        """
+        labels = check_and_convert_value_to_list(labels, str)
+        add_labels, update_labels = [], []
+        for label in labels:
+            if label.lower() in self.dir_list:
+                update_labels.append(label.lower())
+            else:
+                add_labels.append(label.lower())
+        
+        # Add and update.
+        self.update(labels=update_labels)
+        self.add(labels=add_labels)
+
+
+    def convert_storage(self, storage):
+        """
+        Rewrites all stock data in the library with a different storage
+        backend and removes the files of the previous backend. The catalog
+        checksums are recomputed over the new files.
+        
+        Args:
+            storage (str): The new file format, one of 'pickle',
+             'parquet' or 'feather'.
+        """
+        new_storage = get_storage(storage)
+        if new_storage.name == self.storage.name:
+            return
+        
+        entries = []
+        for label in self.dir_list:
+            path = self.create_folder_path(label)
+            if not self.storage.exists(path):
+                continue
+            new_storage.write(path, self.storage.read(path))
+            for file in ([self.storage.data_file(path)] + self.storage.derived_files(path)
+                         + self.storage.segment_files(path)):
+                os.remove(file)
+            for freq in BAR_FREQUENCIES:
+                name = bar_table_name(freq)
+                bars = self.storage.read_table(path, name)
+                if not isinstance(bars, type(None)):
+                    new_storage.write_table(path, name, bars)
+                    os.remove(self.storage.table_file(path, name))
+            entry = self.catalog.get(label)
+            if not isinstance(entry, type(None)):
+                entry['checksum'] = new_storage.checksum(path)
+                entries.append(entry)
+        
+        self.catalog.upsert(entries)
+        self.storage = new_storage
+        self.config['storage'] = new_storage.name
+        write_library_config(self.root, self.config)
+
+
+    def write_bars(self, path, data):
+        """
+        Builds the weekly, monthly and quarterly bars of a stock from its
+        daily data and writes them to the symbol folder, see
+        analysis.resample.
+        
+        Args:
+            path (str): The symbol folder.
             
-            # Update data.
-            tckr = yf.Ticker(label.upper())
-            new_data = self.add_columns_on_import(tckr.history(start=last_date))
+            data (pandas.DataFrame): The full daily stock data table.
+        """
+        for freq in BAR_FREQUENCIES:
+            self.storage.write_table(path, bar_table_name(freq), resample_bars(data, freq))
+
+
+    def update_bars(self, path, first_new):
+        """
+        Rebuilds the stored bars of a stock from the bar containing the
+        first new date onward, reading only the daily rows of the rebuilt
+        bars, from the tail table on the 'pickle' backend. Stocks stored
+        without bars get all of them built.
+        
+        Args:
+            path (str): The symbol folder.
             
-            # Add new date to old data.
-            data = pd.concat([data, new_data], axis=0).drop_duplicates()
-            data.to_pickle(f"{path}/data.pkl")
-            meta['last_date'] = f"{str(data['Date'].max().year)}-{str(data['Date'].max().month).zfill(2)}-{str(data['Date'].max().day).zfill(2)}"
-            with open(f"{path}/meta.pkl", "wb") as fp:
-                pickle.dump(meta, fp, protocol=pickle.HIGHEST_PROTOCOL)
+            first_new (pandas.Timestamp): The first new or changed date.
+        """
+        d_bars = {freq: self.storage.read_table(path, bar_table_name(freq))
+                  for freq in BAR_FREQUENCIES}
+        if any(isinstance(bars, type(None)) for bars in d_bars.values()):
+            self.write_bars(path, self.storage.read(path, columns=BAR_INPUTS))
+            return
+        
+        # One read of the daily rows of the longest rebuilt bar.
+        start = min(bars_rebuild_start(bars, first_new) for bars in d_bars.values())
+        daily = self.storage.read(path, columns=BAR_INPUTS, start=start)
+        for freq, bars in d_bars.items():
+            self.storage.write_table(path, bar_table_name(freq),
+                                     update_bars(bars, daily, freq, first_new))
+
+
+    def build_bars(self, labels=None):
+        """
+        Builds the stored weekly, monthly and quarterly bars of each stock,
+        e.g. for stocks added before bars were kept. Bars are otherwise
+        built on StockData.add() and extended on StockData.update().
+        
+        Args:
+            labels (str, list): A single string or list of strings
+             of the symbols indicating the stock or stocks to build
+             bars for. Default is None, which builds all stocks found
+             in the data directory.
+        """
+        # Handle default case.
+        if isinstance(labels, type(None)):
+            labels = [l.lower() for l in self.dir_list]
+        else:
+            labels = [l.lower() for l in check_and_convert_value_to_list(labels, str)]
+        for label in labels:
+            path = self.create_folder_path(label)
+            self.write_bars(path, self.storage.read(path, columns=BAR_INPUTS))
+
+
+    def load_bars(self, labels=None, freq='monthly', start=None, end=None):
+        """
+        Reads the stored bars of each stock, see analysis.resample. Bars
+        missing from the data folder are built first.
+        
+        Args:
+            labels (str, list): A single string or list of strings
+             of the symbols indicating the stock or stocks to read.
+             Default is None, which reads all stocks found in the
+             data directory.
+            
+            freq (str): One of 'weekly', 'monthly', 'quarterly'.
+             Default is 'monthly'.
+            
+            start (str, datetime): First bar date to read, inclusive.
+            
+            end (str, datetime): Last bar date to read, inclusive.
+        
+        Returns:
+            (dict): The bars table of each stock.
+        """
+        name = bar_table_name(freq)
+        # Handle default case.
+        if isinstance(labels, type(None)):
+            labels = [l.lower() for l in self.dir_list]
+        else:
+            labels = [l.lower() for l in check_and_convert_value_to_list(labels, str)]
+        
+        d_bars = {}
+        for label in labels:
+            path = self.create_folder_path(label)
+            bars = self.storage.read_table(path, name, start=start, end=end)
+            if isinstance(bars, type(None)):
+                self.build_bars(label)
+                bars = self.storage.read_table(path, name, start=start, end=end)
+            d_bars[label] = bars
+        return d_bars
+
+
+    def period_returns(self, labels=None, freq='monthly'):
+        """
+        Returns the weekly, monthly or quarterly returns of each stock from
+        its stored bars, one row per period. Monthly and quarterly returns
+        equal the 'MonthlyReturns' and 'QuarterlyReturns' columns on the
+        last day of each period.
+        
+        Args:
+            labels (str, list): A single string or list of strings
+             of the symbols. Default is None, which uses all stocks
+             found in the data directory.
+            
+            freq (str): One of 'weekly', 'monthly', 'quarterly'.
+             Default is 'monthly'.
+        
+        Returns:
+            (pandas.DataFrame): Table with the columns 'Symbol', 'Date' and
+             'WeeklyReturns', 'MonthlyReturns' or 'QuarterlyReturns'.
+        """
+        d_bars = self.load_bars(labels, freq=freq)
+        col = f"{freq.capitalize()}Returns"
+        return pd.concat([calculate_bar_returns(bars, col, label)
+                          for label, bars in d_bars.items()], ignore_index=True)
+
+
+    def load(self, labels=None, columns=None, start=None, end=None, memory_budget=None,
+             compact_schema=None):
+        """
+        Load data from the data folder into the StockData object. Data is loaded
+        into a dictionary-like container of pandas.DataFrames, which reads each
+        symbol from the data folder on first access.
+        
+        Args:
+            labels (str, list): A single string or list of strings
+             of the symbols indicating the stock or stocks to be
+             loaded. Default is None, which will load all stock data
+             found in the data directory.
+            
+            columns (str, list): Column name or names to load. The 'Date'
+             column is always loaded. Default is None, which loads all
+             columns. Columnar storage only reads the requested columns.
+            
+            start (str): First date to load, 'YYYY-MM-DD'. Default is None,
+             which loads from the start of the history.
+            
+            end (str): Last date to load, 'YYYY-MM-DD'. Default is None,
+             which loads to the most recent date.
+            
+            memory_budget (int): Maximum memory, in bytes, for the data kept
+             in memory. Least recently used symbols are evicted first, and
+             symbols with added columns are spilled to a temporary folder
+             in the '.cache' folder of the library, which is removed when
+             the data is loaded again or released. Default is None, which
+             keeps all accessed symbols in memory.
+            
+            compact_schema (bool): Whether to convert the loaded data to
+             compact column types. The memory saved per symbol is kept in
+             StockData.memory_saved. Default is None, which uses the
+             setting of the library.
+        """
+        if isinstance(compact_schema, type(None)):
+            compact_schema = self.compact_schema
+        
+        # Handle default case.
+        if isinstance(labels, type(None)):
+            labels = [l.lower() for l in self.dir_list]
+        else:
+            labels = check_and_convert_value_to_list(labels, str)
+        
+        # Ensure data is in library, instruct otherwise.
+        available = []
+        for label in labels:
+            if label.lower() not in self.dir_list:
+                print(f"No stock data found for '{label.upper()}'. Use the '.add()' method to add a new stock symbol.")
+                continue
+            available.append(label.lower())
+        
+        def loader(label):
+            df = self.storage.read(self.create_folder_path(label), columns=columns,
+                                   start=start, end=end)
+            if compact_schema:
+                memory = frame_memory(df)
+                df = compact_dtypes(df)
+                self.memory_saved[label] = memory - frame_memory(df)
+            return df
+        
+        # Initialize lazy container, removing the spill files of the previous one.
+        if isinstance(getattr(self, 'd_data', None), LazyFrames):
+            self.d_data.close()
+        self.d_data = LazyFrames(
+            loader=loader,
+            labels=available,
+            memory_budget=memory_budget,
+            spill_folder=os.path.join(self.root, ".cache")
+        )
+
+
+    async def aadd(self, labels, max_concurrency=8):
+        """
+        Asynchronous version of StockData.add(). Downloads, added columns and
+        file writes run in the default executor, with at most
+        'max_concurrency' stocks in progress at once.
+        
+        Args:
+            labels (str, list): A single string or list of strings
+             of the symbols indicating the stock or stocks to be
+             added.
+            
+            max_concurrency (int): Maximum number of stocks processed at
+             the same time. Default is 8.
+        
+        Returns:
+            (dict): The symbols that failed to download or save, with the
+             raised exception.
+        """
+        labels = check_and_convert_value_to_list(labels, str)
+        requests = []
+        for label in labels:
+            # Warn if the label exists.
+            if label in self.dir_list:
+                warnings.warn(f"Stock '{label.upper()}' is currently in the data library. Use StockData.update('{label}') to update the stock data.")
+                continue
+            requests.append((label.lower(), None))
+        
+        return await self._afetch_and_save(requests, self.save_added, max_concurrency)
+
+
+    async def aupdate(self, labels=None, max_concurrency=8):
+        """
+        Asynchronous version of StockData.update(). Downloads, added columns
+        and file writes run in the default executor, with at most
+        'max_concurrency' stocks in progress at once.
+        
+        Args:
+            labels (str, list): A single string or list of strings
+             of the symbols indicating the stock or stocks to be
+             updated. Default is None, which updates all stocks
+             found in the data directory.
+            
+            max_concurrency (int): Maximum number of stocks processed at
+             the same time. Default is 8.
+        
+        Returns:
+            (dict): The symbols that failed to download or save, with the
+             raised exception.
+        """
+        # Handle labels list if string or None.
+        if isinstance(labels, type(None)):
+            labels = [l.lower() for l in self.dir_list]
+        else:
+            labels = check_and_convert_value_to_list(labels, str)
+        
+        last_dates = self.catalog.last_dates()
+        requests = []
+        for label in labels:
+            # Warn if the label does not currently exist.
+            if label not in self.dir_list:
+                warnings.warn(f"Stock '{label.upper()}' is not in data library. Use StockData.add('{label}') to add the stock to the library.")
+                continue
+            requests.append((label.lower(), last_dates[label.lower()]))
+        
+        return await self._afetch_and_save(requests, self.save_update, max_concurrency)
+
+
+    async def _afetch_and_save(self, requests, save_fn, max_concurrency):
+        """
+        Downloads and saves the requested stocks in the default executor,
+        collecting the errors per symbol.
+        """
+        loop = asyncio.get_running_loop()
+        semaphore = asyncio.Semaphore(max_concurrency)
+        
+        async def fetch_and_save(label, start):
+            async with semaphore:
+                try:
+                    raw_data = await loop.run_in_executor(None, self.fetcher.fetch, label, start)
+                except Exception as e:
+                    warnings.warn(f"Stock '{label.upper()}' could not be downloaded: {e}")
+                    return label, e
+                # A stock that cannot be saved does not stop the others.
+                try:
+                    await loop.run_in_executor(None, save_fn, label, raw_data)
+                except Exception as e:
+                    warnings.warn(f"Stock '{label.upper()}' could not be saved: {e}")
+                    return label, e
+                return label, None
+        
+        results = await asyncio.gather(*[fetch_and_save(label, start) for label, start in requests])
+        errors = {label: error for label, error in results if error}
+        self.fetch_errors = errors
+        return errors
+
+
+    async def aload(self, labels=None, columns=None, start=None, end=None,
+                    memory_budget=None, compact_schema=None, max_concurrency=8):
+        """
+        Asynchronous version of StockData.load(), which reads the requested
+        stocks right away instead of on first access. Files are read in the
+        default executor, with at most 'max_concurrency' reads at once.
+        See StockData.load() for the arguments.
+        
+        Returns:
+            (LazyFrames): The loaded data, also kept as StockData.d_data.
+        """
+        self.load(labels=labels, columns=columns, start=start, end=end,
+                  memory_budget=memory_budget, compact_schema=compact_schema)
+        loop = asyncio.get_running_loop()
+        semaphore = asyncio.Semaphore(max_concurrency)
+        
+        async def read(label):
+            async with semaphore:
+                return label, await loop.run_in_executor(None, self.d_data.loader, label)
+        
+        for label, df in await asyncio.gather(*[read(label) for label in self.d_data]):
+            self.d_data.put(label, df)
+        return self.d_data
+
+
+    def build_panel(self, labels=None, fields=PANEL_FIELDS):
+        """
+        Writes the memory-mapped price panel of the library, a single
+        date x symbol array file per field. The panel is a snapshot and
+        should be rebuilt after the library is updated.
+        
+        Args:
+            labels (str, list): A single string or list of strings
+             of the symbols to include. Default is None, which
+             includes all stocks found in the data directory.
+            
+            fields (str, list): The fields to store. Default is
+             'Open', 'High', 'Low', 'Close', 'Volume', 'Dividends'.
+        """
+        # Handle default case.
+        if isinstance(labels, type(None)):
+            labels = [l.lower() for l in self.dir_list]
+        else:
+            labels = check_and_convert_value_to_list(labels, str)
+        
+        write_price_panel(
+            folder=os.path.join(self.root, PANEL_FOLDER),
+            read_fn=lambda label, columns: self.storage.read(self.create_folder_path(label), columns=columns),
+            labels=labels,
+            fields=fields
+        )
+        self.open_panel()
 
 
-    def add_and_update(self, labels):
+    def open_panel(self):
         """
-        Updates existing data and adds data for new symbols.
+        Opens the memory-mapped price panel of the library.
         
-        Args:
-            Args:
-            labels (str, list): A single string or list of strings
-             of the symbols indicating the stock or stocks to be
-             updated or added. Default is None, which only updates
-             the existing stocks found in the directory.
+        Returns:
+            (PricePanel): The price panel, also kept as StockData.panel.
         """
-        labels = check_and_convert_value_to_list(labels, str)
-        add_labels, update_labels = [], []
-        for label in labels:
-            if label.lower() in self.dir_list:
-                update_labels.append(label.lower())
-            else:
-                add_labels.append(label.lower())
-        
-        # Add and update.
-        self.update(labels=update_labels)
-        self.add(labels=add_labels)
+        folder = os.path.join(self.root, PANEL_FOLDER)
+        if not os.path.exists(folder):
+            raise ValueError(f"Library '{self.root}' has no price panel. Use StockData.build_panel() to create it.")
+        self.panel = PricePanel(folder)
+        return self.panel
 
 
-    def load(self, labels=None):
+    def correlation_matrix(self, labels=None, column='DailyReturns', method='correlation',
+                           min_periods=1, block_size=BLOCK_SIZE, max_workers=None, refresh=True):
         """
-        Load data from the data folder into the StockData object. Data is loaded
-        into a dictionary of pandas.DataFrames.
+        Calculates the pairwise correlation or covariance of a column, by
+        default the daily returns, across stocks in the library. Each pair
+        of stocks uses the dates on which both have a value. The column is
+        written to a temporary memory-mapped panel one stock at a time and
+        the sums behind the matrix are read from it in blocks, so memory
+        does not grow with the length of the history. The sums are saved
+        in the '.correlation' folder of the library, and refreshed with the
+        rows appended since the last call when the catalog checksums show
+        that the stored data was only appended to.
         
         Args:
             labels (str, list): A single string or list of strings
-             of the symbols indicating the stock or stocks to be
-             loaded. Default is None, which will load all stock data
-             found in the data directory.
+             of the symbols indicating the stocks to include. Default
+             is None, which includes all stocks found in the data
+             directory.
+            
+            column (str): The column to correlate. Default is 'DailyReturns'.
+            
+            method (str): Accepted values are 'correlation' and 'covariance'.
+             Default is 'correlation'.
+            
+            min_periods (int): Minimum number of common dates of a pair,
+             otherwise the value is NaN. Default is 1.
+            
+            block_size (int): Number of stocks per block of the computation.
+            
+            max_workers (int): Number of threads. Default is None, which
+             uses the default of concurrent.futures.ThreadPoolExecutor.
+            
+            refresh (bool): Whether to refresh the saved sums of the same
+             stocks and column instead of recomputing them. Default is True.
+        
+        Returns:
+            (pandas.DataFrame): Symmetric table indexed by symbol.
+        
+        Raises:
+            ValueError - If a stock is not in the library.
         """
-        # Initialize empty container.
-        self.d_data = {}
+        if method not in ['correlation', 'covariance']:
+            raise ValueError("Argument 'method' must be one of: 'correlation', 'covariance'.")
         
         # Handle default case.
         if isinstance(labels, type(None)):
             labels = [l.lower() for l in self.dir_list]
         else:
-            labels = check_and_convert_value_to_list(labels, str)
-        
-        # Loop and populate object data.
+            labels = [l.lower() for l in check_and_convert_value_to_list(labels, str)]
+        last_dates = self.catalog.last_dates()
         for label in labels:
-            # Ensure data is in library, instruct otherwise.
-            if label.lower() not in self.dir_list:
-                print(f"No stock data found for '{label.upper()}'. Use the '.add()' method to add a new stock symbol.")
+            if label not in last_dates:
+                raise ValueError(f"Stock '{label.upper()}' is not in data library.")
+        
+        folder = os.path.join(self.root, MOMENTS_FOLDER)
+        file = os.path.join(folder, f"{column}.pkl")
+        previous = read_moments(file) if refresh else None
+        checksums = [self.catalog.get(label)['checksum'] for label in labels]
+        moments = None
+        # Sums saved before the checksums were kept are accumulated again.
+        if (not isinstance(previous, type(None)) and previous.symbols == labels
+                and not isinstance(getattr(previous, 'checksums', None), type(None))):
+            moments = self._refresh_moments(previous, checksums, column, block_size, max_workers)
+        if isinstance(moments, type(None)):
+            os.makedirs(folder, exist_ok=True)
+            panel_folder = tempfile.mkdtemp(prefix="panel-", dir=folder)
+            try:
+                write_price_panel(
+                    folder=panel_folder,
+                    read_fn=lambda label, columns: self.storage.read(self.create_folder_path(label), columns=columns),
+                    labels=labels,
+                    fields=[column]
+                )
+                panel = PricePanel(panel_folder)
+                moments = panel_moments(panel, column, block_size=block_size,
+                                        max_workers=max_workers)
+                del panel
+            finally:
+                shutil.rmtree(panel_folder, ignore_errors=True)
+        moments.checksums = checksums
+        write_moments(file, moments)
+        
+        if method == 'correlation':
+            matrix = moments.correlation(min_periods)
+        else:
+            matrix = moments.covariance(min_periods)
+        return pd.DataFrame(matrix, index=labels, columns=labels)
+
+
+    def _refresh_moments(self, previous, checksums, column, block_size, max_workers):
+        """
+        Refreshes saved pairwise moments with the rows appended to each
+        stock since, see correlation.refresh_moments(). None is returned if
+        the stored data of a stock was rewritten since, e.g. compacted or
+        downloaded again, and all rows must be accumulated again.
+        """
+        d_starts = {}
+        for label, checksum, saved in zip(previous.symbols, checksums, previous.checksums):
+            if checksum == saved:
                 continue
-            self.d_data[label.lower()] = pd.read_pickle(self.create_folder_path(label.lower())+"/data.pkl")
+            path = self.create_folder_path(label)
+            appended = self.storage.appended_rows(path, saved, checksum, columns=['Date'])
+            if isinstance(appended, type(None)) or appended.empty:
+                return None
+            d_starts[label] = appended['Date'].iloc[0]
+        if not d_starts:
+            return previous
+        
+        start = min(d_starts.values())
+        d_tables = {label: self.storage.read(self.create_folder_path(label), columns=[column],
+                                             start=start)
+                    for label in previous.symbols}
+        return refresh_moments(previous, d_tables, d_starts, column, block_size=block_size,
+                               max_workers=max_workers)
 
 
     def get_object_data(self):
@@ -234,11 +1137,13 @@ class StockData:
             print("StockData object does not has any data loaded.")
 
 
-    def add_moving_average(self, labels=None, column='Close', windows=None, method='sma'):
+    def add_moving_average(self, labels=None, column='Close', windows=None, method='sma',
+                           panel=False):
         """
         Calculates the moving average for a given label and column.
         Columns are added to each stock DataFrame as SMAX or EMAX,
-        where X is the window size in days.
+        where X is the window size in days. Results are cached on disk
+        and reused until the stock data changes.
         
         Args:
             labels (str, list): A single string or list of strings
@@ -257,6 +1162,10 @@ class StockData:
             method (str): Type of moving average to calculate. Accepted values
              are 'sma' (simple moving average), 'ema' (exponential moving
              average). Default is 'ema'.
+            
+            panel (bool): Whether to calculate all labels together on a
+             date-aligned panel, see analysis.panel. Faster for many labels
+             and gives the same values. Default is False.
         """
         # Handle errors.
         if not self.d_data:
@@ -273,21 +1182,177 @@ class StockData:
             labels = check_and_convert_value_to_list(labels, str)
         
         # Handle moving averages.
+        windows = check_and_convert_value_to_list(windows, int)
+        names = [f"{method.upper()}_{str(w)}" for w in windows]
+        d_panel_ma = {'sma': panel_sma,
+                      'ema': panel_ema}
         d_ma = {'sma': simple_moving_average,
                 'ema': exp_moving_average}
-        for label in labels:
-            self.d_data[label] = d_ma[method](self.d_data[label], column, windows)
+        
+        def compute_fn(missing):
+            if panel:
+                return self._panel_columns(missing, [column],
+                                           lambda p: d_panel_ma[method](p, windows))
+            return {l: d_ma[method](self.d_data[l], column, windows)[names] for l in missing}
+        
+        self._add_cached_columns(labels, column, method, tuple(windows), compute_fn)
 
 
-    def add_macd(self, labels=None):
+    def add_macd(self, labels=None, panel=False):
         """
         Adds the MACD and 12- and 26-period EMA to each stock symbol data.
+        Results are cached on disk and reused until the stock data changes.
         
         Args:
             labels (str, list): A single string or list of strings
              of the symbols indicating the stock or stocks to have 
              the moving average calculated. Default is None, which
              will calculate the moving average for all labels.
+            
+            panel (bool): Whether to calculate all labels together on a
+             date-aligned panel, see analysis.panel. Default is False.
+        """
+        # Handle default case.
+        if isinstance(labels, type(None)):
+            labels = [l.lower() for l in self.dir_list]
+        else:
+            labels = check_and_convert_value_to_list(labels, str)
+        
+        def compute_fn(missing):
+            if panel:
+                return self._panel_columns(missing, ['Close'], panel_macd)
+            return {l: macd(self.d_data[l], 'Close')[MACD_COLUMNS] for l in missing}
+        
+        self._add_cached_columns(labels, 'Close', 'macd', (), compute_fn)
+
+
+    def add_rolling_indicator(self, labels=None, indicator='std', column='Close', windows=None,
+                              num_std=2.0, panel=False):
+        """
+        Calculates a rolling statistic or technical indicator for each label,
+        see analysis.rolling. Columns are added to each stock DataFrame as
+        STD_X, MIN_X, MAX_X, BB_MID_X, BB_UPPER_X, BB_LOWER_X, RSI_X, ATR_X
+        or OBV, where X is the window size in days. Results are cached on
+        disk and reused until the stock data changes.
+        
+        Args:
+            labels (str, list): A single string or list of strings
+             of the symbols indicating the stock or stocks to have 
+             the indicator calculated. Default is None, which
+             will calculate the indicator for all labels.
+            
+            indicator (str): The indicator to calculate. Accepted values
+             are 'std' (rolling volatility), 'min', 'max', 'bollinger'
+             (Bollinger bands), 'rsi' (Relative Strength Index), 'atr'
+             (Average True Range) and 'obv' (On-Balance Volume). Default
+             is 'std'.
+            
+            column (str): The column from the stock DataFrame to use.
+             'atr' always uses the 'High', 'Low' and 'Close' columns.
+            
+            windows (int, list): The window or list of windows, in days.
+             Not used for 'obv'.
+            
+            num_std (float): Width of the Bollinger bands in standard
+             deviations. Default is 2.
+            
+            panel (bool): Whether to calculate all labels together on a
+             date-aligned panel, see analysis.panel. Only used for
+             'bollinger', 'rsi' and 'atr', the others are faster per label.
+             Default is False.
+        """
+        # Handle errors.
+        if not self.d_data:
+            raise ValueError("There is no data loaded into this StockData object.")
+        if indicator not in ROLLING_INDICATORS:
+            raise ValueError(f"Argument 'indicator' must be one of: {', '.join(ROLLING_INDICATORS)}.")
+        if indicator != 'obv' and isinstance(windows, type(None)):
+            raise ValueError("At least one value must be passed to argument 'windows'.")
+        
+        # Handle default case.
+        if isinstance(labels, type(None)):
+            labels = [l.lower() for l in self.dir_list]
+        else:
+            labels = check_and_convert_value_to_list(labels, str)
+        if indicator != 'obv':
+            windows = check_and_convert_value_to_list(windows, int)
+        input_cols = indicator_input_columns(indicator, column)
+        names = indicator_column_names(indicator, windows)
+        d_indicators = {'std': lambda df: rolling_std(df, column, windows),
+                        'min': lambda df: rolling_min(df, column, windows),
+                        'max': lambda df: rolling_max(df, column, windows),
+                        'bollinger': lambda df: bollinger_bands(df, column, windows, num_std),
+                        'rsi': lambda df: relative_strength_index(df, column, windows),
+                        'atr': lambda df: average_true_range(df, windows),
+                        'obv': lambda df: on_balance_volume(df, column)}
+        
+        def compute_fn(missing):
+            if panel and indicator in PANEL_ROLLING_INDICATORS:
+                return self._panel_columns(
+                    missing, input_cols,
+                    lambda *p: panel_rolling(list(p), indicator, windows, num_std))
+            return {l: d_indicators[indicator](self.d_data[l])[names] for l in missing}
+        
+        params = (tuple(windows or []), num_std)
+        self._add_cached_columns(labels, column, indicator, params, compute_fn)
+
+
+    def track_indicators(self, labels=None, column='Close', sma_windows=None, ema_windows=None,
+                         macd=False, adjust=True):
+        """
+        Starts following moving averages and the MACD of stored stocks
+        with online indicators, see analysis.online. The indicators are
+        computed once over the stored history, saved in the symbol folder,
+        and extended with the new rows on every update.
+        
+        Args:
+            labels (str, list): A single string or list of strings
+             of the symbols indicating the stock or stocks to follow.
+             Default is None, which follows all stocks found in the
+             data directory.
+            
+            column (str): The price column the indicators follow.
+            
+            sma_windows (int, list): Windows of the simple moving averages,
+             in days. Default is None, for no simple moving averages.
+            
+            ema_windows (int, list): Windows of the exponential moving
+             averages, in days. Default is None, for no exponential moving
+             averages.
+            
+            macd (bool): Whether to follow the MACD. Default is False.
+            
+            adjust (bool): Whether the EMAs use pandas' adjusted weights,
+             matching ewm(span).mean(). Default is True.
+        """
+        # Handle default case.
+        if isinstance(labels, type(None)):
+            labels = [l.lower() for l in self.dir_list]
+        else:
+            labels = check_and_convert_value_to_list(labels, str)
+        
+        for label in labels:
+            path = self.create_folder_path(label.lower())
+            df = self.storage.read(path, columns=[column])
+            state = IndicatorState(column, sma_windows=sma_windows, ema_windows=ema_windows,
+                                   macd=macd, adjust=adjust)
+            state.update(df['Date'], df[column])
+            write_indicator_state(path, state)
+
+
+    def indicator_values(self, labels=None):
+        """
+        Returns the latest values of the followed indicators, see
+        StockData.track_indicators().
+        
+        Args:
+            labels (str, list): A single string or list of strings
+             of the symbols. Default is None, which returns all stocks
+             with followed indicators.
+        
+        Returns:
+            (pandas.DataFrame): Table indexed by symbol with the date of
+             the last row and a column per indicator.
         """
         # Handle default case.
         if isinstance(labels, type(None)):
@@ -295,11 +1360,91 @@ class StockData:
         else:
             labels = check_and_convert_value_to_list(labels, str)
         
+        d_rows = {}
+        for label in labels:
+            state = read_indicator_state(self.create_folder_path(label.lower()))
+            if isinstance(state, type(None)):
+                continue
+            d_rows[label.lower()] = {'Date': state.last_date, **state.values()}
+        return pd.DataFrame.from_dict(d_rows, orient='index')
+
+
+    def _panel_columns(self, labels, columns, panel_fn):
+        """
+        Calculates indicator columns for several symbols on date-aligned
+        panels of the given columns, see analysis.panel. The panels are
+        passed to 'panel_fn' in the order of the columns.
+        
+        Returns:
+            (dict): The indicator columns of each symbol, as a
+             pandas.DataFrame with the index of the symbol's table.
+        """
+        panels = [align_panel(self.d_data, labels, column) for column in columns]
+        d_arrays = panel_fn(*panels)
+        aligned = panels[0]
+        return {label: pd.DataFrame({name: aligned.symbol_values(arr, label)
+                                     for name, arr in d_arrays.items()},
+                                    index=self.d_data[label].index)
+                for label in labels}
+
+
+    def _cache_key(self, label, column, indicator, params):
+        """
+        Returns the indicator cache key of a symbol's loaded table, or None
+        if the table cannot be cached. The data version combines the
+        catalog checksum with the loaded date range and column type, so
+        keys change whenever the stored or loaded data changes.
+        """
+        if isinstance(self.indicator_cache, type(None)):
+            return None
+        entry = self.catalog.get(label)
+        df = self.d_data[label]
+        if isinstance(entry, type(None)) or df.empty:
+            return None
+        version = (entry['checksum'], str(df['Date'].iloc[0]), str(df['Date'].iloc[-1]),
+                   len(df), str(df[column].dtype))
+        return (label.lower(), column, indicator, params, version)
+
+
+    def _add_cached_columns(self, labels, column, indicator, params, compute_fn):
+        """
+        Adds indicator columns to the loaded table of each symbol, from the
+        indicator cache where possible. The columns of the remaining
+        symbols are calculated together and cached.
+        
+        Args:
+            labels (list): The symbols.
+            
+            column (str): The price column of the indicator.
+            
+            indicator (str): Name of the indicator.
+            
+            params (tuple): The parameters of the indicator.
+            
+            compute_fn (callable): Function returning the indicator columns
+             of a list of symbols, as a dictionary of pandas.DataFrames.
+        """
+        d_keys = {}
         for label in labels:
-            self.d_data[label] = macd(self.d_data[label], 'Close')
+            key = self._cache_key(label, column, indicator, params)
+            cached = None if isinstance(key, type(None)) else self.indicator_cache.get(key)
+            if isinstance(cached, type(None)):
+                d_keys[label] = key
+                continue
+            self.d_data[label] = self.d_data[label].assign(
+                **{c: cached[c].to_numpy() for c in cached.columns})
+        
+        if not d_keys:
+            return
+        for label, cols in compute_fn(list(d_keys)).items():
+            self.d_data[label] = self.d_data[label].assign(
+                **{c: cols[c].to_numpy() for c in cols.columns})
+            if not isinstance(d_keys[label], type(None)):
+                self.indicator_cache.put(d_keys[label], cols)
 
 
-    def plot_single_analysis(self, symbol, period='max', width=900, height=400):
+    def plot_single_analysis(self, symbol, period='max', width=900, height=400, freq=None,
+                             start=None, end=None):
         """
         Plots candlestick and MACD for a single stock in the data.
         
@@ -308,6 +1453,15 @@ class StockData:
             
             period (str): The time period to plot, in days ('5d'),
              months ('6m'), years ('4y') or 'max'.
+            
+            freq (str): Plot the 'weekly', 'monthly' or 'quarterly' bars
+             of the stock instead of daily data, with the MACD computed
+             over the bars. Suited to long periods. Default is None,
+             which plots daily data.
+            
+            start (str, datetime): First date to plot, overrides the period.
+            
+            end (str, datetime): Last date to plot.
              
             width (int): Chart width in pixels.
         
@@ -323,20 +1477,167 @@ class StockData:
         if symbol.lower() not in self.dir_list:
             raise ValueError(f"Symbol {symbol} not found in the StockData object.")
         
-        # Add MACD if missing from data.
-        if 'MACD' not in self.d_data[symbol.lower()].columns:
-            self.add_macd(labels=symbol.lower())
+        if not isinstance(freq, type(None)):
+            source = macd(self.load_bars(symbol.lower(), freq=freq)[symbol.lower()], 'Close')
+        else:
+            # Add MACD if missing from data.
+            if 'MACD' not in self.d_data[symbol.lower()].columns:
+                self.add_macd(labels=symbol.lower())
+            source = self.d_data[symbol.lower()]
         
         # Plot graph.
         macd_chart(
-            source=reduce_data_period(self.d_data[symbol.lower()], 'Date', period),
+            source=reduce_data_period(source, 'Date', period, start=start, end=end),
+            width=width,
+            height=height
+        ).display()
+
+
+    def backtest_macd(self, labels=None, fast=12, slow=26, signal=9, cost=0.0, max_workers=None):
+        """
+        Backtests the MACD crossover signal, long while the MACD is above
+        the DEA, on each stock, see analysis.backtest. Lists of spans run
+        every combination as a parameter grid on a process pool.
+        
+        Args:
+            labels (str, list): A single string or list of strings
+             of the symbols indicating the stock or stocks to test.
+             Default is None, which tests all stocks found in the
+             data directory.
+            
+            fast (int, list): Span or spans of the fast EMA. Default is 12.
+            
+            slow (int, list): Span or spans of the slow EMA. Default is 26.
+            
+            signal (int, list): Span or spans of the DEA. Default is 9.
+            
+            cost (float): Cost of each change of position, as a fraction
+             of the invested amount. Default is 0.
+            
+            max_workers (int): Number of processes. Default is None, which
+             uses the number of processors.
+        
+        Returns:
+            (pandas.DataFrame): Statistics indexed by 'fast', 'slow',
+             'signal' and 'Symbol'.
+        """
+        # Handle default case.
+        if isinstance(labels, type(None)):
+            labels = [l.lower() for l in self.dir_list]
+        else:
+            labels = [l.lower() for l in check_and_convert_value_to_list(labels, str)]
+        
+        # Packed close prices, each stock's own rows at the top of its column.
+        d_close = {label: self.storage.read(self.create_folder_path(label), columns=['Close'])
+                   for label in labels}
+        aligned = align_panel(d_close, labels, 'Close')
+        prices, _ = aligned.pack(aligned.values)
+        return backtest_grid(prices, labels, fast=fast, slow=slow, signal=signal, cost=cost,
+                             max_workers=max_workers)
+
+
+    def monte_carlo(self, labels=None, horizon=252, n_paths=10000, method='gbm',
+                    percentiles=PERCENTILES, period='max', seed=None, max_workers=None):
+        """
+        Forecasts the price of each stock with Monte Carlo simulation from
+        its daily returns, see analysis.monte_carlo. Stocks are simulated
+        in parallel processes.
+        
+        Args:
+            labels (str, list): A single string or list of strings
+             of the symbols indicating the stock or stocks to forecast.
+             Default is None, which forecasts all stocks found in the
+             data directory.
+            
+            horizon (int): Number of trading days to forecast. Default is 252.
+            
+            n_paths (int): Number of simulated paths per stock. Default is
+             10000.
+            
+            method (str): 'gbm' (geometric Brownian motion) or 'bootstrap'
+             (resampling of the historical returns). Default is 'gbm'.
+            
+            percentiles (list): Percentiles of the price to report, 0-100.
+            
+            period (str): The history of daily returns to use, in days
+             ('5d'), months ('6m'), years ('4y') or 'max'.
+            
+            seed (int): Seed of the simulation. Default is None, for a
+             random seed.
+            
+            max_workers (int): Number of processes. Default is None, which
+             uses the number of processors.
+        
+        Returns:
+            (dict): The percentile band table of each stock, see
+             monte_carlo.forecast_bands(). Also kept as StockData.d_forecast.
+        """
+        # Handle default case.
+        if isinstance(labels, type(None)):
+            labels = [l.lower() for l in self.dir_list]
+        else:
+            labels = [l.lower() for l in check_and_convert_value_to_list(labels, str)]
+        
+        d_returns, d_last = {}, {}
+        for label in labels:
+            df = self.storage.read(self.create_folder_path(label),
+                                   columns=['Close', 'DailyReturns'])
+            df = reduce_data_period(df, 'Date', period)
+            d_returns[label] = df['DailyReturns'].to_numpy(dtype=float)
+            d_last[label] = (df['Date'].iloc[-1], float(df['Close'].iloc[-1]))
+        
+        self.d_forecast = forecast_many(d_returns, d_last, horizon=horizon, n_paths=n_paths,
+                                        method=method, percentiles=percentiles, seed=seed,
+                                        max_workers=max_workers)
+        return self.d_forecast
+
+
+    def plot_monte_carlo(self, symbol, period='1y', width=900, height=400, **kwargs):
+        """
+        Plots the price history of a stock followed by the percentile bands
+        of its Monte Carlo forecast. The forecast is run if the stock has
+        none yet, see StockData.monte_carlo().
+        
+        Args:
+            symbol (str): A stock symbol to plot.
+            
+            period (str): The time period of history to plot, in days
+             ('5d'), months ('6m'), years ('4y') or 'max'.
+            
+            width (int): Chart width in pixels.
+        
+            height (int): Chart height in pixels.
+            
+            **kwargs: Arguments passed to StockData.monte_carlo().
+        
+        Returns:
+            (None)
+        
+        Raises:
+            ValueError - If stock symbol is not found in the object data.
+        """
+        # Handle missing stock data symbol.
+        if symbol.lower() not in self.dir_list:
+            raise ValueError(f"Symbol {symbol} not found in the StockData object.")
+        
+        if kwargs or symbol.lower() not in getattr(self, 'd_forecast', {}):
+            kwargs.setdefault('max_workers', 1)
+            bands = self.monte_carlo(labels=symbol.lower(), **kwargs)[symbol.lower()]
+        else:
+            bands = self.d_forecast[symbol.lower()]
+        
+        # Plot graph.
+        forecast_band_chart(
+            history=self.d_data[symbol.lower()],
+            bands=bands,
+            period=period,
             width=width,
             height=height
         ).display()
 
 
     def plot_compare_multiple(self, labels, data_col='Close', period='max',
-                        width=900, height=400):
+                        width=900, height=400, freq=None, start=None, end=None):
         """
         Plots multiple stocks on the same chart.
         
@@ -348,6 +1649,14 @@ class StockData:
             period (str): The time period to plot, in days ('5d'),
              months ('6m'), years ('4y') or 'max'.
             
+            freq (str): Plot the 'weekly', 'monthly' or 'quarterly' bars
+             of the stocks instead of daily data, e.g. of the 'Close'
+             column. Default is None, which plots daily data.
+            
+            start (str, datetime): First date to plot, overrides the period.
+            
+            end (str, datetime): Last date to plot.
+            
             width (int): Chart width in pixels.
         
             height (int): Chart height in pixels.
@@ -355,31 +1664,90 @@ class StockData:
         Returns:
             (None)
         """
+        d_data = self.d_data
+        if not isinstance(freq, type(None)):
+            d_data = self.load_bars(labels, freq=freq)
         line_chart(
-            d_data=self.d_data, x_col='Date', y_col=data_col, labels=labels,
-            period=period, width=width, height=height
+            d_data=d_data, x_col='Date', y_col=data_col, labels=labels,
+            period=period, width=width, height=height, start=start, end=end
         ).display()
 
     
+    def dividend_events(self, labels=None, start=None):
+        """
+        Returns the dividend events kept in the library catalog.
+        
+        Args:
+            labels (str, list): A single string or list of strings
+             of the symbols. Default is None, which returns the events
+             of all stocks.
+            
+            start (str): First date, 'YYYY-MM-DD'. Default is None.
+        
+        Returns:
+            (pandas.DataFrame): Table with the columns 'Symbol', 'Date'
+             ('YYYY-MM-DD'), 'Dividends' and 'FracDividends'.
+        """
+        if not isinstance(labels, type(None)):
+            labels = check_and_convert_value_to_list(labels, str)
+        return pd.DataFrame(self.catalog.dividends(labels, start=start),
+                            columns=['Symbol', 'Date', 'Dividends', 'FracDividends'])
+
+
     def dividend_summary(self, labels=None, div_type='FracDividends'):
         """
-        Summarizes the dividends in the available data.
+        Summarizes the dividends of the stocks, from the dividend events
+        kept in the library catalog.
         """
-        df_list = []
         # Handle default case.
         if isinstance(labels, type(None)):
             labels = [l.lower() for l in self.dir_list]
+            df_events = self.dividend_events()
         else:
             labels = check_and_convert_value_to_list(labels, str)
+            df_events = self.dividend_events(labels)
+        return dividend_summary_table(df_events, labels, div_type)
+
+
+    def trailing_yield(self, labels=None, date=None, years=1):
+        """
+        Returns the dividends paid by each stock in the years up to a date,
+        as the sum of the amounts ('TrailingDividends') and of the
+        fractional dividends ('TrailingYield'), see returns.trailing_yield().
+        
+        Args:
+            labels (str, list): A single string or list of strings
+             of the symbols. Default is None, which uses all stocks.
+            
+            date (str): The last date of the window, 'YYYY-MM-DD'. Default
+             is None, which uses the last stored date of each stock.
+            
+            years (int): Length of the window in years. Default is 1.
+        
+        Returns:
+            (pandas.DataFrame): One row per stock.
+        
+        Raises:
+            ValueError - If a stock is not in the library.
+        """
+        last_dates = self.catalog.last_dates()
+        # Handle default case.
+        if isinstance(labels, type(None)):
+            labels = [l.lower() for l in self.dir_list]
+        else:
+            labels = [l.lower() for l in check_and_convert_value_to_list(labels, str)]
         for label in labels:
-            df_list.append(dividend_summary(self.d_data[label], label, div_type))
-        df_summary = pd.DataFrame(df_list)
-        return df_summary
+            if label not in last_dates:
+                raise ValueError(f"Stock '{label.upper()}' is not in data library.")
+        as_of = {label: date if date else last_dates[label] for label in labels}
+        start = (pd.Timestamp(min(as_of.values())) - pd.DateOffset(years=years)).strftime('%Y-%m-%d')
+        return trailing_yield(self.dividend_events(labels, start=start), as_of, years=years)
 
     
     def get_stock_price(self, label, date=None, price_type='Close'):
         """
-        Returns the price of the stock at the given date.
+        Returns the price of the stock at the given date, or on the last
+        trading day before it, see StockData.get_stock_prices().
         
         Args:
             label (str): The stock symbol.
@@ -391,10 +1759,36 @@ class StockData:
         
         Returns:
             (float): The price of the requested stock.
+        
+        Raises:
+            ValueError - If the date is before the first stored date.
         """
-        data = self.d_data[label.lower()].copy()
-        if date:
-            date = pd.to_datetime(date, format='%Y-%m-%d')
-        else:
-            date = data['Date'].max()
-        return data.loc[data['Date']==date, price_type].iloc[0]
+        row = self.price_index.locate(label, [date])[0]
+        if row < 0:
+            raise ValueError(f"Stock '{label.upper()}' has no price on or before {date}.")
+        return self.d_data[label.lower()][price_type].iloc[row]
+
+
+    def get_stock_prices(self, labels, dates=None, price_types='Close'):
+        """
+        Returns the prices of many (symbol, date, price type) lookups at
+        once, e.g. to value a list of trades. Each date gets the price of
+        the last trading day on or before it, found by binary search on the
+        loaded data of the symbol, see storage.lookup.PriceIndex.
+        
+        Args:
+            labels (str, list): The symbol of each lookup, or a single
+             symbol for all.
+            
+            dates (list): The date of each lookup, 'YYYY-MM-DD' or datetime.
+             Default is None, which gets the latest prices. None entries
+             also get the latest price.
+            
+            price_types (str, list): The column of each lookup, or a single
+             column for all. Default is 'Close'.
+        
+        Returns:
+            (numpy.ndarray): The prices, NaN for dates before the first
+             stored date of the symbol.
+        """
+        return self.price_index.lookup(labels, dates, price_types)
@@ -0,0 +1,169 @@
+"""
+# ============================================================================
+# CACHE.PY
+# ----------------------------------------------------------------------------
+# A size-bounded disk cache of computed indicator columns, kept in a hidden
+# folder of the library. Entries are keyed by the symbol, price column,
+# indicator, its parameters and the version of the data it was computed
+# on, so an entry is never used for changed data. The least recently used
+# entries are evicted once the cache exceeds its size. Opening the cache
+# does not touch the cache folder.
+#
+# ============================================================================
+"""
+
+# Imports.
+import os
+import shutil
+import hashlib
+import threading
+import pandas as pd
+
+
+CACHE_FOLDER = ".indicators"
+
+# Default maximum size of the cache, in bytes.
+CACHE_SIZE = 256 * 2**20
+
+# Fraction of the maximum size the cache is reduced to when evicting.
+EVICT_TARGET = 0.9
+
+
+class IndicatorCache:
+    """
+    Disk cache of indicator columns, one pickle file per entry. The sizes
+    of the entries are read from the cache folder once, on the first write,
+    and then kept up to date in memory, so writes do not list the folder.
+    Once the total exceeds the maximum size, the folder is scanned again
+    and entries are evicted down to EVICT_TARGET of the maximum, so that
+    eviction runs only once per many writes. The sizes are guarded by a
+    lock, as entries are invalidated from concurrent update threads.
+
+    Args:
+        folder (str): The cache folder.
+
+        max_size (int): Maximum total size of the cached files, in bytes.
+         Default is CACHE_SIZE.
+    """
+    def __init__(self, folder, max_size=CACHE_SIZE):
+        """
+        Constructor.
+        """
+        self.folder = folder
+        self.max_size = max_size
+        # Size of each entry file by symbol, read on first use.
+        self.sizes = None
+        self.total = 0
+        self.lock = threading.Lock()
+
+
+    def entry_file(self, key):
+        """
+        Returns the file of a cache key, (symbol, column, indicator, params,
+        version). Entries are grouped in a folder per symbol.
+        """
+        digest = hashlib.sha256(repr(key).encode()).hexdigest()
+        return os.path.join(self.folder, key[0].lower(), f"{digest}.pkl")
+
+
+    def get(self, key):
+        """
+        Returns the cached columns of a key as a pandas.DataFrame, or None
+        if the key is not cached.
+        """
+        file = self.entry_file(key)
+        if not os.path.exists(file):
+            return None
+        try:
+            df = pd.read_pickle(file)
+        except Exception:
+            return None
+        # Mark as recently used.
+        os.utime(file)
+        return df
+
+
+    def put(self, key, df):
+        """
+        Caches the columns of a key, then evicts the least recently used
+        entries if the cache is over its size.
+        """
+        with self.lock:
+            if isinstance(self.sizes, type(None)):
+                self._scan()
+            file = self.entry_file(key)
+            os.makedirs(os.path.dirname(file), exist_ok=True)
+            df.to_pickle(file + ".tmp")
+            os.replace(file + ".tmp", file)
+            entries = self.sizes.setdefault(key[0].lower(), {})
+            self.total += os.path.getsize(file) - entries.get(file, 0)
+            entries[file] = os.path.getsize(file)
+            if self.total > self.max_size:
+                self._evict()
+
+
+    def invalidate(self, symbol):
+        """
+        Removes all cached entries of a symbol.
+        """
+        with self.lock:
+            shutil.rmtree(os.path.join(self.folder, symbol.lower()), ignore_errors=True)
+            if not isinstance(self.sizes, type(None)):
+                self.total -= sum(self.sizes.pop(symbol.lower(), {}).values())
+
+
+    def scan(self):
+        """
+        Reads the entries of the cache folder.
+
+        Returns:
+            (list): Tuples of (last used time, size, file).
+        """
+        with self.lock:
+            return self._scan()
+
+
+    def evict(self):
+        """
+        Removes the least recently used entries until the total size of the
+        cache is at most EVICT_TARGET of its maximum size. The folder is
+        scanned again, so entries written by other processes are counted.
+        """
+        with self.lock:
+            self._evict()
+
+
+    def _scan(self):
+        """
+        Reads the entries of the cache folder, see IndicatorCache.scan().
+        Called with the lock held.
+        """
+        entries = []
+        self.sizes = {}
+        for folder, _, files in os.walk(self.folder):
+            for f in files:
+                file = os.path.join(folder, f)
+                try:
+                    stat = os.stat(file)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, file))
+                self.sizes.setdefault(os.path.basename(folder), {})[file] = stat.st_size
+        self.total = sum(e[1] for e in entries)
+        return entries
+
+
+    def _evict(self):
+        """
+        Evicts entries, see IndicatorCache.evict(). Called with the lock held.
+        """
+        target = self.max_size * EVICT_TARGET
+        for _, size, file in sorted(self._scan()):
+            if self.total <= target:
+                break
+            try:
+                os.remove(file)
+            except OSError:
+                continue
+            self.sizes[os.path.basename(os.path.dirname(file))].pop(file, None)
+            self.total -= size
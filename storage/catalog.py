@@ -0,0 +1,184 @@
+"""
+# ============================================================================
+# CATALOG.PY
+# ----------------------------------------------------------------------------
+# The library catalog, a single SQLite file in the data folder with one
+# row per stored symbol. It holds the date range, row count, schema
+# version and checksum of each symbol, so that a library can be opened and
+# an update planned without opening any per-symbol files. The checksum
+# is that of the current data files of the symbol, see Storage.checksum().
+#
+# The catalog also keeps a sparse table of dividend events, one row per
+# dividend paid, so that dividend summaries of the whole library are
+# computed from a few rows per symbol instead of the daily data.
+#
+# ============================================================================
+"""
+
+# Imports.
+import os
+import sqlite3
+
+from contextlib import closing
+
+
+CATALOG_FILE = "catalog.sqlite"
+
+# Version of the stored table layout, recorded per symbol.
+SCHEMA_VERSION = 1
+
+CATALOG_COLUMNS = ['symbol', 'first_date', 'last_date', 'row_count',
+                   'schema_version', 'checksum', 'tz']
+
+DIVIDEND_COLUMNS = ['symbol', 'date', 'amount', 'frac_yield']
+
+
+class Catalog:
+    """
+    Read and write access to the catalog of a library.
+
+    Args:
+        root (str): The data folder of the library.
+    """
+    def __init__(self, root):
+        """
+        Constructor.
+        """
+        self.file = os.path.join(root, CATALOG_FILE)
+        self.created = not os.path.exists(self.file)
+        self.execute("""CREATE TABLE IF NOT EXISTS symbols (
+                            symbol TEXT PRIMARY KEY,
+                            first_date TEXT,
+                            last_date TEXT,
+                            row_count INTEGER,
+                            schema_version INTEGER,
+                            checksum TEXT,
+                            tz TEXT)""")
+        # Catalogs written before dividends were kept get an empty table.
+        self.dividends_created = not self.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name = 'dividends'")
+        self.execute("""CREATE TABLE IF NOT EXISTS dividends (
+                            symbol TEXT,
+                            date TEXT,
+                            amount REAL,
+                            frac_yield REAL,
+                            PRIMARY KEY (symbol, date))""")
+
+
+    def execute(self, sql, params=(), many=False):
+        """
+        Runs a statement in its own connection and returns all result rows.
+        A connection per call keeps the catalog usable from worker threads.
+        """
+        with closing(sqlite3.connect(self.file)) as con:
+            with con:
+                cur = con.executemany(sql, params) if many else con.execute(sql, params)
+                return cur.fetchall()
+
+
+    def symbols(self):
+        """
+        Returns the lower case symbols in the catalog.
+        """
+        return [r[0] for r in self.execute("SELECT symbol FROM symbols ORDER BY symbol")]
+
+
+    def get(self, symbol):
+        """
+        Returns the catalog entry of a symbol as a dictionary, or None if
+        the symbol is not in the catalog.
+        """
+        rows = self.execute(f"SELECT {', '.join(CATALOG_COLUMNS)} FROM symbols WHERE symbol = ?",
+                            (symbol.lower(),))
+        return dict(zip(CATALOG_COLUMNS, rows[0])) if rows else None
+
+
+    def last_dates(self):
+        """
+        Returns the last stored date of every symbol, 'YYYY-MM-DD'.
+        """
+        return dict(self.execute("SELECT symbol, last_date FROM symbols"))
+
+
+    def upsert(self, entries):
+        """
+        Inserts or replaces catalog entries.
+
+        Args:
+            entries (dict, list): A catalog entry or list of entries, with
+             the keys 'symbol', 'first_date', 'last_date', 'row_count',
+             'schema_version', 'checksum' and 'tz'.
+        """
+        if isinstance(entries, dict):
+            entries = [entries]
+        rows = [tuple([e['symbol'].lower()] + [e.get(c) for c in CATALOG_COLUMNS[1:]])
+                for e in entries]
+        self.execute(f"INSERT OR REPLACE INTO symbols ({', '.join(CATALOG_COLUMNS)}) "
+                     f"VALUES ({', '.join(['?'] * len(CATALOG_COLUMNS))})", rows, many=True)
+
+
+    def replace_dividends(self, symbol, events, start=None):
+        """
+        Replaces the dividend events of a symbol from a date onward.
+
+        Args:
+            symbol (str): The symbol.
+
+            events (list): Tuples of (date, amount, frac_yield), with the
+             date as 'YYYY-MM-DD'.
+
+            start (str): First date to replace, 'YYYY-MM-DD'. Default is
+             None, which replaces all events of the symbol.
+        """
+        symbol = symbol.lower()
+        with closing(sqlite3.connect(self.file)) as con:
+            with con:
+                if isinstance(start, type(None)):
+                    con.execute("DELETE FROM dividends WHERE symbol = ?", (symbol,))
+                else:
+                    con.execute("DELETE FROM dividends WHERE symbol = ? AND date >= ?",
+                                (symbol, start))
+                con.executemany("INSERT OR REPLACE INTO dividends "
+                                f"({', '.join(DIVIDEND_COLUMNS)}) VALUES (?, ?, ?, ?)",
+                                [(symbol,) + tuple(e) for e in events])
+
+
+    def dividends(self, symbols=None, start=None):
+        """
+        Returns the dividend events as tuples of (symbol, date, amount,
+        frac_yield), ordered by symbol and date.
+
+        Args:
+            symbols (list): Lower case symbols. Default is None, which
+             returns the events of all symbols.
+
+            start (str): First date, 'YYYY-MM-DD'. Default is None.
+        """
+        if isinstance(symbols, type(None)):
+            batches = [None]
+        else:
+            # Stay below the SQLite limit on query parameters.
+            symbols = sorted({s.lower() for s in symbols})
+            batches = [symbols[i:i + 500] for i in range(0, len(symbols), 500)]
+        rows = []
+        for batch in batches:
+            where, params = [], []
+            if not isinstance(batch, type(None)):
+                where.append(f"symbol IN ({', '.join(['?'] * len(batch))})")
+                params += batch
+            if not isinstance(start, type(None)):
+                where.append("date >= ?")
+                params.append(start)
+            sql = f"SELECT {', '.join(DIVIDEND_COLUMNS)} FROM dividends"
+            if where:
+                sql += " WHERE " + " AND ".join(where)
+            rows += self.execute(sql + " ORDER BY symbol, date", tuple(params))
+        return rows
+
+
+    def remove(self, symbol):
+        """
+        Removes a symbol and its dividend events from the catalog.
+        """
+        self.execute("DELETE FROM symbols WHERE symbol = ?", (symbol.lower(),))
+        self.execute("DELETE FROM dividends WHERE symbol = ?", (symbol.lower(),))
@@ -0,0 +1,182 @@
+"""
+# ============================================================================
+# LAZY.PY
+# ----------------------------------------------------------------------------
+# A dictionary-like container of stock data tables that loads a symbol
+# on first access and keeps the tables in memory within a memory budget,
+# evicting the least recently used tables first. Tables that were changed
+# after loading, e.g. by adding indicator columns, are spilled to a
+# temporary folder of the container on eviction instead of being lost.
+#
+# ============================================================================
+"""
+
+# Imports.
+import os
+import shutil
+import weakref
+import tempfile
+import pandas as pd
+
+from collections import OrderedDict
+from collections.abc import MutableMapping
+
+
+class LazyFrames(MutableMapping):
+    """
+    Lazily loaded, memory-budgeted mapping of symbol to pandas.DataFrame.
+
+    Tables are only tracked as changed when they are assigned to the
+    mapping, e.g. d_data[label] = macd(d_data[label], 'Close'). Columns
+    added in place to a table returned by the mapping are not tracked.
+
+    Args:
+        loader (callable): Function returning the stored table of a
+         symbol, called as loader(label).
+
+        labels (list): The symbols available in the mapping.
+
+        memory_budget (int): Maximum memory, in bytes, used by the tables
+         kept in memory. The most recently used table is always kept.
+         Default is None, which keeps all accessed tables in memory.
+
+        spill_folder (str): Folder in which the container creates its own
+         temporary folder for tables evicted after being changed. The
+         temporary folder is removed by LazyFrames.close(), or when the
+         container is garbage collected. Required when a memory budget
+         is given.
+    """
+    def __init__(self, loader, labels, memory_budget=None, spill_folder=None):
+        """
+        Constructor.
+        """
+        if not isinstance(memory_budget, type(None)) and isinstance(spill_folder, type(None)):
+            raise ValueError("Argument 'spill_folder' is required when a memory budget is given.")
+        self.loader = loader
+        self.labels = list(labels)
+        self.memory_budget = memory_budget
+        self.spill_folder = spill_folder
+        self.frames = OrderedDict()
+        self.sizes = {}
+        self.changed = set()
+        self.spilled = set()
+        # Created on the first spill.
+        self.spill_dir = None
+        self._finalizer = None
+
+
+    def __getitem__(self, label):
+        if label in self.frames:
+            self.frames.move_to_end(label)
+            return self.frames[label]
+        if label not in self.labels:
+            raise KeyError(label)
+
+        # Changed tables are read back from the spill folder.
+        if label in self.spilled:
+            df = pd.read_pickle(self.spill_file(label))
+            os.remove(self.spill_file(label))
+            self.spilled.discard(label)
+        else:
+            df = self.loader(label)
+        self._keep(label, df)
+        return df
+
+
+    def __setitem__(self, label, df):
+        if label not in self.labels:
+            self.labels.append(label)
+        self.changed.add(label)
+        self._keep(label, df)
+
+
+    def __delitem__(self, label):
+        if label not in self.labels:
+            raise KeyError(label)
+        self.labels.remove(label)
+        self.frames.pop(label, None)
+        self.sizes.pop(label, None)
+        self.changed.discard(label)
+        if label in self.spilled:
+            self.spilled.discard(label)
+            os.remove(self.spill_file(label))
+
+
+    def __iter__(self):
+        return iter(list(self.labels))
+
+
+    def __len__(self):
+        return len(self.labels)
+
+
+    def __contains__(self, label):
+        return label in self.labels
+
+
+    def put(self, label, df):
+        """
+        Keeps an already loaded stored table of a symbol in the mapping,
+        without marking it as changed.
+        """
+        if label not in self.labels:
+            self.labels.append(label)
+        self._keep(label, df)
+
+
+    def spill_file(self, label):
+        """
+        Returns the spill file path of a symbol.
+        """
+        if isinstance(self.spill_dir, type(None)):
+            os.makedirs(self.spill_folder, exist_ok=True)
+            self.spill_dir = tempfile.mkdtemp(prefix="spill-", dir=self.spill_folder)
+            self._finalizer = weakref.finalize(self, shutil.rmtree, self.spill_dir,
+                                               ignore_errors=True)
+        return os.path.join(self.spill_dir, f"{label}.pkl")
+
+
+    def close(self):
+        """
+        Removes the temporary spill folder. Spilled tables lose their
+        changes and are loaded again from the stored data on access.
+        """
+        if not isinstance(self._finalizer, type(None)):
+            self._finalizer()
+        self.spill_dir = None
+        self._finalizer = None
+        self.changed -= self.spilled
+        self.spilled = set()
+
+
+    def memory_usage(self):
+        """
+        Returns the memory, in bytes, used by the tables kept in memory.
+        """
+        return sum(self.sizes.values())
+
+
+    def in_memory(self):
+        """
+        Returns the symbols whose tables are currently kept in memory.
+        """
+        return list(self.frames.keys())
+
+
+    def _keep(self, label, df):
+        """
+        Keeps the table in memory and evicts least recently used tables
+        until the memory budget is met.
+        """
+        self.frames[label] = df
+        self.frames.move_to_end(label)
+        self.sizes[label] = int(df.memory_usage(deep=True).sum())
+        if isinstance(self.memory_budget, type(None)):
+            return
+
+        while self.memory_usage() > self.memory_budget and len(self.frames) > 1:
+            old_label, old_df = self.frames.popitem(last=False)
+            self.sizes.pop(old_label)
+            if old_label in self.changed:
+                old_df.to_pickle(self.spill_file(old_label))
+                self.spilled.add(old_label)
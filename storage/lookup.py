@@ -0,0 +1,168 @@
+"""
+# ============================================================================
+# LOOKUP.PY
+# ----------------------------------------------------------------------------
+# As-of price lookups on the stock data tables of a library. A date gets
+# the price of the last trading day on or before it, found by binary
+# search on the sorted dates of the symbol. Lookups of many (symbol, date,
+# field) triples are answered in one vectorized search per symbol.
+#
+# ============================================================================
+"""
+
+# Imports.
+import weakref
+import numpy as np
+import pandas as pd
+
+
+class PriceIndex:
+    """
+    Sorted date index over the stock data tables of a library. The dates
+    of a table are indexed on its first lookup and kept while the table
+    object exists, so a table that is reloaded or replaced, e.g. by adding
+    columns, is indexed again.
+
+    Dates are compared as calendar days in the timezone of the stored
+    dates, so a date matches its trading day whatever the time of day.
+
+    Args:
+        get_frame (callable): Function returning the stock data table of
+         a symbol, called as get_frame(label).
+    """
+    def __init__(self, get_frame):
+        """
+        Constructor.
+        """
+        self.get_frame = get_frame
+        self.indexes = {}
+
+
+    def dates(self, label):
+        """
+        Returns the stock data table of a symbol, the sorted calendar days
+        of its dates as int64 and the timezone of its dates.
+        """
+        df = self.get_frame(label)
+        entry = self.indexes.get(label)
+        if isinstance(entry, type(None)) or entry[0]() is not df:
+            dates = pd.DatetimeIndex(df['Date'])
+            tz = dates.tz
+            if not isinstance(tz, type(None)):
+                dates = dates.tz_localize(None)
+            days = dates.normalize().as_unit('ns').asi8
+            if np.any(days[1:] < days[:-1]):
+                raise ValueError(f"Dates of stock '{label.upper()}' are not sorted.")
+            # The entry is dropped with the table.
+            ref = weakref.ref(df, lambda _, label=label: self.indexes.pop(label, None))
+            entry = (ref, days, tz)
+            self.indexes[label] = entry
+        return df, entry[1], entry[2]
+
+
+    def locate(self, label, dates=None):
+        """
+        Returns the row positions of the last trading days on or before
+        the dates.
+
+        Args:
+            label (str): The stock symbol.
+
+            dates (list): The dates, e.g. 'YYYY-MM-DD'. Missing dates (None)
+             give the last row. Default is None, which returns the last row.
+
+        Returns:
+            (numpy.ndarray): The row positions, -1 for dates before the
+             first stored date.
+        """
+        _, days, tz = self.dates(label.lower())
+        if isinstance(dates, type(None)):
+            return np.array([len(days) - 1])
+        return _asof_positions(days, tz, dates)
+
+
+    def lookup(self, labels, dates=None, fields='Close'):
+        """
+        Returns the as-of values of many (symbol, date, field) triples.
+        Each symbol is searched once for all of its dates.
+
+        Args:
+            labels (str, list): The symbol of each triple, or a single
+             symbol for all.
+
+            dates (list): The date of each triple, 'YYYY-MM-DD' or
+             datetime. None, or None entries, give the latest value.
+
+            fields (str, list): The column of each triple, or a single
+             column for all. Default is 'Close'.
+
+        Returns:
+            (numpy.ndarray): The values, NaN for dates before the first
+             stored date of the symbol.
+
+        Raises:
+            ValueError: if the lists are of different lengths.
+        """
+        lengths = {len(a) for a in (labels, dates, fields) if pd.api.types.is_list_like(a)}
+        if len(lengths) > 1:
+            raise ValueError("Arguments 'labels', 'dates' and 'fields' must have the same length.")
+        n = lengths.pop() if lengths else 1
+        labels = np.array([l.lower() for l in _broadcast(labels, n)], dtype=object)
+        dates = pd.Series(_broadcast(dates, n), dtype=object)
+        fields = np.array(_broadcast(fields, n), dtype=object)
+
+        # Rows of each symbol, grouped with a single sort.
+        symbols, inverse = np.unique(labels, return_inverse=True)
+        order = np.argsort(inverse, kind='stable')
+        bounds = np.searchsorted(inverse[order], np.arange(len(symbols) + 1))
+
+        values = np.full(n, np.nan)
+        for k, label in enumerate(symbols):
+            rows = order[bounds[k]:bounds[k + 1]]
+            df, days, tz = self.dates(label)
+            pos = _asof_positions(days, tz, dates.iloc[rows])
+            for field in np.unique(fields[rows]):
+                sel = (fields[rows] == field) & (pos >= 0)
+                column = df[field].to_numpy(dtype=np.float64, na_value=np.nan)
+                values[rows[sel]] = column[pos[sel]]
+        return values
+
+
+def _asof_positions(days, tz, dates):
+    """
+    Returns the positions of the last days on or before the dates, -1
+    before the first day and the last position for missing dates.
+    """
+    dates = pd.Series(list(dates), dtype=object)
+    try:
+        query = pd.DatetimeIndex(pd.to_datetime(dates))
+    except (TypeError, ValueError):
+        # Dates with and without a timezone, or in several timezones.
+        query = pd.DatetimeIndex([_calendar_day(d, tz) for d in dates])
+    if not isinstance(query.tz, type(None)):
+        query = query.tz_convert(tz).tz_localize(None)
+    pos = np.searchsorted(days, query.normalize().as_unit('ns').asi8, side='right') - 1
+    pos[query.isna()] = len(days) - 1
+    return pos
+
+
+def _calendar_day(date, tz):
+    """
+    Returns a date as a timestamp without timezone, converted to the
+    timezone of the stored dates if it has one.
+    """
+    if isinstance(date, type(None)) or pd.isna(date):
+        return pd.NaT
+    date = pd.Timestamp(date)
+    if not isinstance(date.tz, type(None)):
+        date = date.tz_convert(tz).tz_localize(None)
+    return date
+
+
+def _broadcast(value, n):
+    """
+    Returns a list-like argument as a list, or a single value repeated.
+    """
+    if pd.api.types.is_list_like(value):
+        return list(value)
+    return [value] * n
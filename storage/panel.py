@@ -0,0 +1,178 @@
+"""
+# ============================================================================
+# PANEL.PY
+# ----------------------------------------------------------------------------
+# A consolidated, memory-mapped price store for a whole library. Each
+# field (Open, High, Low, Close, ...) is a single date x symbol array file,
+# opened with 'numpy.memmap', so several processes can share one page-cached
+# copy of the data. Arrays are stored column-major, which makes the history
+# of a single symbol a contiguous slice.
+#
+# ============================================================================
+"""
+
+# Imports.
+import os
+import pickle
+import numpy as np
+import pandas as pd
+
+from ..utils.utils import check_and_convert_value_to_list, match_timezone
+
+
+PANEL_FOLDER = ".panel"
+PANEL_FIELDS = ['Open', 'High', 'Low', 'Close', 'Volume', 'Dividends']
+
+
+def write_price_panel(folder, read_fn, labels, fields=PANEL_FIELDS):
+    """
+    Writes the price panel for the given symbols. Data is read one symbol
+    at a time, so only a single symbol's table is in memory at once. The
+    files are written to temporary files and moved into place, so
+    processes that have the previous panel mapped keep reading it intact.
+
+    Args:
+        folder (str): The panel folder.
+
+        read_fn (callable): Function returning the stock data table of a
+         symbol, called as read_fn(label, columns).
+
+        labels (list): The symbols to include in the panel.
+
+        fields (str, list): The fields to store. Default is the OHLC
+         prices, volume and dividends.
+
+    Raises:
+        ValueError: if no symbols are given.
+    """
+    fields = check_and_convert_value_to_list(fields, str)
+    labels = [l.lower() for l in labels]
+    if not labels:
+        raise ValueError("At least one symbol is required to write a price panel.")
+    os.makedirs(folder, exist_ok=True)
+
+    # The panel dates are the union of the dates of all symbols.
+    dates = None
+    for label in labels:
+        label_dates = pd.DatetimeIndex(read_fn(label, ['Date'])['Date'])
+        dates = label_dates if dates is None else dates.union(label_dates)
+    dates = dates.sort_values().unique()
+
+    # Fill the field arrays one symbol at a time.
+    arrays = {f: np.lib.format.open_memmap(os.path.join(folder, f"{f}.npy.tmp"), mode='w+',
+                                           dtype=np.float64, shape=(len(dates), len(labels)),
+                                           fortran_order=True)
+              for f in fields}
+    bounds = np.zeros((len(labels), 2), dtype=np.int64)
+    for j, label in enumerate(labels):
+        df = read_fn(label, fields)
+        rows = dates.get_indexer(pd.DatetimeIndex(df['Date']))
+        bounds[j] = [rows.min(), rows.max() + 1] if len(rows) else [0, 0]
+        for f in fields:
+            arrays[f][:, j] = np.nan
+            if f in df.columns:
+                arrays[f][rows, j] = df[f].to_numpy(dtype=np.float64)
+    for arr in arrays.values():
+        arr.flush()
+    del arrays
+
+    index = {
+        'dates': dates,
+        'symbols': labels,
+        'fields': fields,
+        'bounds': bounds
+    }
+    index_file = os.path.join(folder, "index.pkl")
+    with open(index_file + ".tmp", "wb") as fp:
+        pickle.dump(index, fp, protocol=pickle.HIGHEST_PROTOCOL)
+    for f in fields:
+        os.replace(os.path.join(folder, f"{f}.npy.tmp"), os.path.join(folder, f"{f}.npy"))
+    os.replace(index_file + ".tmp", index_file)
+
+
+class PricePanel:
+    """
+    Read-only access to a memory-mapped price panel. All returned arrays
+    are views on the mapped files, no data is copied.
+
+    Args:
+        folder (str): The panel folder.
+    """
+    def __init__(self, folder):
+        """
+        Constructor.
+        """
+        self.folder = folder
+        with open(os.path.join(folder, "index.pkl"), "rb") as fp:
+            index = pickle.load(fp)
+        self.dates = index['dates']
+        self.symbols = index['symbols']
+        self.fields = index['fields']
+        self.bounds = index['bounds']
+        self.columns = {s: j for j, s in enumerate(self.symbols)}
+        self.arrays = {}
+
+
+    def field(self, field='Close'):
+        """
+        Returns the full date x symbol array of a field.
+        """
+        if field not in self.fields:
+            raise ValueError(f"Field '{field}' is not in the price panel. Available fields: {', '.join(self.fields)}.")
+        if field not in self.arrays:
+            arr = np.load(os.path.join(self.folder, f"{field}.npy"), mmap_mode='r')
+            if arr.shape != (len(self.dates), len(self.symbols)):
+                raise ValueError(f"The price panel in '{self.folder}' was rebuilt since it was opened. Open it again.")
+            self.arrays[field] = arr
+        return self.arrays[field]
+
+
+    def symbol_view(self, symbol, field='Close'):
+        """
+        Returns the history of a field for a single symbol, from its first
+        to its last date in the panel.
+
+        Args:
+            symbol (str): The stock symbol.
+
+            field (str): The price field.
+
+        Returns:
+            (numpy.ndarray): A contiguous view on the panel.
+        """
+        j = self.columns[symbol.lower()]
+        first, last = self.bounds[j]
+        return self.field(field)[first:last, j]
+
+
+    def symbol_frame(self, symbol, fields=None):
+        """
+        Returns the history of a single symbol as a table of views on
+        the panel, with a 'Date' column like the stored stock data.
+        """
+        fields = self.fields if isinstance(fields, type(None)) else check_and_convert_value_to_list(fields, str)
+        first, last = self.bounds[self.columns[symbol.lower()]]
+        d_cols = {'Date': self.dates[first:last]}
+        for f in fields:
+            d_cols[f] = self.symbol_view(symbol, f)
+        return pd.DataFrame(d_cols, copy=False)
+
+
+    def cross_section(self, date, fields=None):
+        """
+        Returns the values of all symbols on a single date.
+
+        Args:
+            date (str): The date, 'YYYY-MM-DD'.
+
+            fields (str, list): Field or fields to return. Default is None,
+             which returns all fields.
+
+        Returns:
+            (pandas.DataFrame): Table indexed by symbol, with one column
+             per field.
+        """
+        fields = self.fields if isinstance(fields, type(None)) else check_and_convert_value_to_list(fields, str)
+        row = self.dates.get_loc(match_timezone(date, self.dates.tz))
+        return pd.DataFrame({f: self.field(f)[row, :] for f in fields},
+                            index=pd.Index(self.symbols, name='Symbol'), copy=False)
@@ -0,0 +1,502 @@
+"""
+# ============================================================================
+# STORAGE.PY
+# ----------------------------------------------------------------------------
+# Storage backends for the per-symbol data files of a 'StockData' library.
+# The 'pickle' backend keeps the original whole-DataFrame layout, with a
+# small tail table of the recent rows for reads of the latest dates, while
+# the columnar 'parquet' and 'feather' backends can read back only the
+# requested columns and date range.
+#
+# ============================================================================
+"""
+
+# Imports.
+import os
+import pickle
+import hashlib
+import pandas as pd
+
+from ..utils.utils import check_and_convert_value_to_list, match_timezone
+
+
+LIBRARY_CONFIG_FILE = "library.pkl"
+
+# Name of the table of recent rows kept next to a pickled base file, and
+# the number of years before the year of its last date it starts.
+TAIL_TABLE = "tail"
+TAIL_YEARS = 1
+
+
+class Storage:
+    """
+    Base class for the storage backends. Each symbol folder holds a base
+    data file and an append-only 'segments' folder of smaller files with
+    the rows added by later updates. Segments are applied in the order they
+    were written, and a segment row replaces any earlier row with the same
+    date. Compaction merges the segments into the base file.
+    """
+    name = None
+    extension = None
+
+    def data_file(self, path):
+        """
+        Returns the data file path inside a symbol folder.
+        """
+        return self.table_file(path, 'data')
+
+
+    def table_file(self, path, name):
+        """
+        Returns the path of a named table inside a symbol folder, e.g. the
+        resampled bars kept next to the daily data.
+        """
+        return f"{path}/{name}.{self.extension}"
+
+
+    def segment_folder(self, path):
+        """
+        Returns the segment folder path inside a symbol folder.
+        """
+        return f"{path}/segments"
+
+
+    def segment_files(self, path):
+        """
+        Returns the segment files of a symbol folder, in the order they
+        were written.
+        """
+        folder = self.segment_folder(path)
+        if not os.path.exists(folder):
+            return []
+        return [f"{folder}/{f}" for f in sorted(os.listdir(folder))
+                if f.endswith(f".{self.extension}")]
+
+
+    def checksum(self, path):
+        """
+        Returns the checksum of the stored data of a symbol folder: the
+        checksums of the base data file and of each segment, in the order
+        they were written, chained, see file_checksum(). Chaining the
+        checksum of a new segment into it gives the checksum after the
+        segment is written.
+        """
+        checksum = None
+        for file in [self.data_file(path)] + self.segment_files(path):
+            checksum = file_checksum(file, checksum)
+        return checksum
+
+
+    def appended_rows(self, path, previous, current, columns=None):
+        """
+        Returns the rows of the segments written to a symbol folder since
+        its stored data had the checksum 'previous', given its different
+        current checksum, see Storage.checksum().
+
+        Args:
+            path (str): The symbol folder.
+
+            previous (str): The earlier checksum.
+
+            current (str): The current checksum, e.g. from the catalog.
+
+            columns (str, list): Column name or names to read. Default is
+             None, which reads all columns.
+
+        Returns:
+            (pandas.DataFrame): The appended rows, or None if the stored
+             data was rewritten since, e.g. compacted or downloaded again.
+        """
+        segments = self.segment_files(path)
+        # The newest segments are the most likely to be new, try them first.
+        for k in range(len(segments) - 1, -1, -1):
+            checksum = previous
+            for file in segments[k:]:
+                checksum = file_checksum(file, checksum)
+            if checksum == current:
+                return self._merge([self._read_file(f, columns=projected_columns(columns))
+                                    for f in segments[k:]])
+        return None
+
+
+    def exists(self, path):
+        """
+        Checks if the symbol folder contains a data file for this backend.
+        """
+        return os.path.exists(self.data_file(path))
+
+
+    def write(self, path, df):
+        """
+        Writes the full stock data table to the symbol folder, replacing
+        the base data file and removing all segments.
+
+        Args:
+            path (str): The symbol folder.
+
+            df (pandas.DataFrame): The stock data table.
+
+        Returns:
+            (str): The written file.
+        """
+        segments = self.segment_files(path)
+        self._write_base(path, df)
+        for file in segments:
+            os.remove(file)
+        return self.data_file(path)
+
+
+    def write_segment(self, path, df):
+        """
+        Appends the rows of the table to the symbol folder as a new segment,
+        named by its sequence number and first date.
+
+        Args:
+            path (str): The symbol folder.
+
+            df (pandas.DataFrame): The new rows, including the 'Date' column.
+
+        Returns:
+            (str): The written segment file.
+        """
+        folder = self.segment_folder(path)
+        os.makedirs(folder, exist_ok=True)
+        segments = self.segment_files(path)
+        seq = int(os.path.basename(segments[-1]).split('-')[0]) + 1 if segments else 0
+        first_date = df['Date'].min().strftime('%Y%m%d')
+        file = f"{folder}/{str(seq).zfill(6)}-{first_date}.{self.extension}"
+        self._replace_file(file, df)
+        return file
+
+
+    def compact(self, path):
+        """
+        Merges the segments of a symbol folder into the base data file.
+        Segments written while compacting are kept.
+
+        Args:
+            path (str): The symbol folder.
+        """
+        segments = self.segment_files(path)
+        if not segments:
+            return
+        df = self._merge([self._read_file(f) for f in [self.data_file(path)] + segments])
+        self._write_base(path, df)
+        for file in segments:
+            os.remove(file)
+
+
+    def read(self, path, columns=None, start=None, end=None):
+        """
+        Reads the stock data table from the symbol folder, including
+        all segments.
+
+        Args:
+            path (str): The symbol folder.
+
+            columns (str, list): Column name or names to read. The 'Date'
+             column is always included. Default is None, which reads
+             all columns.
+
+            start (str, datetime): First date to read, inclusive. Default
+             is None, which reads from the start of the history.
+
+            end (str, datetime): Last date to read, inclusive. Default is
+             None, which reads to the end of the history.
+
+        Returns:
+            (pandas.DataFrame): The stock data table, indexed by date.
+        """
+        columns = projected_columns(columns)
+        df_list = [self._read_base(path, columns=columns, start=start, end=end)]
+        df_list += [self._read_file(f, columns=columns, start=start, end=end)
+                    for f in self.segment_files(path)]
+        df = df_list[0] if len(df_list) == 1 else self._merge(df_list)
+        df.index = pd.DatetimeIndex(df['Date']).rename(None)
+        return df
+
+
+    def write_table(self, path, name, df):
+        """
+        Writes a named table to the symbol folder, see Storage.table_file().
+        Named tables have no segments.
+
+        Returns:
+            (str): The written file.
+        """
+        file = self.table_file(path, name)
+        self._replace_file(file, df)
+        return file
+
+
+    def read_table(self, path, name, columns=None, start=None, end=None):
+        """
+        Reads a named table from the symbol folder, see Storage.read().
+        None is returned if the table does not exist.
+        """
+        file = self.table_file(path, name)
+        if not os.path.exists(file):
+            return None
+        df = self._read_file(file, columns=projected_columns(columns), start=start, end=end)
+        df.index = pd.DatetimeIndex(df['Date']).rename(None)
+        return df
+
+
+    def derived_files(self, path):
+        """
+        Returns the files of a symbol folder that are derived from the base
+        data file by the backend, and removed with it.
+        """
+        return []
+
+
+    def _write_base(self, path, df):
+        """
+        Replaces the base data file of a symbol folder.
+        """
+        self._replace_file(self.data_file(path), df)
+
+
+    def _read_base(self, path, columns=None, start=None, end=None):
+        """
+        Reads the base data file of a symbol folder, see Storage.read().
+        """
+        return self._read_file(self.data_file(path), columns=columns, start=start, end=end)
+
+
+    def _merge(self, df_list):
+        """
+        Concatenates the base and segment tables, keeping the last row
+        written for each date.
+        """
+        df = pd.concat(df_list, axis=0, ignore_index=True)
+        df = df.drop_duplicates(subset='Date', keep='last')
+        if not df['Date'].is_monotonic_increasing:
+            df = df.sort_values('Date')
+        return df.reset_index(drop=True)
+
+
+    def _replace_file(self, file, df):
+        """
+        Writes the table to a temporary file and moves it into place, so
+        readers never see a partially written file.
+        """
+        self._write_file(file + ".tmp", df)
+        os.replace(file + ".tmp", file)
+
+
+    def _write_file(self, file, df):
+        """
+        Writes a table to a single file.
+        """
+        raise NotImplementedError
+
+
+    def _read_file(self, file, columns=None, start=None, end=None):
+        """
+        Reads a table from a single file, see Storage.read().
+        """
+        raise NotImplementedError
+
+
+class PickleStorage(Storage):
+    """
+    Whole-DataFrame pickle files. Column and date selection is applied
+    after the full table has been unpickled. Next to the base data file,
+    a tail table holds its rows from the start of the year before its
+    last date, so that reads of the latest dates, e.g. by an update,
+    unpickle the tail instead of the full history.
+    """
+    name = 'pickle'
+    extension = 'pkl'
+
+    def derived_files(self, path):
+        file = self.table_file(path, TAIL_TABLE)
+        return [file] if os.path.exists(file) else []
+
+
+    def _write_base(self, path, df):
+        super()._write_base(path, df)
+        if df.empty:
+            return
+        dates = df['Date']
+        tail_start = match_timezone(f"{dates.iloc[-1].year - TAIL_YEARS}-01-01",
+                                    getattr(dates.dtype, 'tz', None))
+        # The tail records the base file it was taken from.
+        tail = df.loc[dates >= tail_start]
+        tail.attrs = {'base': _file_version(self.data_file(path))}
+        self._replace_file(self.table_file(path, TAIL_TABLE), tail)
+
+
+    def _read_base(self, path, columns=None, start=None, end=None):
+        tail_file = self.table_file(path, TAIL_TABLE)
+        if start is not None and os.path.exists(tail_file):
+            tail = pd.read_pickle(tail_file)
+            tz = getattr(tail['Date'].dtype, 'tz', None)
+            if (tail.attrs.get('base') == _file_version(self.data_file(path)) and len(tail)
+                    and match_timezone(start, tz) >= tail['Date'].iloc[0]):
+                tail.attrs = {}
+                if columns:
+                    tail = tail[[c for c in columns if c in tail.columns]]
+                return filter_date_range(tail, start=start, end=end)
+        return super()._read_base(path, columns=columns, start=start, end=end)
+
+
+    def _write_file(self, file, df):
+        df.to_pickle(file)
+
+
+    def _read_file(self, file, columns=None, start=None, end=None):
+        df = pd.read_pickle(file)
+        if columns:
+            df = df[[c for c in columns if c in df.columns]]
+        return filter_date_range(df, start=start, end=end)
+
+
+class ParquetStorage(Storage):
+    """
+    Parquet files. Only the requested columns are read, and the date range
+    is pushed down to the reader as a row filter.
+    """
+    name = 'parquet'
+    extension = 'parquet'
+
+    def _write_file(self, file, df):
+        df.to_parquet(file)
+
+
+    def _read_file(self, file, columns=None, start=None, end=None):
+        import pyarrow.parquet as pq
+
+        filters = None
+        if start is not None or end is not None:
+            tz = getattr(pq.read_schema(file).field('Date').type, 'tz', None)
+            filters = []
+            if start is not None:
+                filters.append(('Date', '>=', match_timezone(start, tz)))
+            if end is not None:
+                filters.append(('Date', '<=', match_timezone(end, tz)))
+        return pd.read_parquet(file, columns=columns, filters=filters)
+
+
+class FeatherStorage(Storage):
+    """
+    Arrow IPC (Feather) files. Only the requested columns are read, the
+    date range is applied after reading.
+    """
+    name = 'feather'
+    extension = 'feather'
+
+    def _write_file(self, file, df):
+        # Feather does not store a non-default index.
+        df.reset_index(drop=True).to_feather(file)
+
+
+    def _read_file(self, file, columns=None, start=None, end=None):
+        df = pd.read_feather(file, columns=columns)
+        return filter_date_range(df, start=start, end=end)
+
+
+STORAGE_BACKENDS = {
+    'pickle': PickleStorage,
+    'parquet': ParquetStorage,
+    'feather': FeatherStorage
+}
+
+
+def get_storage(name):
+    """
+    Returns the storage backend with the given name.
+
+    Args:
+        name (str): One of 'pickle', 'parquet', 'feather'.
+
+    Returns:
+        (Storage): The storage backend.
+
+    Raises:
+        ValueError: if the backend name is not known.
+    """
+    if name not in STORAGE_BACKENDS:
+        raise ValueError(f"Argument 'storage' must be one of: {', '.join(STORAGE_BACKENDS)}.")
+    return STORAGE_BACKENDS[name]()
+
+
+def projected_columns(columns):
+    """
+    Returns the list of columns to read, always including 'Date'.
+    None is returned when all columns should be read.
+    """
+    if columns is None:
+        return None
+    columns = check_and_convert_value_to_list(columns, str)
+    if 'Date' not in columns:
+        columns = ['Date'] + columns
+    return columns
+
+
+def filter_date_range(df, date_col='Date', start=None, end=None):
+    """
+    Returns the rows of the table between the start and end dates, inclusive.
+    """
+    if start is None and end is None:
+        return df
+    tz = getattr(df[date_col].dtype, 'tz', None)
+    mask = pd.Series(True, index=df.index)
+    if start is not None:
+        mask &= df[date_col] >= match_timezone(start, tz)
+    if end is not None:
+        mask &= df[date_col] <= match_timezone(end, tz)
+    return df.loc[mask]
+
+
+def _file_version(file):
+    """
+    Returns the size and modification time of a file, which change
+    whenever the file is replaced.
+    """
+    stat = os.stat(file)
+    return (stat.st_size, stat.st_mtime_ns)
+
+
+def file_checksum(file, previous=None):
+    """
+    Returns the SHA-256 checksum of a file. When a previous checksum is
+    given, it is chained into the new one, so that the checksum of a
+    symbol changes with every file written for it.
+    
+    Args:
+        file (str): The file path.
+        
+        previous (str): The previous checksum. Default is None.
+    
+    Returns:
+        (str): The hexadecimal checksum.
+    """
+    h = hashlib.sha256()
+    if previous:
+        h.update(previous.encode())
+    with open(file, "rb") as fp:
+        for chunk in iter(lambda: fp.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def read_library_config(root):
+    """
+    Reads the library configuration from the data folder. An empty
+    dictionary is returned for libraries without a configuration file.
+    """
+    file = os.path.join(root, LIBRARY_CONFIG_FILE)
+    if not os.path.exists(file):
+        return {}
+    with open(file, "rb") as fp:
+        return pickle.load(fp)
+
+
+def write_library_config(root, config):
+    """
+    Writes the library configuration to the data folder.
+    """
+    with open(os.path.join(root, LIBRARY_CONFIG_FILE), "wb") as fp:
+        pickle.dump(config, fp, protocol=pickle.HIGHEST_PROTOCOL)
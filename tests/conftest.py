@@ -0,0 +1,41 @@
+"""
+# ============================================================================
+# CONFTEST.PY
+# ----------------------------------------------------------------------------
+# Makes the repository importable as the 'stocks' package in the tests.
+# The test modules import the package when they are collected, before any
+# fixture runs, so the import path is set when pytest is configured and
+# its temporary folder is removed when pytest exits.
+#
+# ============================================================================
+"""
+
+# Imports.
+import sys
+import shutil
+import tempfile
+import pytest
+
+from helpers import package_path
+
+
+def pytest_configure(config):
+    config._stocks_link_folder = tempfile.mkdtemp()
+    config._stocks_package_path = package_path(config._stocks_link_folder)
+    sys.path.insert(0, config._stocks_package_path)
+
+
+def pytest_unconfigure(config):
+    folder = getattr(config, '_stocks_link_folder', None)
+    if folder:
+        sys.path.remove(config._stocks_package_path)
+        # Removes the link, not the repository it points to.
+        shutil.rmtree(folder, ignore_errors=True)
+
+
+@pytest.fixture(scope='session')
+def package_folder(pytestconfig):
+    """
+    The folder from which the repository imports as 'stocks'.
+    """
+    return pytestconfig._stocks_package_path
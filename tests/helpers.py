@@ -0,0 +1,105 @@
+"""
+# ============================================================================
+# HELPERS.PY
+# ----------------------------------------------------------------------------
+# Shared helpers of the tests and the benchmark scripts: makes the
+# repository importable as the 'stocks' package, builds synthetic price
+# data in the layout downloaded by 'yfinance' and serves it to a library
+# in place of the download source.
+#
+# ============================================================================
+"""
+
+# Imports.
+import os
+import numpy as np
+import pandas as pd
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def package_path(folder):
+    """
+    Returns a folder from which the repository imports as 'stocks'. A
+    clone named 'stocks' is imported from its parent folder, any other
+    clone through a link created in the given folder, which the caller
+    removes when done.
+
+    Args:
+        folder (str): An empty temporary folder for the link.
+
+    Returns:
+        (str): The folder to put on the import path.
+    """
+    if os.path.basename(ROOT) == 'stocks':
+        return os.path.dirname(ROOT)
+    os.symlink(ROOT, os.path.join(folder, 'stocks'))
+    return folder
+
+
+def price_history(rows, seed=0, start='2000-01-03', tz='America/New_York'):
+    """
+    Returns a synthetic daily price history as downloaded by 'yfinance',
+    indexed by business day, with a dividend on about one day in 60.
+
+    Args:
+        rows (int): Number of trading days.
+
+        seed (int): Seed of the random prices. Default is 0.
+
+        start (str): The first date. Default is '2000-01-03'.
+
+        tz (str): Timezone of the dates. Default is 'America/New_York'.
+
+    Returns:
+        (pandas.DataFrame): The price history, with the columns 'Open',
+         'High', 'Low', 'Close', 'Volume', 'Dividends' and 'Stock Splits'.
+    """
+    rng = np.random.default_rng(seed)
+    close = 100.0 * np.exp(np.cumsum(rng.normal(0.0002, 0.015, rows)))
+    spread = close * rng.uniform(0.0, 0.02, rows)
+    return pd.DataFrame({
+        'Open': close * (1.0 + rng.normal(0.0, 0.005, rows)),
+        'High': close + spread,
+        'Low': close - spread,
+        'Close': close,
+        'Volume': rng.integers(10**5, 10**7, rows).astype(np.float64),
+        'Dividends': np.where(rng.random(rows) < 0.016, 0.25, 0.0),
+        'Stock Splits': np.zeros(rows)
+    }, index=pd.bdate_range(start, periods=rows, tz=tz, name='Date'))
+
+
+def history_fetcher(d_history, today):
+    """
+    Returns a fetcher serving fixed price histories up to the current day,
+    including the day of 'start', as 'yfinance' does. Moving its 'today'
+    attribute forward between updates replays the days in between.
+
+    Args:
+        d_history (dict): The price history of each symbol, see
+         price_history(). The tables may be changed between updates,
+         e.g. to revise a price.
+
+        today (str, datetime): The current day.
+
+    Returns:
+        (Fetcher): The fetcher.
+    """
+    # Imported here, as this module is imported before the package is on
+    # the import path, see 'conftest.py'.
+    from stocks.fetching.fetchers import Fetcher
+    from stocks.utils.utils import match_timezone
+
+    class HistoryFetcher(Fetcher):
+        def history(self, symbol, start=None):
+            df = d_history[symbol.lower()]
+            df = df.loc[df.index <= match_timezone(self.today, df.index.tz)]
+            if not isinstance(start, type(None)):
+                df = df.loc[df.index >= match_timezone(start, df.index.tz)]
+            return df
+
+    fetcher = HistoryFetcher()
+    fetcher.today = today
+    return fetcher
+
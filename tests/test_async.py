@@ -0,0 +1,139 @@
+"""
+# ============================================================================
+# TEST_ASYNC.PY
+# ----------------------------------------------------------------------------
+# Checks the asynchronous add, update and load of StockData against the
+# synchronous ones, the errors collected per symbol for downloads and
+# writes that fail, and the limit on the number of stocks in progress.
+#
+# ============================================================================
+"""
+
+# Imports.
+import time
+import asyncio
+import threading
+import warnings
+import pandas as pd
+import pytest
+
+from stocks import StockData
+from helpers import history_fetcher, price_history
+
+
+LABELS = ['aaa', 'bbb', 'ccc', 'ddd']
+
+
+def histories():
+    """
+    Returns histories with different first dates.
+    """
+    return {label: price_history(200 + 20 * i, seed=i, start=f"2020-0{i + 1}-01")
+            for i, label in enumerate(LABELS)}
+
+
+def new_fetcher(d_history, today):
+    """
+    Returns a history fetcher without waits between retries.
+    """
+    fetcher = history_fetcher(d_history, pd.Timestamp(today, tz='America/New_York'))
+    fetcher.backoff = 0.0
+    return fetcher
+
+
+def assert_same_library(sd, expected):
+    """
+    Checks the stored data and catalog entries of two libraries.
+    """
+    assert sorted(sd.dir_list) == sorted(expected.dir_list)
+    sd.load()
+    expected.load()
+    for label in expected.dir_list:
+        pd.testing.assert_frame_equal(sd.d_data[label], expected.d_data[label])
+        assert sd.catalog.get(label) == expected.catalog.get(label)
+    assert sd.catalog.dividends() == expected.catalog.dividends()
+
+
+def test_add_and_update_match_synchronous(tmp_path):
+    d_history = histories()
+    (tmp_path / 'sync').mkdir()
+    (tmp_path / 'async').mkdir()
+    sd = StockData(str(tmp_path / 'sync'), fetcher=new_fetcher(d_history, '2020-11-30'))
+    asd = StockData(str(tmp_path / 'async'), fetcher=new_fetcher(d_history, '2020-11-30'))
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        assert sd.add(LABELS) == {}
+        assert asyncio.run(asd.aadd(LABELS, max_concurrency=3)) == {}
+        assert_same_library(asd, sd)
+
+        for today in ['2020-12-01', '2020-12-31', '2021-03-15']:
+            sd.fetcher.today = asd.fetcher.today = pd.Timestamp(today, tz='America/New_York')
+            assert sd.update() == {}
+            assert asyncio.run(asd.aupdate(max_concurrency=3)) == {}
+            assert_same_library(asd, sd)
+
+
+def test_load_matches_synchronous(tmp_path):
+    sd = StockData(str(tmp_path), fetcher=new_fetcher(histories(), '2021-03-15'))
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        assert sd.add(LABELS) == {}
+    sd.load(columns=['Close'], start='2020-06-01')
+    expected = {label: sd.d_data[label] for label in LABELS}
+
+    d_data = asyncio.run(sd.aload(columns=['Close'], start='2020-06-01', max_concurrency=2))
+    assert d_data is sd.d_data
+    # Read right away instead of on first access.
+    assert sorted(d_data.in_memory()) == sorted(LABELS)
+    for label in LABELS:
+        pd.testing.assert_frame_equal(d_data[label], expected[label])
+
+
+def test_errors_per_symbol(tmp_path):
+    d_history = histories()
+    sd = StockData(str(tmp_path), fetcher=new_fetcher(d_history, '2020-11-30'))
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        # An unknown symbol fails its download only.
+        errors = asyncio.run(sd.aadd(['aaa', 'zzz', 'bbb']))
+        assert list(errors) == ['zzz']
+        assert isinstance(errors['zzz'], KeyError)
+        assert sd.fetch_errors == errors
+        assert sorted(sd.dir_list) == ['aaa', 'bbb']
+
+        # A stock that cannot be saved does not stop the others.
+        def save(label, raw_data):
+            if label == 'ccc':
+                raise OSError("Disk full.")
+            sd.save_added(label, raw_data)
+        errors = asyncio.run(sd._afetch_and_save([('ccc', None), ('ddd', None)], save, 2))
+        assert list(errors) == ['ccc']
+        assert isinstance(errors['ccc'], OSError)
+        assert sorted(sd.dir_list) == ['aaa', 'bbb', 'ddd']
+        assert sd.catalog.get('ccc') is None
+
+
+@pytest.mark.parametrize('max_concurrency', [1, 2])
+def test_max_concurrency(tmp_path, max_concurrency):
+    fetcher = new_fetcher(histories(), '2020-11-30')
+    history = fetcher.history
+    lock = threading.Lock()
+    counts = {'running': 0, 'peak': 0}
+
+    # Each download takes a while, so that the next ones start meanwhile.
+    def slow_history(symbol, start=None):
+        with lock:
+            counts['running'] += 1
+            counts['peak'] = max(counts['peak'], counts['running'])
+        time.sleep(0.05)
+        with lock:
+            counts['running'] -= 1
+        return history(symbol, start=start)
+    fetcher.history = slow_history
+
+    sd = StockData(str(tmp_path), fetcher=fetcher)
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        assert asyncio.run(sd.aadd(LABELS, max_concurrency=max_concurrency)) == {}
+    assert counts['peak'] == max_concurrency
+    assert sorted(sd.dir_list) == LABELS
@@ -0,0 +1,67 @@
+"""
+# ============================================================================
+# TEST_BACKTEST.PY
+# ----------------------------------------------------------------------------
+# Checks the MACD backtest against the MACD columns of macd(), and the
+# statistics of every parameter set of the grid, on a price array with
+# missing rows at the bottom, against one backtest_macd() per symbol and
+# parameter set.
+#
+# ============================================================================
+"""
+
+# Imports.
+import numpy as np
+import pandas as pd
+import pytest
+
+from stocks.analysis.backtest import (backtest_macd, backtest_grid, held_positions,
+                                      performance_stats, BACKTEST_STATS)
+from stocks.analysis.macd import macd
+from helpers import price_history
+
+
+def stock_tables():
+    """
+    Returns stock data tables of different lengths.
+    """
+    return {label: price_history(rows, seed=seed).reset_index()
+            for label, rows, seed in [('aaa', 600, 1), ('bbb', 450, 2), ('ccc', 600, 3)]}
+
+
+def test_positions_follow_macd():
+    df = stock_tables()['aaa']
+    result = backtest_macd(df, 'Close')
+    expected = macd(df, 'Close')
+    np.testing.assert_array_equal(result['Position'].to_numpy(),
+                                  (expected['MACD'] > expected['DEA']).astype(float).to_numpy())
+    assert result['Position'].diff().abs().sum() > 5
+
+    # Each position is held over the next day.
+    returns = df['Close'].pct_change()
+    np.testing.assert_allclose(result['StrategyReturns'].to_numpy()[1:],
+                               (result['Position'].shift() * returns).to_numpy()[1:])
+    np.testing.assert_allclose(result['Equity'].iloc[-1],
+                               np.prod(1.0 + result['StrategyReturns'].iloc[1:]))
+
+
+@pytest.mark.parametrize('max_workers', [1, 2])
+def test_grid_matches_single_backtests(max_workers):
+    d_data = stock_tables()
+    labels = sorted(d_data)
+    prices = np.full((600, len(labels)), np.nan)
+    for j, label in enumerate(labels):
+        prices[:len(d_data[label]), j] = d_data[label]['Close'].to_numpy()
+
+    result = backtest_grid(prices, labels, fast=[5, 12], slow=[12, 26], signal=[4, 9],
+                           cost=0.001, max_workers=max_workers)
+    # The pair (12, 12) is skipped.
+    assert len(result) == 3 * 2 * len(labels)
+    for (fast, slow, signal, label), row in result.iterrows():
+        df = backtest_macd(d_data[label], 'Close', fast=fast, slow=slow, signal=signal, cost=0.001)
+        stats = performance_stats(df[['StrategyReturns']].to_numpy(),
+                                  held_positions(df[['Position']].to_numpy()))
+        expected = pd.Series({name: stats[name][0] for name in BACKTEST_STATS})
+        np.testing.assert_allclose(row[BACKTEST_STATS].to_numpy(dtype=float),
+                                   expected.to_numpy(dtype=float), rtol=1e-10,
+                                   err_msg=f"{fast} {slow} {signal} {label}")
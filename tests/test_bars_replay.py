@@ -0,0 +1,56 @@
+"""
+# ============================================================================
+# TEST_BARS_REPLAY.PY
+# ----------------------------------------------------------------------------
+# Replays updates of a stock across week, month, quarter and year
+# boundaries, some of which revise the last stored day, and checks that
+# the stored weekly, monthly and quarterly bars equal the bars resampled
+# from the history up to the day of each update, for every storage
+# backend.
+#
+# ============================================================================
+"""
+
+# Imports.
+import warnings
+import pandas as pd
+import pytest
+
+from stocks import StockData
+from stocks.analysis.resample import resample_bars, BAR_FREQUENCIES
+from helpers import history_fetcher, price_history
+
+
+# Days of the updates: mid-month, the last and first days of a month and
+# of a quarter, and jumps over several bars.
+UPDATE_DAYS = ['2021-09-15', '2021-09-29', '2021-09-30', '2021-10-01', '2021-10-04',
+               '2021-10-29', '2021-11-02', '2021-12-31', '2022-01-03', '2022-01-04',
+               '2022-02-25', '2022-04-08']
+
+
+@pytest.mark.parametrize('storage', ['pickle', 'parquet', 'feather'])
+def test_bars_after_updates_match_full_history(tmp_path, storage):
+    if storage != 'pickle':
+        pytest.importorskip('pyarrow')
+    full = price_history(200, seed=11, start='2021-07-01')
+    fetcher = history_fetcher({'abc': full}, '2021-09-10')
+    sd = StockData(str(tmp_path), storage=storage, fetcher=fetcher)
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        assert sd.add('abc') == {}
+
+        for i, today in enumerate(UPDATE_DAYS):
+            # Every other update revises the last stored day.
+            if i % 2:
+                last = full.index.strftime('%Y-%m-%d') == sd.catalog.get('abc')['last_date']
+                full.loc[last, ['High', 'Close']] *= 1.02
+                full.loc[last, 'Volume'] += 1000.0
+            fetcher.today = today
+            assert sd.update('abc') == {}
+
+            history = full.loc[full.index <= pd.Timestamp(today, tz=full.index.tz)].reset_index()
+            for freq in BAR_FREQUENCIES:
+                pd.testing.assert_frame_equal(sd.load_bars('abc', freq=freq)['abc'],
+                                              resample_bars(history, freq),
+                                              check_freq=False, check_index_type=False,
+                                              obj=f"{today} {freq}")
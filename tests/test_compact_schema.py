@@ -0,0 +1,67 @@
+"""
+# ============================================================================
+# TEST_COMPACT_SCHEMA.PY
+# ----------------------------------------------------------------------------
+# Checks that the compact column types narrow prices and returns only, and
+# that volumes too large for a 32-bit float are written and loaded exactly
+# by a library with the compact schema.
+#
+# ============================================================================
+"""
+
+# Imports.
+import warnings
+import numpy as np
+import pandas as pd
+import pytest
+
+from stocks import StockData
+from stocks.utils.utils import compact_dtypes
+from helpers import history_fetcher, price_history
+
+
+# Not exact as a 32-bit float, which stores 123456792.
+LARGE_VOLUME = 123456789.0
+
+
+def large_volume_history():
+    """
+    Returns a price history with volumes above 2**24 and a stock split.
+    """
+    df = price_history(60, seed=2, start='2021-03-01')
+    df['Volume'] = LARGE_VOLUME + np.arange(len(df))
+    df.loc[df.index[30], 'Stock Splits'] = 1.5
+    return df
+
+
+def test_compact_dtypes_keeps_share_columns():
+    df = large_volume_history().reset_index()
+    result = compact_dtypes(df)
+    for col in ['Open', 'High', 'Low', 'Close', 'Dividends']:
+        assert result[col].dtype == np.float32
+    for col in ['Volume', 'Stock Splits', 'Date']:
+        assert result[col].dtype == df[col].dtype
+    pd.testing.assert_series_equal(result['Volume'], df['Volume'])
+
+
+@pytest.mark.parametrize('storage', ['pickle', 'parquet', 'feather'])
+def test_large_volume_round_trip(tmp_path, storage):
+    if storage != 'pickle':
+        pytest.importorskip('pyarrow')
+    full = large_volume_history()
+    fetcher = history_fetcher({'abc': full}, full.index[39])
+    sd = StockData(str(tmp_path), storage=storage, fetcher=fetcher, compact_schema=True)
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        assert sd.add('abc') == {}
+        fetcher.today = full.index[-1]
+        assert sd.update('abc') == {}
+
+    # Reopened, so that the rows are read back from the files.
+    sd = StockData(str(tmp_path))
+    sd.load()
+    stored = sd.d_data['abc']
+    np.testing.assert_array_equal(stored['Volume'].to_numpy(), full['Volume'].to_numpy())
+    np.testing.assert_array_equal(stored['Stock Splits'].to_numpy(),
+                                  full['Stock Splits'].to_numpy())
+    assert stored['Close'].dtype == np.float32
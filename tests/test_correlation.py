@@ -0,0 +1,144 @@
+"""
+# ============================================================================
+# TEST_CORRELATION.PY
+# ----------------------------------------------------------------------------
+# Checks the blockwise correlation and covariance against pandas'
+# DataFrame.corr() and DataFrame.cov() on ragged histories, for price
+# levels as well as returns, after refreshes with appended and revised
+# rows, and after a stock is downloaded again with the same dates.
+#
+# ============================================================================
+"""
+
+# Imports.
+import warnings
+import numpy as np
+import pandas as pd
+import pytest
+
+from stocks import StockData
+from stocks.analysis.correlation import PairwiseMoments
+from helpers import history_fetcher, price_history
+
+
+def ragged_histories():
+    """
+    Returns histories with different first and last dates, and a stock
+    that follows another one.
+    """
+    d_history = {
+        'aaa': price_history(300, seed=1, start='2020-01-01'),
+        'bbb': price_history(240, seed=2, start='2020-03-02'),
+        'ccc': price_history(180, seed=3, start='2020-01-01'),
+        'ddd': price_history(260, seed=4, start='2020-02-03')
+    }
+    follower = d_history['aaa'].reindex(d_history['ddd'].index)
+    d_history['ddd'][['Close']] = follower[['Close']] * np.exp(
+        np.random.default_rng(5).normal(0.0, 0.005, len(follower)))[:, None]
+    return d_history
+
+
+def expected_matrix(sd, labels, column, method, min_periods=1):
+    """
+    Returns the matrix computed by pandas on the stored data.
+    """
+    sd.load(labels)
+    df = pd.DataFrame({label: sd.d_data[label].set_index('Date')[column] for label in labels})
+    if method == 'correlation':
+        return df.corr(min_periods=min_periods)
+    return df.cov(min_periods=min_periods)
+
+
+def open_library(tmp_path, d_history, today):
+    """
+    Returns a library with the histories added up to the given day.
+    """
+    fetcher = history_fetcher(d_history, pd.Timestamp(today, tz='America/New_York'))
+    sd = StockData(str(tmp_path), fetcher=fetcher)
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        assert sd.add(sorted(d_history)) == {}
+    return sd
+
+
+@pytest.mark.parametrize('method', ['correlation', 'covariance'])
+def test_pairwise_moments_match_pandas(method):
+    # Price levels around 1e4 with missing values, in blocks and row chunks.
+    rng = np.random.default_rng(0)
+    values = 1e4 + np.cumsum(rng.normal(0.0, 1.0, (500, 7)), axis=0)
+    values[rng.random(values.shape) < 0.1] = np.nan
+    values[:100, 2] = np.nan
+    values[400:, 5] = np.nan
+    shift = np.nanmean(values, axis=0)
+    moments = PairwiseMoments(7, shift=shift)
+    moments.add(values[:300], block_size=3, row_chunk=64, max_workers=2)
+    moments.add(values[300:], block_size=3, row_chunk=64, max_workers=2)
+
+    df = pd.DataFrame(values)
+    if method == 'correlation':
+        result, expected = moments.correlation(min_periods=5), df.corr(min_periods=5)
+    else:
+        result, expected = moments.covariance(min_periods=5), df.cov(min_periods=5)
+    np.testing.assert_allclose(result, expected.to_numpy(), rtol=1e-9, atol=1e-12)
+
+
+@pytest.mark.parametrize('method', ['correlation', 'covariance'])
+@pytest.mark.parametrize('column', ['DailyReturns', 'Close'])
+def test_matches_pandas_on_ragged_histories(tmp_path, column, method):
+    d_history = ragged_histories()
+    sd = open_library(tmp_path, d_history, '2021-06-30')
+    labels = sorted(d_history)
+    result = sd.correlation_matrix(labels, column=column, method=method, block_size=3)
+    expected = expected_matrix(sd, labels, column, method)
+    np.testing.assert_allclose(result.to_numpy(), expected.to_numpy(), rtol=1e-9, atol=1e-14)
+
+
+@pytest.mark.parametrize('column', ['DailyReturns', 'Close'])
+def test_refresh_matches_pandas(tmp_path, monkeypatch, column):
+    d_history = ragged_histories()
+    sd = open_library(tmp_path, d_history, '2020-10-30')
+    labels = sorted(d_history)
+    sd.correlation_matrix(labels, column=column, block_size=3)
+
+    # Later calls refresh the saved sums instead of accumulating all rows.
+    def fail(*args, **kwargs):
+        raise AssertionError("The saved sums were accumulated again.")
+    monkeypatch.setattr('stocks.stock_data.panel_moments', fail)
+
+    # Each update revises the last stored day before appending new days.
+    for today in ['2020-11-04', '2020-11-05', '2020-11-20', '2021-01-15']:
+        last = sd.catalog.last_dates()
+        for label, df in d_history.items():
+            d_history[label].loc[df.index.strftime('%Y-%m-%d') == last[label], 'Close'] *= 1.01
+        sd.fetcher.today = pd.Timestamp(today, tz='America/New_York')
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            sd.update(labels)
+        result = sd.correlation_matrix(labels, column=column, block_size=3)
+        expected = expected_matrix(sd, labels, column, 'correlation')
+        np.testing.assert_allclose(result.to_numpy(), expected.to_numpy(), rtol=1e-9, atol=1e-12,
+                                   err_msg=today)
+
+
+def test_stock_added_again_with_same_dates(tmp_path):
+    d_history = ragged_histories()
+    sd = open_library(tmp_path, d_history, '2021-06-30')
+    labels = sorted(d_history)
+    before = sd.correlation_matrix(labels, column='Close')
+
+    # Re-adjusted prices on the same dates change the checksum only.
+    d_history['ddd'] = d_history['ddd'].assign(Close=d_history['ddd']['Close'][::-1].to_numpy())
+    sd.remove('ddd')
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        assert sd.add('ddd') == {}
+    result = sd.correlation_matrix(labels, column='Close')
+    expected = expected_matrix(sd, labels, 'Close', 'correlation')
+    assert not np.allclose(before.to_numpy(), result.to_numpy())
+    np.testing.assert_allclose(result.to_numpy(), expected.to_numpy(), rtol=1e-9, atol=1e-12)
+
+
+def test_unknown_stock(tmp_path):
+    sd = open_library(tmp_path, ragged_histories(), '2021-06-30')
+    with pytest.raises(ValueError, match="'ZZZ'"):
+        sd.correlation_matrix(['aaa', 'zzz'])
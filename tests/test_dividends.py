@@ -0,0 +1,87 @@
+"""
+# ============================================================================
+# TEST_DIVIDENDS.PY
+# ----------------------------------------------------------------------------
+# Checks the dividend summary and trailing yield computed from the dividend
+# events in the library catalog against the values computed from the daily
+# data of each stock, after an import and an update.
+#
+# ============================================================================
+"""
+
+# Imports.
+import warnings
+import numpy as np
+import pandas as pd
+import pytest
+
+from stocks import StockData
+from stocks.analysis.returns import dividend_summary
+from helpers import history_fetcher, price_history
+
+
+@pytest.fixture(scope='module')
+def library(tmp_path_factory):
+    """
+    A library of stocks with dividends up to the current year, one of
+    which ended earlier and one without dividends, imported up to a day
+    and then updated to the end of the histories.
+    """
+    d_history = {
+        'aaa': price_history(2600, seed=1, start='2016-07-01'),
+        'bbb': price_history(1500, seed=2, start='2020-11-02'),
+        'ccc': price_history(1200, seed=3, start='2015-01-02'),
+        'ddd': price_history(900, seed=4, start='2023-03-01').assign(Dividends=0.0)
+    }
+    today = pd.Timestamp('2025-06-30', tz='America/New_York')
+    sd = StockData(str(tmp_path_factory.mktemp('library')), fetcher=history_fetcher(d_history, today))
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        assert sd.add(sorted(d_history)) == {}
+        sd.fetcher.today = max(df.index[-1] for df in d_history.values())
+        assert sd.update() == {}
+    sd.load()
+    return sd
+
+
+def expected_trailing(df, end, years):
+    """
+    Returns the trailing dividends of a stock from its daily data.
+    """
+    dates = df['Date'].dt.strftime('%Y-%m-%d')
+    start = (pd.Timestamp(end) - pd.DateOffset(years=years)).strftime('%Y-%m-%d')
+    paid = (dates > start) & (dates <= end) & (df['Dividends'] > 0)
+    return {'TrailingDividends': df.loc[paid, 'Dividends'].sum(),
+            'TrailingYield': df.loc[paid, 'FracDividends'].sum(),
+            'Payments': int(paid.sum())}
+
+
+@pytest.mark.parametrize('div_type', ['FracDividends', 'Dividends'])
+def test_summary_matches_daily_data(library, div_type):
+    labels = sorted(library.d_data)
+    result = library.dividend_summary(labels, div_type=div_type).set_index('Symbol')
+    assert list(result.index) == [l.upper() for l in labels]
+    for label in labels:
+        expected = dividend_summary(library.d_data[label], label, div_type)
+        row = result.loc[expected.pop('Symbol')]
+        assert set(row.index) == set(expected)
+        for name, value in expected.items():
+            np.testing.assert_allclose(row[name], value, rtol=1e-12, err_msg=f"{label} {name}")
+
+
+@pytest.mark.parametrize('date, years', [(None, 1), (None, 3), ('2024-03-15', 1), ('2021-12-31', 2)])
+def test_trailing_yield_matches_daily_data(library, date, years):
+    labels = sorted(library.d_data)
+    last_dates = library.catalog.last_dates()
+    result = library.trailing_yield(labels, date=date, years=years).set_index('Symbol')
+    assert list(result.index) == [l.upper() for l in labels]
+    for label in labels:
+        expected = expected_trailing(library.d_data[label], date or last_dates[label], years)
+        for name, value in expected.items():
+            np.testing.assert_allclose(result.loc[label.upper(), name], value, rtol=1e-12,
+                                       err_msg=f"{label} {name}")
+
+
+def test_trailing_yield_of_unknown_stock(library):
+    with pytest.raises(ValueError, match="'ZZZ'"):
+        library.trailing_yield(['aaa', 'zzz'])
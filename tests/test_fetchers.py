@@ -0,0 +1,113 @@
+"""
+# ============================================================================
+# TEST_FETCHERS.PY
+# ----------------------------------------------------------------------------
+# Checks the retries of Fetcher with exponential backoff, the errors
+# collected per symbol by fetch_many() when a download keeps failing, and
+# the spacing of requests by RateLimiter, with a source that fails a
+# number of times before it answers.
+#
+# ============================================================================
+"""
+
+# Imports.
+import time
+import threading
+import numpy as np
+import pytest
+
+from stocks.fetching import fetchers
+from stocks.fetching.fetchers import Fetcher, RateLimiter, fetch_many
+from helpers import price_history
+
+
+class FlakyFetcher(Fetcher):
+    """
+    Fails the first requests of each symbol, and every request of the
+    symbols in 'broken', then returns a fixed history.
+    """
+    def __init__(self, failures=0, broken=(), **kwargs):
+        """
+        Constructor.
+        """
+        super().__init__(**kwargs)
+        self.failures = failures
+        self.broken = set(broken)
+        self.calls = {}
+        self.times = []
+        self.lock = threading.Lock()
+
+
+    def history(self, symbol, start=None):
+        with self.lock:
+            self.calls[symbol] = self.calls.get(symbol, 0) + 1
+            self.times.append(time.monotonic())
+            attempt = self.calls[symbol]
+        if symbol in self.broken or attempt <= self.failures:
+            raise ConnectionError(f"Request {attempt} of '{symbol}' failed.")
+        return price_history(10, seed=len(symbol))
+
+
+@pytest.fixture
+def waits(monkeypatch):
+    """
+    The backoff waits of the fetchers, recorded instead of slept.
+    """
+    waits = []
+    monkeypatch.setattr(fetchers.time, 'sleep', waits.append)
+    return waits
+
+
+def test_retries_with_backoff(waits):
+    fetcher = FlakyFetcher(failures=2, retries=3, backoff=0.5)
+    df = fetcher.fetch('abc')
+    assert len(df) == 10
+    assert fetcher.calls == {'abc': 3}
+    assert waits == [0.5, 1.0]
+
+
+def test_last_error_is_raised(waits):
+    fetcher = FlakyFetcher(failures=5, retries=3, backoff=0.5)
+    with pytest.raises(ConnectionError, match="Request 4"):
+        fetcher.fetch('abc')
+    assert fetcher.calls == {'abc': 4}
+    assert waits == [0.5, 1.0, 2.0]
+
+
+@pytest.mark.parametrize('batch_size', [None, 2])
+def test_failing_symbol_does_not_abort_batch(waits, batch_size):
+    symbols = ['aaa', 'bbb', 'ccc', 'ddd', 'eee']
+    fetcher = FlakyFetcher(failures=1, broken=['ccc'], retries=2, backoff=0.25)
+    results = list(fetch_many(fetcher, [(s, None) for s in symbols], max_workers=3,
+                              batch_size=batch_size))
+    assert sorted(r[0] for r in results) == symbols
+    errors = {symbol: error for symbol, _, error in results if error}
+    if isinstance(batch_size, type(None)):
+        assert list(errors) == ['ccc']
+        assert isinstance(errors['ccc'], ConnectionError)
+        assert fetcher.calls == {'aaa': 2, 'bbb': 2, 'ccc': 3, 'ddd': 2, 'eee': 2}
+        assert sorted(waits) == [0.25] * 5 + [0.5]
+    else:
+        # A failed multi-symbol request fails every symbol of its batch.
+        assert sorted(errors) == ['ccc', 'ddd']
+    for symbol, df, error in results:
+        if symbol not in errors:
+            assert error is None and len(df) == 10
+
+
+def test_rate_limiter_spaces_calls():
+    limiter = RateLimiter(20.0)
+    times = []
+    for _ in range(6):
+        limiter.wait()
+        times.append(time.monotonic())
+    assert np.diff(times).min() >= 0.05 * 0.95
+
+
+def test_rate_limit_across_threads():
+    fetcher = FlakyFetcher(rate_limit=20.0)
+    symbols = ['aaa', 'bbb', 'ccc', 'ddd', 'eee', 'fff']
+    results = list(fetch_many(fetcher, [(s, None) for s in symbols], max_workers=3))
+    assert all(error is None for _, _, error in results)
+    assert np.diff(sorted(fetcher.times)).min() >= 0.05 * 0.95
+    assert fetcher.times[-1] - fetcher.times[0] >= 5 * 0.05 * 0.95
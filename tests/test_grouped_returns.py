@@ -0,0 +1,99 @@
+"""
+# ============================================================================
+# TEST_GROUPED_RETURNS.PY
+# ----------------------------------------------------------------------------
+# Checks the grouped returns against the former merge-on-date
+# implementation, and that the index and row order of the table are kept,
+# for single and multi-symbol tables.
+#
+# ============================================================================
+"""
+
+# Imports.
+import numpy as np
+import pandas as pd
+import pytest
+
+from stocks.analysis.returns import calculate_grouped_returns
+from stocks.utils.utils import add_year_month_quarter
+from helpers import price_history
+
+
+GROUPINGS = [('MonthlyReturns', ['year', 'month']),
+             ('QuarterlyReturns', ['Q']),
+             ('AnnualReturns', ['year'])]
+
+
+def merge_returns(df_input, new_col_name, price_col, group_cols):
+    """
+    The former calculate_grouped_returns(): first and last price per group,
+    merged back onto the table by the last date of the group.
+    """
+    df = df_input.copy()
+    df_grouped = df.groupby(group_cols).agg({price_col: ['first', 'last'],
+                                             'Date': 'last'})
+    df_grouped.columns = ['price_first', 'price_last', 'date_last']
+    df_grouped = df_grouped.reset_index(drop=True)
+    df_grouped[new_col_name] = (df_grouped['price_last'] -
+                                df_grouped['price_first'])/df_grouped['price_first']
+    df = df.rename(columns={'Date': 'DateCol'})
+    df = df.merge(df_grouped[[new_col_name, 'date_last']], how='left',
+                  left_on='DateCol', right_on='date_last')
+    df = df.rename(columns={'DateCol': 'Date'})
+    return df.drop('date_last', axis=1)
+
+
+def stock_table(rows, seed):
+    """
+    Returns a stock table with the 'Date', 'year', 'month' and 'Q' columns
+    and a few missing prices, including on the last day of a month.
+    """
+    df = price_history(rows, seed=seed, start='2019-11-04')[['Close']]
+    df['Date'] = df.index
+    df = add_year_month_quarter(df).reset_index(drop=True)
+    df.loc[[3, 40, len(df) - 1], 'Close'] = np.nan
+    return df
+
+
+@pytest.mark.parametrize('new_col_name, group_cols', GROUPINGS)
+def test_matches_merge_on_date(new_col_name, group_cols):
+    df = stock_table(600, seed=1)
+    df.index = df.index + 1000
+    result = calculate_grouped_returns(df, new_col_name, 'Close', group_cols)
+    expected = merge_returns(df, new_col_name, 'Close', group_cols)
+
+    pd.testing.assert_index_equal(result.index, df.index)
+    np.testing.assert_allclose(result[new_col_name].to_numpy(),
+                               expected[new_col_name].to_numpy(), rtol=1e-12)
+
+
+@pytest.mark.parametrize('new_col_name, group_cols', GROUPINGS)
+def test_keeps_row_order_of_unsorted_table(new_col_name, group_cols):
+    df = stock_table(400, seed=2)
+    shuffled = df.sample(frac=1.0, random_state=0)
+    result = calculate_grouped_returns(shuffled, new_col_name, 'Close', group_cols)
+    expected = merge_returns(df, new_col_name, 'Close', group_cols)
+
+    pd.testing.assert_index_equal(result.index, shuffled.index)
+    np.testing.assert_allclose(result[new_col_name].to_numpy(),
+                               expected[new_col_name].to_numpy()[shuffled.index], rtol=1e-12)
+
+
+@pytest.mark.parametrize('interleave', [False, True])
+@pytest.mark.parametrize('new_col_name, group_cols', GROUPINGS)
+def test_multi_symbol_table(new_col_name, group_cols, interleave):
+    # Symbols with overlapping dates, stacked or interleaved by date.
+    d_tables = {symbol: stock_table(rows, seed=seed).assign(Symbol=symbol)
+                for symbol, rows, seed in [('AAA', 500, 3), ('BBB', 300, 4), ('CCC', 450, 5)]}
+    df = pd.concat(d_tables.values(), ignore_index=True)
+    if interleave:
+        df = df.sort_values(['Date', 'Symbol'], kind='stable')
+    result = calculate_grouped_returns(df, new_col_name, 'Close', group_cols)
+
+    pd.testing.assert_index_equal(result.index, df.index)
+    pd.testing.assert_frame_equal(result.drop(columns=new_col_name), df)
+    for symbol, table in d_tables.items():
+        expected = merge_returns(table.drop(columns='Symbol'), new_col_name, 'Close', group_cols)
+        rows = result.loc[result['Symbol'] == symbol].sort_values('Date')
+        np.testing.assert_allclose(rows[new_col_name].to_numpy(),
+                                   expected[new_col_name].to_numpy(), rtol=1e-12)
@@ -0,0 +1,40 @@
+"""
+# ============================================================================
+# TEST_IMPORT_TIME.PY
+# ----------------------------------------------------------------------------
+# Checks that importing the package stays cheap: the data download,
+# charting and notebook packages are only imported when first used.
+#
+# ============================================================================
+"""
+
+# Imports.
+import os
+import sys
+import json
+import subprocess
+
+# Packages that must not be imported by 'import stocks'.
+DEFERRED_MODULES = ['yfinance', 'altair', 'IPython']
+
+# Wall time allowed for the import, in seconds.
+IMPORT_BUDGET = 2.0
+
+SCRIPT = """
+import sys, time, json
+start = time.perf_counter()
+import stocks
+seconds = time.perf_counter() - start
+print(json.dumps({'seconds': seconds,
+                  'loaded': [m for m in %r if m in sys.modules]}))
+"""
+
+
+def test_import_defers_heavy_modules(tmp_path, package_folder):
+    env = dict(os.environ, PYTHONPATH=package_folder)
+    result = subprocess.run([sys.executable, '-c', SCRIPT % DEFERRED_MODULES],
+                            capture_output=True, text=True, env=env, cwd=str(tmp_path),
+                            check=True)
+    report = json.loads(result.stdout.strip().splitlines()[-1])
+    assert report['loaded'] == []
+    assert report['seconds'] < IMPORT_BUDGET
@@ -0,0 +1,129 @@
+"""
+# ============================================================================
+# TEST_INDICATOR_CACHE.PY
+# ----------------------------------------------------------------------------
+# Checks the disk cache of indicator columns: entries read back as
+# written, keys of changed data that miss, entries of a symbol removed
+# together, the least recently used entries evicted first under the size
+# budget, and a library that reuses cached columns until a stock is
+# updated.
+#
+# ============================================================================
+"""
+
+# Imports.
+import os
+import time
+import warnings
+import numpy as np
+import pandas as pd
+
+from stocks import StockData
+from stocks.storage.cache import IndicatorCache, EVICT_TARGET
+from stocks.analysis import rolling
+from helpers import history_fetcher, price_history
+
+
+def columns(seed):
+    """
+    Returns a table of indicator columns.
+    """
+    return pd.DataFrame(np.random.default_rng(seed).normal(size=(200, 2)),
+                        columns=['STD_5', 'STD_20'])
+
+
+def key(symbol, version='v1', params=(5, 20)):
+    """
+    Returns a cache key of the 'std' indicator on the 'Close' column.
+    """
+    return (symbol, 'Close', 'std', params, version)
+
+
+def test_hit_and_miss(tmp_path):
+    cache = IndicatorCache(str(tmp_path / 'cache'))
+    assert cache.get(key('aaa')) is None
+    cache.put(key('aaa'), columns(1))
+    cache.put(key('bbb'), columns(2))
+    pd.testing.assert_frame_equal(cache.get(key('aaa')), columns(1))
+    # Other data versions and parameters miss.
+    assert cache.get(key('aaa', version='v2')) is None
+    assert cache.get(key('aaa', params=(5,))) is None
+
+    cache.invalidate('aaa')
+    assert cache.get(key('aaa')) is None
+    pd.testing.assert_frame_equal(cache.get(key('bbb')), columns(2))
+    assert cache.total == sum(size for _, size, _ in cache.scan())
+
+
+def test_least_recently_used_are_evicted_first(tmp_path):
+    cache = IndicatorCache(str(tmp_path / 'cache'))
+    cache.put(key('aaa'), columns(0))
+    size = os.path.getsize(cache.entry_file(key('aaa')))
+    cache.invalidate('aaa')
+
+    # Room for four entries, reduced to three once a fifth is written.
+    cache.max_size = int(4.2 * size)
+    assert int(3 * size) <= cache.max_size * EVICT_TARGET < 4 * size
+    symbols = ['aaa', 'bbb', 'ccc', 'ddd']
+    now = time.time()
+    for i, symbol in enumerate(symbols):
+        cache.put(key(symbol), columns(i))
+        # Written a minute apart, 'aaa' first.
+        os.utime(cache.entry_file(key(symbol)), (now - 600 + 60*i, now - 600 + 60*i))
+    # Reading 'aaa' makes 'bbb' the least recently used.
+    assert cache.get(key('aaa')) is not None
+
+    cache.put(key('eee'), columns(4))
+    cached = [s for s in symbols + ['eee'] if cache.get(key(s)) is not None]
+    assert cached == ['aaa', 'ddd', 'eee']
+    assert cache.total <= cache.max_size * EVICT_TARGET
+
+    # A second eviction removes the next least recently used one.
+    for i, symbol in enumerate(['aaa', 'ddd', 'eee']):
+        os.utime(cache.entry_file(key(symbol)), (now - 300 + 60*i, now - 300 + 60*i))
+    cache.put(key('fff'), columns(5))
+    cache.put(key('ggg'), columns(6))
+    assert [s for s in ['aaa', 'ddd', 'eee', 'fff', 'ggg']
+            if cache.get(key(s)) is not None] == ['eee', 'fff', 'ggg']
+
+
+def test_library_recomputes_updated_stocks_only(tmp_path, monkeypatch):
+    d_history = {'aaa': price_history(300, seed=1), 'bbb': price_history(300, seed=2)}
+    fetcher = history_fetcher(d_history, d_history['aaa'].index[250])
+    sd = StockData(str(tmp_path), fetcher=fetcher)
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        assert sd.add(['aaa', 'bbb']) == {}
+
+    # Counts the tables the indicator is computed on.
+    computed = []
+    rolling_std = rolling.rolling_std
+    def counted_std(df, *args, **kwargs):
+        computed.append(len(df))
+        return rolling_std(df, *args, **kwargs)
+    monkeypatch.setattr('stocks.stock_data.rolling_std', counted_std)
+
+    def indicator_columns():
+        sd.load()
+        sd.add_rolling_indicator(indicator='std', windows=[5, 20])
+        return {label: sd.d_data[label][['STD_5', 'STD_20']] for label in ['aaa', 'bbb']}
+
+    first = indicator_columns()
+    assert computed == [251, 251]
+    # Hit: reloaded data of the same version.
+    second = indicator_columns()
+    assert computed == [251, 251]
+    for label in first:
+        pd.testing.assert_frame_equal(second[label], first[label])
+
+    # Miss: the update changes the checksum and length of 'aaa' only.
+    fetcher.today = d_history['aaa'].index[-1]
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        assert sd.update('aaa') == {}
+    third = indicator_columns()
+    assert computed == [251, 251, 300]
+    pd.testing.assert_frame_equal(third['bbb'], first['bbb'])
+    expected = sd.d_data['aaa']['Close'].rolling(20).std()
+    np.testing.assert_allclose(third['aaa']['STD_20'].to_numpy(), expected.to_numpy(),
+                               rtol=1e-9)
@@ -0,0 +1,130 @@
+"""
+# ============================================================================
+# TEST_LAZY_FRAMES.PY
+# ----------------------------------------------------------------------------
+# Checks the lazily loaded stock data tables: least recently used tables
+# evicted under the memory budget, changed tables spilled to a temporary
+# folder in '.cache' and read back with their changes, and the spill
+# folder removed when the container is closed or the library loaded
+# again.
+#
+# ============================================================================
+"""
+
+# Imports.
+import os
+import glob
+import warnings
+import numpy as np
+import pandas as pd
+
+from stocks import StockData
+from stocks.storage.lazy import LazyFrames
+from helpers import history_fetcher, price_history
+
+
+LABELS = ['aaa', 'bbb', 'ccc', 'ddd']
+
+
+def lazy_frames(tmp_path, tables=3):
+    """
+    Returns a container with room for the given number of tables, and the
+    symbols loaded by it in order.
+    """
+    d_data = {label: price_history(500, seed=i).reset_index() for i, label in enumerate(LABELS)}
+    size = int(d_data['aaa'].memory_usage(deep=True).sum())
+    loaded = []
+    def loader(label):
+        loaded.append(label)
+        return d_data[label]
+    frames = LazyFrames(loader, LABELS, memory_budget=int((tables + 0.5) * size),
+                        spill_folder=str(tmp_path / '.cache'))
+    return frames, d_data, loaded
+
+
+def spill_folders(tmp_path):
+    """
+    Returns the spill folders in the '.cache' folder.
+    """
+    return glob.glob(str(tmp_path / '.cache' / 'spill-*'))
+
+
+def test_least_recently_used_are_evicted(tmp_path):
+    frames, d_data, loaded = lazy_frames(tmp_path)
+    for label in ['aaa', 'bbb', 'ccc']:
+        frames[label]
+    # Using 'aaa' makes 'bbb' the least recently used.
+    frames['aaa']
+    assert loaded == ['aaa', 'bbb', 'ccc']
+    frames['ddd']
+    assert frames.in_memory() == ['ccc', 'aaa', 'ddd']
+    assert frames.memory_usage() <= frames.memory_budget
+
+    # An evicted table that was not changed is loaded again.
+    pd.testing.assert_frame_equal(frames['bbb'], d_data['bbb'])
+    assert loaded == ['aaa', 'bbb', 'ccc', 'ddd', 'bbb']
+    assert frames.in_memory() == ['aaa', 'ddd', 'bbb']
+    # Nothing was changed, so nothing was spilled.
+    assert spill_folders(tmp_path) == []
+
+
+def test_changed_tables_are_spilled_and_read_back(tmp_path):
+    frames, d_data, loaded = lazy_frames(tmp_path, tables=1)
+    changed = frames['aaa'].assign(Extra=np.arange(500.0))
+    frames['aaa'] = changed
+    frames['bbb']
+    assert frames.in_memory() == ['bbb']
+
+    # The changed table is in the spill folder of the container.
+    folders = spill_folders(tmp_path)
+    assert len(folders) == 1
+    assert os.listdir(folders[0]) == ['aaa.pkl']
+    assert frames.spilled == {'aaa'}
+
+    # Read back with its changes instead of being loaded again.
+    pd.testing.assert_frame_equal(frames['aaa'], changed)
+    assert loaded == ['aaa', 'bbb']
+    assert os.listdir(folders[0]) == []
+    assert frames.spilled == set()
+
+    # Spilled again once evicted, as it is still changed.
+    frames['ccc']
+    assert os.listdir(folders[0]) == ['aaa.pkl']
+    pd.testing.assert_frame_equal(frames['aaa'], changed)
+
+
+def test_close_removes_spill_folder(tmp_path):
+    frames, d_data, loaded = lazy_frames(tmp_path, tables=1)
+    frames['aaa'] = frames['aaa'].assign(Extra=0.0)
+    frames['bbb']
+    assert len(spill_folders(tmp_path)) == 1
+
+    frames.close()
+    assert spill_folders(tmp_path) == []
+    # The changes are lost and the stored table is loaded again.
+    pd.testing.assert_frame_equal(frames['aaa'], d_data['aaa'])
+    assert loaded == ['aaa', 'bbb', 'aaa']
+
+
+def test_library_load_removes_previous_spill_folder(tmp_path):
+    d_history = {label: price_history(400, seed=i) for i, label in enumerate(LABELS)}
+    sd = StockData(str(tmp_path), fetcher=history_fetcher(d_history, '2030-01-01'))
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        assert sd.add(LABELS) == {}
+    sd.load()
+    size = int(sd.d_data['aaa'].memory_usage(deep=True).sum())
+
+    sd.load(memory_budget=int(2.5 * size))
+    extras = {}
+    for label in LABELS:
+        sd.d_data[label] = sd.d_data[label].assign(Extra=sd.d_data[label]['Close'] * 2.0)
+        extras[label] = sd.d_data[label]['Extra']
+    assert sd.d_data.spilled == {'aaa', 'bbb'}
+    assert len(spill_folders(tmp_path)) == 1
+    for label in LABELS:
+        pd.testing.assert_series_equal(sd.d_data[label]['Extra'], extras[label])
+
+    sd.load()
+    assert spill_folders(tmp_path) == []
+    assert 'Extra' not in sd.d_data['aaa'].columns
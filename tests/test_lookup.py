@@ -0,0 +1,128 @@
+"""
+# ============================================================================
+# TEST_LOOKUP.PY
+# ----------------------------------------------------------------------------
+# Checks the as-of price lookups of PriceIndex against a scan of the stock
+# data tables: dates before the first row, on non-trading days and after
+# the last row, latest values, and dates given in another timezone or
+# with a time of day.
+#
+# ============================================================================
+"""
+
+# Imports.
+import numpy as np
+import pandas as pd
+import pytest
+
+from stocks.storage.lookup import PriceIndex
+from helpers import price_history
+
+
+def stock_tables(tz):
+    """
+    Returns stock data tables with different first and last dates, and
+    holidays on which some stocks did not trade.
+    """
+    d_data = {}
+    for label, rows, seed, start, holidays in [
+            ('aaa', 400, 1, '2020-01-02', ['2020-01-20', '2020-07-03']),
+            ('bbb', 250, 2, '2020-03-02', ['2020-07-03']),
+            ('ccc', 120, 3, '2020-01-02', [])]:
+        df = price_history(rows, seed=seed, start=start, tz=tz)
+        df = df.loc[~df.index.strftime('%Y-%m-%d').isin(holidays)]
+        d_data[label] = df.reset_index()
+    return d_data
+
+
+def expected_values(d_data, labels, dates, fields):
+    """
+    Returns the value of each lookup from a scan of the table: the last
+    row on a calendar day on or before the date, in the stored timezone.
+    """
+    values = []
+    for label, date, field in zip(labels, dates, fields):
+        df = d_data[label.lower()]
+        tz = df['Date'].dt.tz
+        days = df['Date'].dt.tz_localize(None).dt.normalize()
+        if date is None:
+            values.append(df[field].iloc[-1])
+            continue
+        query = pd.Timestamp(date)
+        if query.tz is not None:
+            query = query.tz_convert(tz).tz_localize(None)
+        rows = np.flatnonzero(days <= query.normalize())
+        values.append(df[field].iloc[rows[-1]] if len(rows) else np.nan)
+    return np.array(values)
+
+
+QUERIES = [
+    # Before the first row of every stock, and of 'bbb' only.
+    ('aaa', '2019-12-31', 'Close'),
+    ('bbb', '2020-02-28', 'Close'),
+    ('bbb', '2020-01-02', 'Open'),
+    # Trading days, weekends and holidays.
+    ('aaa', '2020-01-02', 'Close'),
+    ('aaa', '2020-01-18', 'High'),
+    ('aaa', '2020-01-20', 'Close'),
+    ('bbb', '2020-07-03', 'Low'),
+    ('bbb', '2020-07-05', 'Close'),
+    ('ccc', '2020-07-03', 'Close'),
+    # After the last row of 'ccc', and the latest values.
+    ('ccc', '2021-05-03', 'Open'),
+    ('aaa', None, 'Close'),
+    ('CCC', None, 'Volume'),
+    # Times of day and other timezones.
+    ('aaa', pd.Timestamp('2020-03-06 23:59'), 'Close'),
+    ('aaa', pd.Timestamp('2020-03-09 03:00', tz='UTC'), 'Close'),
+    ('bbb', pd.Timestamp('2020-03-02 12:00', tz='Asia/Tokyo'), 'Close'),
+    ('bbb', pd.Timestamp('2020-07-06 01:00', tz='Europe/London'), 'Open'),
+]
+
+
+@pytest.mark.parametrize('tz', ['America/New_York', 'Asia/Tokyo', None])
+def test_lookup_matches_scan(tz):
+    d_data = stock_tables(tz)
+    queries = [q for q in QUERIES if tz is not None or not isinstance(q[1], pd.Timestamp)
+               or q[1].tz is None]
+    labels, dates, fields = [list(a) for a in zip(*queries)]
+    index = PriceIndex(lambda label: d_data[label])
+    result = index.lookup(labels, dates, fields)
+    expected = expected_values(d_data, labels, dates, fields)
+    np.testing.assert_array_equal(result, expected)
+    assert np.isnan(result[:3]).all()
+
+
+def test_lookup_of_many_dates_matches_scan():
+    d_data = stock_tables('America/New_York')
+    rng = np.random.default_rng(0)
+    days = pd.date_range('2019-12-01', '2021-09-30', freq='D')
+    labels = list(rng.choice(['aaa', 'bbb', 'ccc'], 2000))
+    dates = list(rng.choice(days.strftime('%Y-%m-%d'), 2000))
+    fields = list(rng.choice(['Open', 'Close'], 2000))
+    index = PriceIndex(lambda label: d_data[label])
+    np.testing.assert_array_equal(index.lookup(labels, dates, fields),
+                                  expected_values(d_data, labels, dates, fields))
+
+
+def test_locate_and_single_values():
+    d_data = stock_tables('America/New_York')
+    index = PriceIndex(lambda label: d_data[label])
+    assert index.locate('bbb', ['2020-02-28', '2020-03-02', '2020-03-01'])[0] == -1
+    np.testing.assert_array_equal(index.locate('aaa', ['2020-01-20', '2020-01-21']), [11, 12])
+    np.testing.assert_array_equal(index.locate('aaa'), [len(d_data['aaa']) - 1])
+    assert index.lookup('ccc', '2020-01-03', 'Close')[0] == d_data['ccc']['Close'].iloc[1]
+
+
+def test_replaced_table_is_indexed_again():
+    d_data = stock_tables('America/New_York')
+    index = PriceIndex(lambda label: d_data[label])
+    assert index.lookup('aaa', '2020-02-03')[0] == d_data['aaa']['Close'].iloc[21]
+    d_data['aaa'] = d_data['bbb']
+    assert np.isnan(index.lookup('aaa', '2020-02-03')[0])
+
+
+def test_lists_of_different_lengths():
+    index = PriceIndex(lambda label: stock_tables('America/New_York')[label])
+    with pytest.raises(ValueError):
+        index.lookup(['aaa', 'bbb'], ['2020-03-02'], 'Close')
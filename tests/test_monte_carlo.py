@@ -0,0 +1,94 @@
+"""
+# ============================================================================
+# TEST_MONTE_CARLO.PY
+# ----------------------------------------------------------------------------
+# Checks that the Monte Carlo forecasts are reproducible for a seed,
+# whatever the number of processes, the chunk size and the memory budget,
+# that other seeds give other paths, and that the percentile bands of
+# both methods are ordered and start from the last price.
+#
+# ============================================================================
+"""
+
+# Imports.
+import numpy as np
+import pandas as pd
+import pytest
+
+from stocks.analysis.monte_carlo import forecast_bands, forecast_many, MONTE_CARLO_METHODS
+from helpers import price_history
+
+
+def daily_returns(seed):
+    """
+    Returns the daily returns of a price history.
+    """
+    return price_history(500, seed=seed)['Close'].pct_change().to_numpy()
+
+
+def inputs():
+    """
+    Returns the daily returns and (last date, last price) of two stocks.
+    """
+    d_returns = {'aaa': daily_returns(1), 'bbb': daily_returns(2)}
+    d_last = {'aaa': (pd.Timestamp('2021-12-31', tz='America/New_York'), 120.0),
+              'bbb': (pd.Timestamp('2021-12-31', tz='America/New_York'), 35.5)}
+    return d_returns, d_last
+
+
+@pytest.mark.parametrize('method', MONTE_CARLO_METHODS)
+def test_same_seed_same_result(method):
+    d_returns, d_last = inputs()
+    expected = forecast_many(d_returns, d_last, horizon=30, n_paths=2500, method=method,
+                             seed=7, max_workers=1)
+    for max_workers, kwargs in [(2, {}), (1, {'chunk_size': 1000}), (1, {'chunk_size': 700}),
+                                (1, {'memory_budget': 8 * 2500 * 4}),
+                                (2, {'chunk_size': 2000, 'memory_budget': 8 * 2500 * 7})]:
+        result = forecast_many(d_returns, d_last, horizon=30, n_paths=2500, method=method,
+                               seed=7, max_workers=max_workers, **kwargs)
+        for label, df in expected.items():
+            pd.testing.assert_frame_equal(result[label], df, obj=f"{label} {kwargs}")
+
+
+@pytest.mark.parametrize('method', MONTE_CARLO_METHODS)
+def test_other_seed_other_result(method):
+    returns = daily_returns(1)
+    first = forecast_bands(returns, 100.0, horizon=20, n_paths=500, method=method, seed=1)
+    second = forecast_bands(returns, 100.0, horizon=20, n_paths=500, method=method, seed=2)
+    assert not np.allclose(first['P50'], second['P50'])
+    # The symbols of a batch get different seeds too.
+    d_returns, d_last = inputs()
+    d_returns['bbb'], d_last['bbb'] = d_returns['aaa'], d_last['aaa']
+    result = forecast_many(d_returns, d_last, horizon=20, n_paths=500, method=method,
+                           seed=1, max_workers=1)
+    assert not np.allclose(result['aaa']['P50'], result['bbb']['P50'])
+
+
+@pytest.mark.parametrize('method', MONTE_CARLO_METHODS)
+def test_bands_are_ordered_and_start_at_last_price(method):
+    returns = daily_returns(3)
+    df = forecast_bands(returns, 50.0, horizon=60, n_paths=4000, method=method, seed=0,
+                        percentiles=[5, 25, 50, 75, 95],
+                        last_date=pd.Timestamp('2021-12-31', tz='America/New_York'))
+    assert list(df['Step']) == list(range(1, 61))
+    assert df['Date'].iloc[0] == pd.Timestamp('2022-01-03', tz='America/New_York')
+    bands = df[['P5', 'P25', 'P50', 'P75', 'P95']].to_numpy()
+    assert (np.diff(bands, axis=1) > 0).all()
+    # The bands widen from the last price.
+    width = bands[:, -1] - bands[:, 0]
+    assert (np.diff(width[::10]) > 0).all()
+    log_returns = np.log1p(returns[~np.isnan(returns)])
+    first_day = np.log(bands[0] / 50.0)
+    if method == 'bootstrap':
+        assert log_returns.min() <= first_day.min() and first_day.max() <= log_returns.max()
+    np.testing.assert_allclose(first_day, np.percentile(log_returns, [5, 25, 50, 75, 95]),
+                               atol=0.15 * log_returns.std())
+
+
+@pytest.mark.parametrize('method', MONTE_CARLO_METHODS)
+def test_constant_returns_compound_from_last_price(method):
+    returns = np.full(100, 0.01)
+    df = forecast_bands(returns, 10.0, horizon=15, n_paths=300, method=method, seed=0)
+    expected = 10.0 * 1.01 ** np.arange(1, 16)
+    for col in ['Mean', 'P5', 'P50', 'P95']:
+        np.testing.assert_allclose(df[col], expected, rtol=1e-12)
@@ -0,0 +1,92 @@
+"""
+# ============================================================================
+# TEST_ONLINE_INDICATORS.PY
+# ----------------------------------------------------------------------------
+# Checks the online SMA, EMA and MACD against pandas' rolling().mean() and
+# ewm().mean(), value by value and after batches of updates that revise
+# the last fed row.
+#
+# ============================================================================
+"""
+
+# Imports.
+import numpy as np
+import pandas as pd
+import pytest
+
+from stocks.analysis.macd import macd
+from stocks.analysis.online import OnlineEMA, OnlineSMA, OnlineMACD, IndicatorState
+from helpers import price_history
+
+
+def prices(rows=300, seed=0):
+    """
+    Returns a price series with a few missing values.
+    """
+    close = price_history(rows, seed=seed)['Close']
+    close.iloc[[5, 6, 120]] = np.nan
+    return close
+
+
+@pytest.mark.parametrize('adjust', [True, False])
+@pytest.mark.parametrize('span', [1, 9, 26])
+def test_ema_matches_pandas(span, adjust):
+    close = prices()
+    ema = OnlineEMA(span, adjust=adjust)
+    values = [ema.update(v) for v in close]
+    expected = close.ewm(span=span, adjust=adjust).mean().to_numpy()
+    np.testing.assert_allclose(values, expected, rtol=1e-12)
+
+
+@pytest.mark.parametrize('window', [1, 5, 50])
+def test_sma_matches_pandas(window):
+    close = prices()
+    sma = OnlineSMA(window)
+    values = [sma.update(v) for v in close]
+    expected = close.rolling(window).mean().to_numpy()
+    np.testing.assert_allclose(values, expected, rtol=1e-12)
+
+
+def test_macd_matches_pandas():
+    close = prices()
+    online = OnlineMACD()
+    values = pd.DataFrame([online.update(v) for v in close])
+    expected = macd(pd.DataFrame({'Close': close.to_numpy()}), 'Close')
+    for col in values.columns:
+        np.testing.assert_allclose(values[col].to_numpy(), expected[col].to_numpy(), rtol=1e-12)
+
+
+def test_state_with_revised_last_rows_matches_pandas():
+    close = prices(rows=400, seed=1)
+    dates = close.index
+    state = IndicatorState('Close', sma_windows=[5, 20], ema_windows=[12, 50], macd=True)
+
+    # Each update repeats the last fed date with a revised price.
+    final = close.copy()
+    bounds = [0, 200, 201, 260, 261, 262, 330, 400]
+    for a, b in zip(bounds[:-1], bounds[1:]):
+        first = max(a - 1, 0)
+        batch = close.iloc[first:b].copy()
+        if a > 0:
+            batch.iloc[0] *= 1.01
+            final.iloc[first] = batch.iloc[0]
+        state.update(dates[first:b], batch)
+
+    expected = {f"SMA_{w}": final.rolling(w).mean().iloc[-1] for w in [5, 20]}
+    expected.update({f"EMA_{w}": final.ewm(span=w).mean().iloc[-1] for w in [12, 50]})
+    expected.update(macd(pd.DataFrame({'Close': final.to_numpy()}), 'Close').iloc[-1]
+                    [['EMA_12', 'EMA_26', 'MACD', 'DEA', 'OSC']].to_dict())
+    values = state.values()
+    assert state.last_date == dates[-1]
+    assert set(values) == set(expected)
+    for name, value in expected.items():
+        np.testing.assert_allclose(values[name], value, rtol=1e-12, err_msg=name)
+
+
+def test_state_ignores_rows_before_last_date():
+    close = prices(rows=150, seed=2)
+    state = IndicatorState('Close', ema_windows=10)
+    state.update(close.index, close)
+    before = state.values()
+    state.update(close.index[:50], close.iloc[:50] * 2.0)
+    assert state.values() == before
@@ -0,0 +1,106 @@
+"""
+# ============================================================================
+# TEST_PRICE_PANEL.PY
+# ----------------------------------------------------------------------------
+# Builds the memory-mapped price panel of a library with different first
+# and last dates and missing days per stock, and checks the panel, the
+# history of each symbol and the values of all symbols on a date against
+# the stored stock data, after reopening the library.
+#
+# ============================================================================
+"""
+
+# Imports.
+import warnings
+import numpy as np
+import pandas as pd
+import pytest
+
+from stocks import StockData
+from stocks.storage.panel import PANEL_FIELDS
+from helpers import history_fetcher, price_history
+
+
+@pytest.fixture
+def library(tmp_path):
+    """
+    A library of stocks with different first and last dates, and days on
+    which some stocks did not trade.
+    """
+    d_history = {}
+    for j, (label, rows, start) in enumerate([('aaa', 300, '2020-01-02'), ('bbb', 200, '2020-03-02'),
+                                              ('ccc', 150, '2020-01-02')]):
+        df = price_history(rows, seed=j, start=start)
+        d_history[label] = df.loc[np.random.default_rng(j).random(len(df)) > 0.05]
+    sd = StockData(str(tmp_path), fetcher=history_fetcher(d_history, '2030-01-01'))
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        assert sd.add(sorted(d_history)) == {}
+    sd.build_panel()
+    return str(tmp_path)
+
+
+def stored_tables(sd):
+    """
+    Returns the stored table of each stock.
+    """
+    sd.load()
+    return {label: sd.d_data[label] for label in sorted(sd.dir_list)}
+
+
+def test_panel_matches_stored_data(library):
+    sd = StockData(library)
+    panel = sd.open_panel()
+    d_data = stored_tables(sd)
+    assert panel.symbols == sorted(d_data)
+    assert panel.fields == PANEL_FIELDS
+    dates = pd.DatetimeIndex(sorted(set().union(*[df['Date'] for df in d_data.values()])))
+    assert panel.dates.equals(dates)
+
+    for field in PANEL_FIELDS:
+        expected = pd.DataFrame({label: df.set_index('Date')[field] for label, df in d_data.items()})
+        np.testing.assert_array_equal(panel.field(field), expected.reindex(dates).to_numpy())
+        assert isinstance(panel.field(field), np.memmap)
+
+
+def test_symbol_view_and_frame(library):
+    sd = StockData(library)
+    panel = sd.open_panel()
+    for label, df in stored_tables(sd).items():
+        # From the first to the last date of the stock, NaN on missing days.
+        days = (panel.dates >= df['Date'].iloc[0]) & (panel.dates <= df['Date'].iloc[-1])
+        expected = df.set_index('Date')['Close'].reindex(panel.dates[days])
+        view = panel.symbol_view(label.upper(), 'Close')
+        np.testing.assert_array_equal(view, expected.to_numpy())
+        assert np.shares_memory(view, panel.field('Close'))
+
+        frame = panel.symbol_frame(label, ['Open', 'Volume']).dropna(subset=['Open'])
+        pd.testing.assert_frame_equal(frame.reset_index(drop=True),
+                                      df[['Date', 'Open', 'Volume']].reset_index(drop=True),
+                                      check_freq=False)
+
+
+def test_cross_section(library):
+    sd = StockData(library)
+    panel = sd.open_panel()
+    d_data = stored_tables(sd)
+    for date in panel.dates[[0, 45, 150, -1]].strftime('%Y-%m-%d'):
+        result = panel.cross_section(date, ['Close', 'Volume'])
+        assert list(result.index) == sorted(d_data)
+        for label, df in d_data.items():
+            rows = df.loc[df['Date'].dt.strftime('%Y-%m-%d') == date]
+            for field in ['Close', 'Volume']:
+                if len(rows):
+                    assert result.loc[label, field] == rows[field].iloc[0]
+                else:
+                    assert np.isnan(result.loc[label, field])
+    # Values of a date only a single stock has.
+    last = panel.cross_section(panel.dates[-1], 'Close')['Close']
+    assert last.notna().sum() == 1
+    with pytest.raises(KeyError):
+        panel.cross_section('2020-01-04')
+
+
+def test_library_without_panel(tmp_path):
+    with pytest.raises(ValueError):
+        StockData(str(tmp_path)).open_panel()
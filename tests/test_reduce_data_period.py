@@ -0,0 +1,102 @@
+"""
+# ============================================================================
+# TEST_REDUCE_DATA_PERIOD.PY
+# ----------------------------------------------------------------------------
+# Checks the sliced results of reduce_data_period() against the former
+# implementation, which returned a filtered copy, for every kind of period
+# on sorted, unsorted and timezone-naive tables, and that changing a
+# returned slice leaves the input table unchanged.
+#
+# ============================================================================
+"""
+
+# Imports.
+import numpy as np
+import pandas as pd
+import pytest
+
+from pandas.tseries.offsets import DateOffset
+from stocks.utils.utils import reduce_data_period
+from helpers import price_history
+
+
+PERIODS = ['max', '1d', '3d', '45d', '1m', '6m', '13m', '1y', '4y', '30y']
+
+
+def copy_reduce(df_input, date_col='Date', period='max'):
+    """
+    The former reduce_data_period(): a copy of the rows from the start of
+    the period on.
+    """
+    if period == 'max':
+        return df_input.copy()
+    time_type = period[-1]
+    time_quant = int(period[:-1])
+    last_date = df_input[date_col].max()
+    if time_type == 'd':
+        cutoff_date = last_date - DateOffset(days=time_quant)
+    elif time_type == 'm':
+        cutoff_date = last_date - DateOffset(months=time_quant)
+    elif time_type == 'y':
+        cutoff_date = last_date - DateOffset(years=time_quant)
+    else:
+        raise ValueError("Time period must be one of: 'd' (days), 'm' (months), 'y' (years).")
+    return df_input.loc[df_input[date_col]>=cutoff_date].copy()
+
+
+def stock_table(kind):
+    """
+    Returns a stock data table ending on the last day of a month after
+    a leap day, sorted, shuffled or without timezone.
+    """
+    rows = len(pd.bdate_range('2016-01-04', '2020-03-31'))
+    tz = None if kind == 'naive' else 'America/New_York'
+    df = price_history(rows, seed=3, start='2016-01-04', tz=tz).reset_index()
+    df.index = df.index + 500
+    if kind == 'shuffled':
+        df = df.sample(frac=1.0, random_state=0)
+    return df
+
+
+@pytest.mark.parametrize('period', PERIODS)
+@pytest.mark.parametrize('kind', ['sorted', 'shuffled', 'naive'])
+def test_matches_copy_of_filtered_rows(kind, period):
+    df = stock_table(kind)
+    expected = copy_reduce(df, 'Date', period)
+    pd.testing.assert_frame_equal(reduce_data_period(df, 'Date', period), expected)
+    pd.testing.assert_frame_equal(reduce_data_period(df, 'Date', period, copy=True), expected)
+
+
+@pytest.mark.parametrize('period', PERIODS)
+def test_changing_the_result_keeps_the_input(period):
+    df = stock_table('sorted')
+    before = df.copy()
+    result = reduce_data_period(df, 'Date', period)
+    result.loc[result.index[0], 'Close'] = -1.0
+    result['Extra'] = 0.0
+    pd.testing.assert_frame_equal(df, before)
+
+
+@pytest.mark.parametrize('kind', ['sorted', 'shuffled'])
+def test_start_and_end_dates(kind):
+    df = stock_table(kind)
+    dates = df['Date']
+    for start, end in [('2018-02-03', '2019-06-28'), ('2015-01-01', None), (None, '2016-01-04'),
+                       ('2020-04-01', None), ('2019-05-05', '2019-05-05')]:
+        mask = np.ones(len(df), dtype=bool)
+        if start:
+            mask &= dates >= pd.Timestamp(start, tz='America/New_York')
+        if end:
+            mask &= dates <= pd.Timestamp(end, tz='America/New_York')
+        result = reduce_data_period(df, 'Date', start=start, end=end)
+        pd.testing.assert_frame_equal(result, df.loc[mask])
+
+    # A period ends on the end date.
+    first, last = [pd.Timestamp(d, tz='America/New_York') for d in ['2019-05-30', '2019-06-30']]
+    result = reduce_data_period(df, 'Date', '1m', end='2019-06-30')
+    pd.testing.assert_frame_equal(result, df.loc[(dates >= first) & (dates <= last)])
+
+
+def test_unknown_period():
+    with pytest.raises(ValueError):
+        reduce_data_period(stock_table('sorted'), 'Date', '2w')
@@ -0,0 +1,68 @@
+"""
+# ============================================================================
+# TEST_REMOVE.PY
+# ----------------------------------------------------------------------------
+# Checks that a removed stock is gone from the catalog, the dividend
+# events, the data folder, the loaded data and the cached indicator
+# columns, also after the library is opened again, and that the other
+# stocks are kept.
+#
+# ============================================================================
+"""
+
+# Imports.
+import os
+import warnings
+import pandas as pd
+import pytest
+
+from stocks import StockData
+from stocks.storage.cache import CACHE_FOLDER
+from helpers import history_fetcher, price_history
+
+
+LABELS = ['aaa', 'bbb', 'ccc']
+
+
+@pytest.mark.parametrize('storage', ['pickle', 'parquet'])
+def test_removed_stock_is_gone(tmp_path, storage):
+    if storage != 'pickle':
+        pytest.importorskip('pyarrow')
+    d_history = {label: price_history(400, seed=i) for i, label in enumerate(LABELS)}
+    fetcher = history_fetcher(d_history, d_history['aaa'].index[300])
+    sd = StockData(str(tmp_path), storage=storage, fetcher=fetcher)
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        assert sd.add(LABELS) == {}
+        # Segments, bars and cached columns to remove as well.
+        fetcher.today = d_history['aaa'].index[-1]
+        assert sd.update() == {}
+    sd.load()
+    sd.add_rolling_indicator(indicator='std', windows=[5])
+    assert os.path.isdir(os.path.join(str(tmp_path), CACHE_FOLDER, 'bbb'))
+    assert {event[0] for event in sd.catalog.dividends()} == set(LABELS)
+    kept = {label: sd.d_data[label] for label in ['aaa', 'ccc']}
+
+    sd.remove('BBB')
+    assert sorted(sd.dir_list) == ['aaa', 'ccc']
+    assert 'bbb' not in sd.d_data
+    assert sd.catalog.get('bbb') is None
+    assert 'bbb' not in sd.catalog.symbols()
+    assert all(event[0] != 'bbb' for event in sd.catalog.dividends())
+    assert not os.path.exists(sd.create_folder_path('bbb'))
+    assert not os.path.exists(os.path.join(str(tmp_path), CACHE_FOLDER, 'bbb'))
+
+    # Removing it again only warns.
+    with pytest.warns(UserWarning):
+        sd.remove('bbb')
+
+    reopened = StockData(str(tmp_path))
+    assert sorted(reopened.dir_list) == ['aaa', 'ccc']
+    assert reopened.catalog.symbols() == ['aaa', 'ccc']
+    assert {event[0] for event in reopened.catalog.dividends()} == {'aaa', 'ccc'}
+    with pytest.raises(ValueError, match="'BBB'"):
+        reopened.trailing_yield(['bbb'])
+    reopened.load()
+    assert sorted(reopened.d_data) == ['aaa', 'ccc']
+    for label, df in kept.items():
+        pd.testing.assert_frame_equal(reopened.d_data[label], df[reopened.d_data[label].columns])
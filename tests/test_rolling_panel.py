@@ -0,0 +1,112 @@
+"""
+# ============================================================================
+# TEST_ROLLING_PANEL.PY
+# ----------------------------------------------------------------------------
+# Checks the panel path of every rolling indicator, over blocks of symbols
+# with different first and last dates and missing days, against pandas'
+# rolling() and ewm() on each symbol's own rows, and the panel and
+# per-label paths of StockData.add_rolling_indicator() against each other.
+#
+# ============================================================================
+"""
+
+# Imports.
+import warnings
+import numpy as np
+import pandas as pd
+import pytest
+
+from stocks import StockData
+from stocks.analysis.panel import align_panel, panel_rolling
+from stocks.analysis.rolling import (ROLLING_INDICATORS, indicator_input_columns,
+                                     indicator_column_names)
+from helpers import history_fetcher, price_history
+
+
+WINDOWS = [3, 14]
+
+
+def ragged_tables():
+    """
+    Returns stock data tables with different first and last dates, and
+    days on which some stocks did not trade.
+    """
+    d_data = {}
+    for j in range(7):
+        df = price_history(150 - 10*j, seed=j, start=f"2020-01-{2 + j:02d}")
+        df = df.loc[np.random.default_rng(j).random(len(df)) > 0.05]
+        d_data[f"s{j}"] = df.reset_index()
+    return d_data
+
+
+def pandas_indicator(df, indicator, windows, num_std=2.0):
+    """
+    Calculates an indicator of a single stock with pandas.
+    """
+    close = df['Close']
+    if indicator == 'obv':
+        return {'OBV': (np.sign(close.diff()).fillna(0.0) * df['Volume']).cumsum()}
+    d_cols = {}
+    for w in windows:
+        if indicator in ['std', 'min', 'max']:
+            d_cols[f"{indicator.upper()}_{w}"] = getattr(close.rolling(w), indicator)()
+        elif indicator == 'bollinger':
+            mid, std = close.rolling(w).mean(), close.rolling(w).std(ddof=0)
+            d_cols[f"BB_MID_{w}"] = mid
+            d_cols[f"BB_UPPER_{w}"] = mid + num_std*std
+            d_cols[f"BB_LOWER_{w}"] = mid - num_std*std
+        elif indicator == 'rsi':
+            delta = close.diff()
+            gain = delta.clip(lower=0).ewm(alpha=1/w, adjust=False, min_periods=w).mean()
+            loss = (-delta).clip(lower=0).ewm(alpha=1/w, adjust=False, min_periods=w).mean()
+            d_cols[f"RSI_{w}"] = (100 - 100/(1 + gain/loss)).where(loss != 0, 100.0)
+        elif indicator == 'atr':
+            prev = close.shift(1)
+            true_range = pd.concat([df['High'] - df['Low'], (df['High'] - prev).abs(),
+                                    (df['Low'] - prev).abs()], axis=1).max(axis=1)
+            d_cols[f"ATR_{w}"] = true_range.ewm(alpha=1/w, adjust=False, min_periods=w).mean()
+    return d_cols
+
+
+@pytest.mark.parametrize('indicator', ROLLING_INDICATORS)
+def test_panel_matches_pandas(monkeypatch, indicator):
+    # Blocks of 3 symbols, the last one partial.
+    monkeypatch.setattr('stocks.analysis.panel.PANEL_BLOCK', 3)
+    d_data = ragged_tables()
+    labels = sorted(d_data)
+    panels = [align_panel(d_data, labels, column) for column in indicator_input_columns(indicator)]
+    d_arrays = panel_rolling(panels, indicator, WINDOWS, num_std=1.5)
+    assert sorted(d_arrays) == sorted(indicator_column_names(indicator, WINDOWS))
+    for label in labels:
+        expected = pandas_indicator(d_data[label], indicator, WINDOWS, num_std=1.5)
+        for name, arr in d_arrays.items():
+            np.testing.assert_allclose(panels[0].symbol_values(arr, label),
+                                       expected[name].to_numpy(), rtol=1e-9, atol=1e-9,
+                                       err_msg=f"{label} {name}")
+        # Days on which the stock did not trade stay empty.
+        absent = ~panels[0].present[:, labels.index(label)]
+        assert all(np.isnan(arr[absent, labels.index(label)]).all() for arr in d_arrays.values())
+
+
+def test_unknown_indicator():
+    d_data = ragged_tables()
+    with pytest.raises(ValueError):
+        panel_rolling([align_panel(d_data, sorted(d_data))], 'ema', WINDOWS)
+
+
+@pytest.mark.parametrize('indicator', ROLLING_INDICATORS)
+def test_library_panel_matches_per_label(tmp_path, indicator):
+    d_history = {label: df.set_index('Date') for label, df in ragged_tables().items()}
+    sd = StockData(str(tmp_path), fetcher=history_fetcher(d_history, '2021-01-01'), cache_size=0)
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        assert sd.add(sorted(d_history)) == {}
+    names = indicator_column_names(indicator, WINDOWS)
+
+    sd.load()
+    sd.add_rolling_indicator(indicator=indicator, windows=WINDOWS)
+    expected = {label: sd.d_data[label][names] for label in sd.dir_list}
+    sd.load()
+    sd.add_rolling_indicator(indicator=indicator, windows=WINDOWS, panel=True)
+    for label, df in expected.items():
+        pd.testing.assert_frame_equal(sd.d_data[label][names], df, rtol=1e-9, atol=1e-9)
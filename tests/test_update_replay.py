@@ -0,0 +1,44 @@
+"""
+# ============================================================================
+# TEST_UPDATE_REPLAY.PY
+# ----------------------------------------------------------------------------
+# Replays daily updates of a stock across a year boundary and checks that
+# the stored data equals the columns added to the full history at once,
+# for every storage backend.
+#
+# ============================================================================
+"""
+
+# Imports.
+import warnings
+import numpy as np
+import pandas as pd
+import pytest
+
+from stocks import StockData
+from helpers import history_fetcher, price_history
+
+
+@pytest.mark.parametrize('storage', ['pickle', 'parquet', 'feather'])
+def test_daily_updates_match_full_import(tmp_path, storage):
+    if storage != 'pickle':
+        pytest.importorskip('pyarrow')
+    full = price_history(130, seed=7, start='2021-10-01')
+    year_end = int(np.searchsorted(full.index.year, 2022))
+
+    # Add the history up to mid-December, then update one day at a time.
+    fetcher = history_fetcher({'abc': full}, full.index[year_end - 11])
+    sd = StockData(str(tmp_path), storage=storage, fetcher=fetcher)
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        assert sd.add('abc') == {}
+        for today in full.index[year_end - 10:]:
+            fetcher.today = today
+            assert sd.update('abc') == {}
+
+    sd.load()
+    stored = sd.d_data['abc']
+    expected = sd.add_columns_on_import(full)
+    pd.testing.assert_frame_equal(stored[expected.columns], expected,
+                                  check_freq=False, check_index_type=False)
+    assert sd.catalog.get('abc')['row_count'] == len(full)
@@ -46,6 +46,28 @@ def check_and_convert_value_to_list(val_or_list, expected_type):
         return [val_or_list]
 
 
+def match_timezone(date, tz=None):
+    """
+    Converts a date to a pandas.Timestamp matching the timezone of the
+    stored dates, so that it can be compared against them.
+    
+    Args:
+        date (str, datetime): The date, e.g. 'YYYY-MM-DD'.
+        
+        tz (str, tzinfo): The timezone of the stored dates. Default is
+         None, for timezone-naive dates.
+    
+    Returns:
+        (pandas.Timestamp): The date in the given timezone.
+    """
+    ts = pd.Timestamp(date)
+    if tz is None:
+        return ts.tz_localize(None) if ts.tz is not None else ts
+    if ts.tz is None:
+        return ts.tz_localize(tz)
+    return ts.tz_convert(tz)
+
+
 def add_year_month_quarter(df_init, date_col='Date'):
     """
     Adds the year, month, and quarter numeric columns to the
@@ -70,7 +92,46 @@ def add_year_month_quarter(df_init, date_col='Date'):
     return df
 
 
-def arrange_data_for_chart(d_data, labels=None, column='Close', period='max'):
+# Float columns that count shares rather than prices, kept at 64 bits by
+# compact_dtypes(): a 32-bit float is exact up to 2**24 only.
+SHARE_COLUMNS = ['Volume', 'Stock Splits', 'OBV']
+
+
+def compact_dtypes(df_input):
+    """
+    Converts the stock price table to a compact schema: 32-bit floats for
+    prices and returns, small integers for the 'year', 'month' and
+    'quarter' columns and a categorical 'Q' column. Other columns, such
+    as 'Volume', 'Stock Splits' and 'Date', are kept as they are.
+    
+    Args:
+        df_input (pandas.DataFrame): The stock price table.
+    
+    Returns:
+        (pandas.DataFrame): The table with compact column types.
+    """
+    d_types = {}
+    for col, dtype in df_input.dtypes.items():
+        if col == 'year':
+            d_types[col] = 'int16'
+        elif col in ['month', 'quarter']:
+            d_types[col] = 'int8'
+        elif col == 'Q':
+            d_types[col] = 'category'
+        elif dtype == 'float64' and col not in SHARE_COLUMNS:
+            d_types[col] = 'float32'
+    return df_input.astype(d_types)
+
+
+def frame_memory(df):
+    """
+    Returns the memory used by the table, in bytes.
+    """
+    return int(df.memory_usage(deep=True).sum())
+
+
+def arrange_data_for_chart(d_data, labels=None, column='Close', period='max', start=None,
+                           end=None):
     """
     Creates a single DataFrame from the source dictionary, and
     arrange it for easy use in Altair. Adds the 'Symbol' column.
@@ -85,6 +146,10 @@ def arrange_data_for_chart(d_data, labels=None, column='Close', period='max'):
         
         period (str): The time period to plot, in days ('5d'),
          months ('6m'), years ('4y') or 'max'.
+        
+        start (str, datetime): First date to plot, overrides the period.
+        
+        end (str, datetime): Last date to plot.
     
     Returns:
         (pandas.DataFrame): Arranged data.
@@ -99,15 +164,16 @@ def arrange_data_for_chart(d_data, labels=None, column='Close', period='max'):
     if len(labels) > 25:
         warnings.warn("More than 25 separate series are present, which will be difficult to visualize. Consider plotting fewer series at once.")
     
-    # Get relevant data for each label.
+    # Get relevant data for each label, slicing the period before selecting columns.
     df_list = []
     for label in labels:
-        df_temp = reduce_data_period(d_data[label.lower()][['Date', column]],
+        df_temp = reduce_data_period(d_data[label.lower()],
                                      date_col='Date',
-                                     period=period)
-        df_temp = df_temp.loc[df_temp[column].notnull()]
-        df_temp['Symbol'] = label.upper()
-        df_list.append(df_temp)
+                                     period=period,
+                                     start=start,
+                                     end=end)
+        df_temp = df_temp.loc[df_temp[column].notnull(), ['Date', column]]
+        df_list.append(df_temp.assign(Symbol=label.upper()))
     
     # Concatenate all data.
     df = pd.concat(df_list)
@@ -115,35 +181,69 @@ def arrange_data_for_chart(d_data, labels=None, column='Close', period='max'):
     return df
 
 
-def reduce_data_period(df_input, date_col='Date', period='max'):
+def reduce_data_period(df_input, date_col='Date', period='max', start=None, end=None, copy=False):
     """
-    Returns a DataFrame with the data period reduced.
+    Returns a DataFrame with the data period reduced. Tables sorted by date
+    are sliced by binary search on the date column, and the result is a
+    slice of the input table unless a copy is requested.
     
     Args:
         df_input (pandas.DataFrame): The input data.
         
+        date_col (str): The name of the date column.
+        
         period (str): The time period to plot, in days ('5d'),
-         months ('6m'), years ('4y') or 'max'.
+         months ('6m'), years ('4y') or 'max'. The period ends on the
+         'end' date, or on the last date of the table.
+        
+        start (str, datetime): First date, inclusive. Overrides the
+         period. Default is None.
+        
+        end (str, datetime): Last date, inclusive. Default is None, which
+         keeps the data up to the last date.
+        
+        copy (bool): Whether to return a copy instead of a slice of the
+         input table. Default is False.
     
     Returns:
         (pandas.DataFrame): The reduced data.
     """
-    # Handle default period.
-    if period == 'max':
-        return df_input.copy()
-    
-    time_type = period[-1]
-    time_quant = int(period[:-1])
-    
-    last_date = df_input[date_col].max()
+    dates = df_input[date_col]
+    tz = getattr(dates.dtype, 'tz', None)
+    is_sorted = dates.is_monotonic_increasing
+    if not isinstance(end, type(None)):
+        end = match_timezone(end, tz)
     
-    if time_type == 'd':
-        cutoff_date = last_date - DateOffset(days=time_quant)
-    elif time_type == 'm':
-        cutoff_date = last_date - DateOffset(months=time_quant)
-    elif time_type == 'y':
-        cutoff_date = last_date - DateOffset(years=time_quant)
+    # Handle default period.
+    if not isinstance(start, type(None)):
+        start = match_timezone(start, tz)
+    elif period != 'max':
+        time_type = period[-1]
+        time_quant = int(period[:-1])
+        
+        if not isinstance(end, type(None)):
+            last_date = end
+        else:
+            last_date = dates.iloc[-1] if is_sorted and len(dates) else dates.max()
+        
+        if time_type == 'd':
+            start = last_date - DateOffset(days=time_quant)
+        elif time_type == 'm':
+            start = last_date - DateOffset(months=time_quant)
+        elif time_type == 'y':
+            start = last_date - DateOffset(years=time_quant)
+        else:
+            raise ValueError("Time period must be one of: 'd' (days), 'm' (months), 'y' (years).")
+    
+    if is_sorted:
+        first = 0 if isinstance(start, type(None)) else int(dates.searchsorted(start, side='left'))
+        last = len(dates) if isinstance(end, type(None)) else int(dates.searchsorted(end, side='right'))
+        df = df_input.iloc[first:last]
     else:
-        raise ValueError("Time period must be one of: 'd' (days), 'm' (months), 'y' (years).")
-    
-    return df_input.loc[df_input[date_col]>=cutoff_date].copy()
+        mask = np.ones(len(dates), dtype=bool)
+        if not isinstance(start, type(None)):
+            mask &= (dates >= start).to_numpy()
+        if not isinstance(end, type(None)):
+            mask &= (dates <= end).to_numpy()
+        df = df_input.loc[mask]
+    return df.copy() if copy else df